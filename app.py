@@ -1,14 +1,22 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt # necesario para usar en combinacion con st.pyplot()
-import seaborn as sns
 import os # para manejar rutas de archivos
 
 # importamos las clases de tus scripts en src/
 from src.procesador_de_datos import ProcesadorDatosGastos
 from src.categorizador import CategorizadorGastos
+from src.categorizador_ml import CategorizadorML
 from src.predictor import PredictorGastos
 from src.visualizador import VisualizadorGastos
+from src.libro_gastos import LibroGastos
+from src.anomalias import DetectorAnomalias
+from src.presupuestos import GestorPresupuestos
+from src.recurrentes import DetectorRecurrentes
+from src.buffer_columnar import BufferColumnar
+from src.tasas import cargar_tasas
+from src.consultas import LibroSQL
+from src.jerarquico import PredictorJerarquico
 
 # configuración inicial de la aplicación Streamlit
 st.set_page_config(
@@ -23,13 +31,18 @@ st.write('Bienvenido a tu asistente personal de finanzas. Carga tus gastos y des
 # --- Rutas de archivos ---
 RUTA_DATOS_CSV = 'data/gastos_personales.csv'
 RUTA_MODELO = 'modelo_gastos.joblib' # El modelo se guardará en la raíz del proyecto
+RUTA_PRESUPUESTOS = 'data/presupuestos.csv' # presupuestos por categoría definidos por el usuario
+RUTA_MODELO_CATEGORIAS = 'data/categorizador_ml.joblib' # modelo aprendido opcional para lo que las reglas no reconocen
+RUTA_BUFFER = 'data/gastos_procesados.arrow' # transacciones procesadas, compartidas por todas las secciones sin copiarlas
+RUTA_CUARENTENA = 'data/cuarentena.csv' # filas del CSV rechazadas en la carga, con el motivo
 
 # --- Función para cargar y procesar datos (con cache para eficiencia) ---
-@st.cache_data
+@st.cache_resource
 def cargar_y_procesar_datos():
     """
-    Carga, limpia y categoriza los datos de gastos.
-    Usa el decorador de caché de Streamlit para no recalcular si los datos no cambian.
+    Carga, limpia y categoriza los datos de gastos y los publica en un buffer columnar mapeado en memoria.
+    Usa cache_resource (el mismo buffer en cada ejecución) en lugar de cache_data,
+    que entregaba una copia completa del DataFrame en cada recarga de la página.
     """
     procesador = ProcesadorDatosGastos()
     if not os.path.exists(RUTA_DATOS_CSV):
@@ -37,21 +50,61 @@ def cargar_y_procesar_datos():
         st.warning('Asegúrate de ejecutar el script generador_datos_sinteticos.py primero.')
         return None
 
-    if procesador.cargar_datos(RUTA_DATOS_CSV):
+    # carga validada: las filas con fecha, monto o descripción inválidos se apartan a RUTA_CUARENTENA
+    if procesador.cargar_datos_validados(RUTA_DATOS_CSV, RUTA_CUARENTENA):
         procesador.limpiar_datos()
+        procesador.eliminar_duplicados() # descarta los bloques reimportados dentro del archivo; los cargos iguales sueltos solo se marcan
         
-        categorizador = CategorizadorGastos()
-        df_final = categorizador.categorizar(procesador.df.copy()) # Trabajar con una copia
-        return df_final
+        # montos convertidos a pesos y ajustados por inflación, si hay tipos de cambio / IPC en data/
+        tasas = cargar_tasas()
+        if tasas is not None:
+            procesador.agregar_montos_ajustados(tasas)
+        
+        modelo_ml = None
+        if os.path.exists(RUTA_MODELO_CATEGORIAS):
+            modelo_ml = CategorizadorML()
+            if not modelo_ml.cargar_modelo(RUTA_MODELO_CATEGORIAS):
+                modelo_ml = None
+        
+        buffer = BufferColumnar.desde_dataframe(procesador.df, RUTA_BUFFER)
+        
+        # la categoría se calcula sobre una vista de la descripción y se agrega al buffer como columna aparte
+        categorizador = CategorizadorGastos(modelo_ml=modelo_ml)
+        df_categorizado = categorizador.categorizar(buffer.a_dataframe(['descripcion']))
+        buffer.agregar_columna('categoria_auto', df_categorizado['categoria_auto'])
+        return buffer
     else:
         st.error('No se pudieron cargar o procesar los datos. Revisa el archivo CSV.')
         return None
 
+@st.cache_resource
+def crear_libro_sql(_buffer, ruta_buffer, modificado):
+    """
+    Copia las transacciones del buffer a SQLite (en memoria, indexada por fecha, período y categoría)
+    para los resúmenes y las consultas a medida. Se arma una vez por buffer: el buffer no se hashea
+    (el guion bajo lo excluye de la clave), la caché se identifica por la ruta y la fecha de
+    modificación de su archivo, que cambian cada vez que se vuelve a publicar.
+    """
+    return LibroSQL.desde_buffer(_buffer)
+
 # --- Cargar y procesar los datos una vez ---
-df_gastos = cargar_y_procesar_datos()
+buffer_gastos = cargar_y_procesar_datos()
+# cada sección lee vistas del buffer: las columnas no se copian
+df_gastos = buffer_gastos.a_dataframe() if buffer_gastos is not None else None
 
 if df_gastos is not None:
     st.success(f'Datos cargados y procesados: {len(df_gastos)} transacciones.')
+    
+    # montos a mostrar: nominales o, si se cargaron tasas, convertidos / ajustados por inflación
+    opciones_monto = {'Nominal': 'monto'}
+    if 'monto_ars' in df_gastos.columns:
+        opciones_monto['Convertido a pesos'] = 'monto_ars'
+    if 'monto_real' in df_gastos.columns:
+        opciones_monto['Ajustado por inflación (pesos del último mes)'] = 'monto_real'
+    columna_monto = opciones_monto[st.sidebar.radio('Montos', list(opciones_monto))]
+    
+    # libro ordenado por fecha con índice mensual, compartido por el gráfico mensual y las alertas
+    libro_gastos = LibroGastos(df_gastos)
 
     # --- Sección de KPIs / Estadísticas Resumen ---
     st.header('📈 Estadísticas Clave')
@@ -60,7 +113,8 @@ if df_gastos is not None:
     # Instanciamos un procesador temporal para usar su método de resumen
     temp_procesador = ProcesadorDatosGastos()
     temp_procesador.df = df_gastos # Asignamos el df ya procesado
-    estadisticas = temp_procesador.obtener_estadisticas_resumen()
+    temp_procesador.libro_sql = crear_libro_sql(buffer_gastos, buffer_gastos.ruta, os.stat(buffer_gastos.ruta).st_mtime_ns) # los resúmenes se calculan como consultas agrupadas en SQLite
+    estadisticas = temp_procesador.obtener_estadisticas_resumen(columna_monto=columna_monto)
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -77,16 +131,26 @@ if df_gastos is not None:
     visualizador = VisualizadorGastos() # Instanciar visualizador
     
     # reutilizamos el metodo procesasdor para un reumen tabular
-    resumen_categoria_df = temp_procesador.obtener_resumen_categoria()
+    resumen_categoria_df = temp_procesador.obtener_resumen_categoria(columna_monto=columna_monto)
     if resumen_categoria_df is not None:
         st.subheader('Resumen de Gastos por Categoría')
         st.dataframe(resumen_categoria_df)
     else:
         st.warning('No se pudo generar el resumen por categoría.')
     
+    # agrupamientos a medida resueltos en SQLite, sin pasar por el DataFrame completo
+    with st.expander('Consulta a medida'):
+        columnas_grupo = [c for c in ('periodo', 'categoria_auto', 'categoria', 'dia_semana', 'es_fin_semana', 'usuario_id') if c in df_gastos.columns]
+        agrupar_por = st.multiselect('Agrupar por', columnas_grupo, default=columnas_grupo[:1])
+        rango = st.date_input('Entre fechas', value=(estadisticas['fecha_inicio'].date(), estadisticas['fecha_fin'].date()))
+        if agrupar_por and len(rango) == 2:
+            resultado_consulta = temp_procesador.libro_sql.agrupar(agrupar_por, columna_monto=columna_monto, desde=rango[0], hasta=rango[1])
+            if resultado_consulta is not None:
+                st.dataframe(resultado_consulta)
+    
     # grafico de barras de categorías llamando a visulaizador.py por ejemplo
     st.subheader('Gráfico de Gastos Totales por Categoría')
-    fig_barras = visualizador.generar_grafico_barras_categorias(df_gastos, columna_categoria='categoria_auto')
+    fig_barras = visualizador.generar_grafico_barras_categorias(df_gastos, columna_categoria='categoria_auto', columna_monto=columna_monto)
     if fig_barras:
         st.pyplot(fig_barras) # mostramos el gráfico con Streamlit
         plt.close(fig_barras) # Cerramos la figura para liberar memoria
@@ -98,7 +162,7 @@ if df_gastos is not None:
     
     # gráfico de lenea de gastos mensuales
     st.subheader('Gráfico de gastos mensuales a lo largo del Tiempo')
-    fig_linea = visualizador.generar_grafico_linea_mensual(df_gastos)
+    fig_linea = visualizador.generar_grafico_linea_mensual(df_gastos, columna_monto=columna_monto, libro=libro_gastos)
     if fig_linea:
         st.pyplot(fig_linea)
         plt.close(fig_linea)
@@ -107,7 +171,7 @@ if df_gastos is not None:
     
     # generamos un heatmap de gastos por mes y categoría
     st.subheader('Gráfico tipo Heatmap de Gastos por Mes y Categoría')
-    fig_heatmap = visualizador.generar_heatmap_gastos_por_mes_categoria(df_gastos)
+    fig_heatmap = visualizador.generar_heatmap_gastos_por_mes_categoria(df_gastos, columna_monto=columna_monto)
     if fig_heatmap:
         st.pyplot(fig_heatmap)
         plt.close(fig_heatmap)
@@ -116,7 +180,7 @@ if df_gastos is not None:
     
     # generemos un histograma de montos
     st.subheader('Gráfico: Distribución de Montos de Gastos')
-    fig_histograma = visualizador.generar_histograma_montos(df_gastos)
+    fig_histograma = visualizador.generar_histograma_montos(df_gastos, columna_monto=columna_monto)
     if fig_histograma:
         st.pyplot(fig_histograma)
         plt.close(fig_histograma)
@@ -127,12 +191,20 @@ if df_gastos is not None:
     st.header('Predicción de Gastos')
     predictor = PredictorGastos()
     
+    # los gastos recurrentes (suscripciones, servicios) se proyectan aparte y la regresión solo modela el resto
+    detector_recurrentes = DetectorRecurrentes()
+    df_gastos_pred = detector_recurrentes.detectar(buffer_gastos.a_dataframe(), columna_monto=columna_monto) # vista propia: las columnas que agrega no tocan df_gastos
+    
     # preparamos los datos para el predictor
-    df_preparado_pred = predictor.preparar_datos(df_gastos.copy())
+    df_preparado_pred = predictor.preparar_datos(df_gastos_pred, recurrentes=detector_recurrentes, columna_monto=columna_monto)
     
     if df_preparado_pred is not None and not df_preparado_pred.empty:
+        prediccion_proximo_mes = None
         # intentamos cargar el modelo si ya existe
-        if not predictor.cargar_modelo(RUTA_MODELO):
+        # si el modelo guardado se entrenó con otra variable objetivo (total vs. discrecional) u otro monto se reentrena
+        if (not predictor.cargar_modelo(RUTA_MODELO)
+                or predictor.columna_objetivo_modelo != predictor.columna_objetivo
+                or predictor.columna_monto_modelo != predictor.columna_monto):
             st.info('Modelo no encontrado o error al cargarlo. Entrenando nuevo modelo...')
             # si no se pudo cargar, entrenamos y guardamos el modelo
             if predictor.entrenar_modelo(df_preparado_pred):
@@ -148,10 +220,24 @@ if df_gastos is not None:
             if prediccion_proximo_mes is not None:
                 st.subheader('Estimación de Gasto para el Próximo Mes:')
                 st.write(f'El gasto predicho es de: **${prediccion_proximo_mes:,.2f}**')
+                if not detector_recurrentes.recurrentes.empty:
+                    st.write('Incluye los gastos recurrentes detectados:')
+                    st.dataframe(detector_recurrentes.recurrentes[['comercio', 'periodicidad', 'monto_tipico', 'ultima_fecha']])
             else:
                 st.warning('No se pudo realizar la predicción de gasto.')
         else:
             st.warning('El modelo de predicción no está disponible.')
+        
+        # desglose del próximo mes por categoría y comercio, reconciliado para que las partes sumen
+        # la predicción de arriba: lo discrecional se reparte y los recurrentes van a su comercio
+        predictor_jerarquico = PredictorJerarquico(columna_monto=columna_monto)
+        if predictor_jerarquico.ajustar(df_gastos_pred, recurrentes=detector_recurrentes):
+            st.subheader(f'Desglose previsto para {predictor_jerarquico.periodo_siguiente}')
+            desglose_categorias = predictor_jerarquico.desglose('categoria', total=prediccion_proximo_mes)
+            st.write(f'Total por categorías: **${desglose_categorias["prediccion"].sum():,.2f}**')
+            st.dataframe(desglose_categorias)
+            with st.expander('Por comercio'):
+                st.dataframe(predictor_jerarquico.desglose('comercio', total=prediccion_proximo_mes))
     else:
         st.warning('No hay suficientes datos procesados para entrenar o usar el modelo de predicción.')
         
@@ -161,16 +247,44 @@ if df_gastos is not None:
 
     # ejemplo de alerta simple: si el último mes fue un outlier
     if df_gastos is not None and not df_gastos.empty:
-        # calculamos el gasto del último mes
-        ultimo_mes_gasto = df_gastos[df_gastos['fecha'].dt.to_period('M') == df_gastos['fecha'].dt.to_period('M').max()]['monto'].sum()
+        # calculamos el gasto del último mes (recorte directo sobre el libro ordenado)
+        ultimo_mes_gasto = libro_gastos.ultimo_mes()[columna_monto].sum()
         
         # obtenemos el gasto promedio mensual de todos los datos
-        gastos_mensuales_promedio = df_gastos.groupby(df_gastos['fecha'].dt.to_period('M'))['monto'].sum().mean()
+        gastos_mensuales_promedio = libro_gastos.totales_mensuales(columna_monto).mean()
         
         if ultimo_mes_gasto > (gastos_mensuales_promedio * 1.2): # si por ejemplo gastó 20% más que el promedio mensual
             st.warning(f'¡Atención! Tu gasto total del último mes ({ultimo_mes_gasto:,.2f}) fue un 20% más alto que tu promedio mensual ({gastos_mensuales_promedio:,.2f}).')
         else:
             st.info('Tus gastos recientes están dentro de lo normal. ¡estamos cuidando el dinero!')
+        
+        # alertas por categoría y comercio (mediana/MAD por grupo y z-score mensual por categoría)
+        detector_anomalias = DetectorAnomalias(columna_monto=columna_monto)
+        detector_anomalias.ajustar(df_gastos)
+        alertas_anomalias = detector_anomalias.generar_alertas(df_gastos)
+        if not alertas_anomalias.empty:
+            st.subheader('Gastos inusuales del último mes')
+            for mensaje in alertas_anomalias['mensaje'].head(10):
+                st.warning(mensaje)
+    
+    # presupuestos por categoría: exceso y ritmo de gasto del último mes
+    st.subheader('Presupuestos del Mes')
+    gestor_presupuestos = GestorPresupuestos()
+    if os.path.exists(RUTA_PRESUPUESTOS) and gestor_presupuestos.cargar_presupuestos(RUTA_PRESUPUESTOS):
+        totales_presupuesto = temp_procesador.obtener_totales_mensuales_categoria(columna_monto=columna_monto)
+        if totales_presupuesto is not None:
+            gestor_presupuestos.acumular(totales_presupuesto)
+            # previsión del modelo para el mes evaluado, ajustada con los meses anteriores
+            periodo_presupuesto = libro_gastos.periodo(libro_gastos.cantidad_meses - 1)
+            predictor_mes = PredictorJerarquico(columna_monto=columna_monto)
+            if libro_gastos.cantidad_meses > 1 and predictor_mes.ajustar(libro_gastos.df.iloc[:libro_gastos.limites_mes[-2]]):
+                gestor_presupuestos.definir_proyecciones(predictor_mes.desglose('categoria'), periodo_presupuesto)
+            evaluacion_presupuestos = gestor_presupuestos.evaluar()
+            for mensaje in evaluacion_presupuestos['mensaje'].dropna():
+                st.warning(mensaje)
+            st.dataframe(evaluacion_presupuestos.drop(columns=['usuario_id', 'mensaje']))
+    else:
+        st.info(f'Definí tus presupuestos por categoría en "{RUTA_PRESUPUESTOS}" (categoria, monto_presupuesto, periodo opcional).')
     
     st.markdown('---')
     st.write('Desarrollado por Tony Gael Data Master.')
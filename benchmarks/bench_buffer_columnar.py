@@ -0,0 +1,144 @@
+"""
+Benchmark de memoria del dashboard: copias completas del DataFrame y pico de memoria por ejecución.
+
+Corre sin Streamlit las mismas etapas que app.py (estadísticas, gráficos, recurrentes,
+anomalías, presupuestos) sobre N transacciones, de dos formas:
+  - copias: como antes, con cache_data (una copia al entregar el DataFrame en cada ejecución)
+    y las copias de detectar(df.copy()), del heatmap y de las alertas de anomalías;
+  - buffer: cada etapa lee una vista de BufferColumnar (archivo Arrow IPC mapeado en memoria).
+Cuenta las llamadas a DataFrame.copy(deep=True) sobre el DataFrame completo (todas las filas y
+columnas; las copias internas de seaborn de una o dos columnas no cuentan) y mide el pico
+de memoria con tracemalloc. Falla si el modo buffer hace alguna copia completa.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_buffer_columnar --filas 200000 --ejecuciones 2
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.anomalias import DetectorAnomalias
+from src.buffer_columnar import BufferColumnar
+from src.categorizador import CategorizadorGastos
+from src.libro_gastos import LibroGastos
+from src.presupuestos import GestorPresupuestos
+from src.procesador_de_datos import ProcesadorDatosGastos
+from src.recurrentes import DetectorRecurrentes
+from src.visualizador import VisualizadorGastos
+
+copias_completas = 0
+
+def contar_copias(filas_totales, columnas_totales):
+    """
+    Reemplaza DataFrame.copy por una versión que cuenta las copias profundas de todo el DataFrame
+    """
+    copiar = pd.DataFrame.copy
+
+    def copia_contada(self, deep=True):
+        global copias_completas
+        if deep and len(self) >= filas_totales and len(self.columns) >= columnas_totales:
+            copias_completas += 1
+        return copiar(self, deep=deep)
+
+    pd.DataFrame.copy = copia_contada
+
+def generar_csv(filas, ruta):
+    base = pd.read_csv('data/gastos_personales.csv')
+    rng = np.random.default_rng(42)
+    df = base.iloc[rng.integers(0, len(base), size=filas)].reset_index(drop=True)
+    dias = rng.integers(0, 365 * 3, size=filas)
+    df['fecha'] = (np.datetime64('2022-01-01') + dias.astype('timedelta64[D]')).astype(str)
+    df.to_csv(ruta, index=False)
+
+def procesar(ruta_csv):
+    procesador = ProcesadorDatosGastos()
+    procesador.cargar_datos(ruta_csv)
+    procesador.limpiar_datos()
+    procesador.eliminar_duplicados()
+    return procesador
+
+def ejecutar_etapas(df_gastos, df_recurrentes, copiar_en_etapas):
+    """
+    Las secciones del dashboard, en el mismo orden que app.py
+    """
+    import matplotlib.pyplot as plt
+
+    libro = LibroGastos(df_gastos)
+    resumen = ProcesadorDatosGastos()
+    resumen.df = df_gastos
+    resumen.obtener_estadisticas_resumen()
+    resumen.obtener_resumen_categoria()
+
+    visualizador = VisualizadorGastos()
+    figuras = [
+        visualizador.generar_grafico_barras_categorias(df_gastos),
+        visualizador.generar_grafico_linea_mensual(df_gastos, libro=libro),
+        # el heatmap antes copiaba el DataFrame completo para agregarle el número de mes
+        visualizador.generar_heatmap_gastos_por_mes_categoria(df_gastos.copy() if copiar_en_etapas else df_gastos),
+        visualizador.generar_histograma_montos(df_gastos),
+    ]
+    for figura in figuras:
+        plt.close(figura)
+
+    DetectorRecurrentes().detectar(df_recurrentes)
+
+    detector = DetectorAnomalias().ajustar(df_gastos)
+    # generar_alertas antes copiaba el DataFrame completo para agregarle los puntajes
+    detector.generar_alertas(df_gastos.copy() if copiar_en_etapas else df_gastos)
+
+    gestor = GestorPresupuestos()
+    gestor.cargar_presupuestos('data/presupuestos.csv')
+    gestor.acumular(resumen.obtener_totales_mensuales_categoria())
+    gestor.evaluar()
+
+def dashboard_con_copias(df_cacheado):
+    df_gastos = df_cacheado.copy()  # lo que entregaba st.cache_data en cada ejecución
+    ejecutar_etapas(df_gastos, df_gastos.copy(), copiar_en_etapas=True)
+
+def dashboard_con_buffer(buffer):
+    ejecutar_etapas(buffer.a_dataframe(), buffer.a_dataframe(), copiar_en_etapas=False)
+
+def medir(nombre, funcion, ejecuciones):
+    global copias_completas
+    copias_completas = 0
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    for _ in range(ejecuciones):
+        funcion()
+    duracion = (time.perf_counter() - inicio) / ejecuciones
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    copias = copias_completas / ejecuciones
+    print(f'{nombre:<8} {copias:>22.1f} {pico / 2**20:>14.1f} {duracion:>11.2f}')
+    return copias
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=200_000)
+    parser.add_argument('--ejecuciones', type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_csv = os.path.join(directorio, 'gastos.csv')
+        print(f'Generando {args.filas:,} transacciones...')
+        generar_csv(args.filas, ruta_csv)
+
+        procesador = procesar(ruta_csv)
+        categorizador = CategorizadorGastos()
+        df_cacheado = categorizador.categorizar(procesador.df.copy())
+        buffer = BufferColumnar.desde_dataframe(procesador.df, os.path.join(directorio, 'gastos.arrow'))
+        buffer.agregar_columna('categoria_auto', categorizador.categorizar(buffer.a_dataframe(['descripcion']))['categoria_auto'])
+
+        contar_copias(len(procesador.df), len(procesador.df.columns))
+        print(f'\n{"modo":<8} {"copias completas/ejec.":>22} {"pico MiB":>14} {"seg/ejec.":>11}')
+        medir('copias', lambda: dashboard_con_copias(df_cacheado), args.ejecuciones)
+        copias_buffer = medir('buffer', lambda: dashboard_con_buffer(buffer), args.ejecuciones)
+        del buffer
+
+    assert copias_buffer == 0, f'el dashboard con buffer hizo {copias_buffer} copias completas por ejecución'
+    print('\nEl dashboard con buffer no hace copias completas del DataFrame.')
@@ -0,0 +1,61 @@
+"""
+Benchmark del categorizador aprendido (CategorizadorML).
+
+Entrena por lotes con partial_fit y mide cuántas descripciones por minuto
+categoriza la predicción por lotes. Objetivo: 1 millón de descripciones/minuto o más.
+Se miden dos casos: descripciones realistas (comercio + número de ticket, muchos
+comercios repetidos) y el peor caso, donde todas las descripciones son distintas.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_categorizador_ml --filas 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.categorizador import CategorizadorGastos
+from src.categorizador_ml import CategorizadorML
+
+OBJETIVO_POR_MINUTO = 1_000_000
+
+def generar_descripciones(filas, todas_distintas=False):
+    rng = np.random.default_rng(42)
+    reglas = CategorizadorGastos().reglas_categoria
+    pares = [(patron, categoria) for categoria, patrones in reglas.items() for patron in patrones]
+    elegidos = rng.integers(0, len(pares), size=filas)
+    comercios = np.array([p for p, _ in pares], dtype=object)[elegidos]
+    categorias = np.array([c for _, c in pares], dtype=object)[elegidos]
+    if todas_distintas:
+        # sufijos de letras: no se eliminan al normalizar, así cada descripción es única
+        letras = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+        sufijos = [''.join(s) for s in letras[rng.integers(0, 26, size=(filas, 6))]]
+        descripciones = comercios + ' ' + np.array(sufijos, dtype=object)
+    else:
+        descripciones = comercios + ' ' + rng.integers(1000, 9999, size=filas).astype(str).astype(object)
+    return pd.DataFrame({'descripcion': descripciones, 'categoria': categorias})
+
+def medir_prediccion(nombre, modelo, df):
+    inicio = time.perf_counter()
+    predicciones = modelo.predecir(df['descripcion'])
+    duracion = time.perf_counter() - inicio
+    por_minuto = len(df) / duracion * 60
+    exactitud = (predicciones == df['categoria'].to_numpy()).mean()
+    estado = 'OK' if por_minuto >= OBJETIVO_POR_MINUTO else 'DEBAJO DEL OBJETIVO'
+    print(f'{nombre:<28} {duracion:7.2f} s  {por_minuto:14,.0f} desc/min  exactitud {exactitud:.3f}  [{estado}]')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--tamano-lote', type=int, default=100_000)
+    args = parser.parse_args()
+
+    entrenamiento = generar_descripciones(200_000, todas_distintas=True)
+    modelo = CategorizadorML()
+    inicio = time.perf_counter()
+    modelo.entrenar_parcial(entrenamiento, tamano_lote=args.tamano_lote)
+    print(f'Entrenamiento por lotes (partial_fit, {len(entrenamiento):,} filas): {time.perf_counter() - inicio:.2f} s\n')
+
+    medir_prediccion('comercios repetidos', modelo, generar_descripciones(args.filas))
+    medir_prediccion('todas distintas (peor caso)', modelo, generar_descripciones(args.filas, todas_distintas=True))
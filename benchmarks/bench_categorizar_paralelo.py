@@ -0,0 +1,51 @@
+"""
+Benchmark de la categorización en paralelo (CategorizadorGastos.categorizar con procesos > 1).
+
+Categoriza la misma columna de descripciones en serie y con 2, 4 y 8 procesos,
+verifica que el resultado sea idéntico al serial y muestra la aceleración y la
+eficiencia por núcleo (1.0 = escalado lineal).
+Con menos núcleos que procesos la aceleración queda limitada por los núcleos disponibles.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_categorizar_paralelo --filas 4000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.categorizador import CategorizadorGastos
+
+def generar_descripciones(filas):
+    rng = np.random.default_rng(42)
+    reglas = CategorizadorGastos().reglas_categoria
+    comercios = np.array([patron for patrones in reglas.values() for patron in patrones] + ['KIOSCO', 'PELUQUERIA'], dtype=object)
+    descripciones = comercios[rng.integers(0, len(comercios), size=filas)] + ' ' + rng.integers(1000, 9999, size=filas).astype(str).astype(object)
+    return pd.DataFrame({'descripcion': descripciones})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=4_000_000)
+    parser.add_argument('--procesos', type=int, nargs='+', default=[2, 4, 8])
+    args = parser.parse_args()
+
+    print(f'Núcleos disponibles: {os.cpu_count()}')
+    df = generar_descripciones(args.filas)
+    categorizador = CategorizadorGastos()
+
+    inicio = time.perf_counter()
+    serial = categorizador.categorizar(df[['descripcion']].copy())['categoria_auto'].to_numpy()
+    t_serial = time.perf_counter() - inicio
+    print(f'\n{"procesos":>8} {"segundos":>9} {"aceleración":>12} {"eficiencia":>11}')
+    print(f'{1:>8} {t_serial:9.2f} {1.0:12.2f} {1.0:11.2f}')
+
+    for procesos in args.procesos:
+        inicio = time.perf_counter()
+        paralelo = categorizador.categorizar(df[['descripcion']].copy(), procesos=procesos)['categoria_auto'].to_numpy()
+        duracion = time.perf_counter() - inicio
+        assert (paralelo == serial).all(), f'el resultado con {procesos} procesos no coincide con el serial'
+        print(f'{procesos:>8} {duracion:9.2f} {t_serial / duracion:12.2f} {t_serial / duracion / procesos:11.2f}')
+
+    print('\nResultados idénticos al camino serial en todos los casos.')
@@ -0,0 +1,73 @@
+"""
+Benchmark de los resúmenes del procesador en pandas contra las consultas indexadas de LibroSQL.
+
+Sobre N transacciones ya limpias mide la carga a SQLite (una vez, con los índices) y cada
+consulta en los dos motores: resumen mensual, resumen por categoría, patrones y un
+agrupamiento a medida (período x categoría de un mes), que en SQLite usa el índice por
+fecha y en pandas filtra el DataFrame completo. Verifica que los resultados coincidan.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_consultas --filas 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.procesador_de_datos import ProcesadorDatosGastos
+from src.consultas import LibroSQL
+
+CATEGORIAS = np.array(['Comida', 'Transporte', 'Servicios', 'Entretenimiento', 'Salud', 'Compras'], dtype=object)
+
+def generar_procesador(filas):
+    rng = np.random.default_rng(42)
+    procesador = ProcesadorDatosGastos()
+    procesador.df = pd.DataFrame({
+        'fecha': pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, size=filas), unit='D'),
+        'descripcion': np.char.add('COMERCIO ', rng.integers(0, 5_000, size=filas).astype(str)).astype(object),
+        'monto': rng.uniform(100, 50_000, size=filas).round(2),
+        'categoria': rng.choice(CATEGORIAS, size=filas),
+    })
+    procesador.limpiar_datos()
+    return procesador
+
+def medir(nombre, funcion, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return resultado, mejor
+
+def agrupar_pandas(df, desde, hasta):
+    mes = df[(df['fecha'] >= desde) & (df['fecha'] < pd.Timestamp(hasta) + pd.Timedelta(days=1))]
+    return mes.groupby(['periodo', 'categoria'])['monto'].agg(['sum', 'mean', 'count'])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f'Generando {args.filas:,} transacciones...')
+    procesador = generar_procesador(args.filas)
+    inicio = time.perf_counter()
+    libro = LibroSQL.desde_dataframe(procesador.df)
+    print(f'Carga a SQLite con índices: {time.perf_counter() - inicio:.2f} s\n')
+
+    consultas = {
+        'resumen mensual': (procesador.obtener_resumen_mensual, libro.resumen_mensual),
+        'resumen por categoría': (procesador.obtener_resumen_categoria, libro.resumen_categoria),
+        'patrones': (lambda: procesador.detectar_patrones()['por_dia'], lambda: libro.detectar_patrones()['por_dia']),
+        'agrupamiento de un mes': (
+            lambda: agrupar_pandas(procesador.df, '2024-06-01', '2024-06-30'),
+            lambda: libro.agrupar(['periodo', 'categoria'], desde='2024-06-01', hasta='2024-06-30'),
+        ),
+    }
+    print(f'{"consulta":<26} {"pandas":>10} {"SQLite":>10}')
+    for nombre, (con_pandas, con_sql) in consultas.items():
+        esperado, t_pandas = medir(nombre, con_pandas)
+        obtenido, t_sql = medir(nombre, con_sql)
+        assert np.allclose(esperado.select_dtypes('number').to_numpy(dtype=float), obtenido.select_dtypes('number').to_numpy(dtype=float)), \
+            f'{nombre}: los resultados no coinciden'
+        print(f'{nombre:<26} {t_pandas * 1000:8.1f}ms {t_sql * 1000:8.1f}ms')
@@ -0,0 +1,63 @@
+"""
+Benchmark del parseo de fechas sobre N fechas ISO (por defecto 10 millones).
+
+Compara el camino anterior (pd.to_datetime con inferencia, repetido en
+limpiar_datos, preparar_datos y el gráfico mensual) contra parsear_fechas,
+que detecta el formato una vez y deja la columna ya convertida para los pasos siguientes.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_fechas --filas 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.fechas import detectar_formato, parsear_fechas
+
+def generar_fechas(filas, proporcion_invalidas=0.001):
+    rng = np.random.default_rng(42)
+    dias = rng.integers(0, 365 * 5, size=filas)
+    fechas = (np.datetime64('2020-01-01') + dias.astype('timedelta64[D]')).astype(str).astype(object)
+    invalidas = rng.random(filas) < proporcion_invalidas
+    fechas[invalidas] = 'fecha rota'
+    return pd.Series(fechas, name='fecha')
+
+def medir(nombre, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    print(f'{nombre:<45} {duracion:8.2f} s')
+    return resultado, duracion
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    print(f'Generando {args.filas:,} fechas ISO...')
+    serie = generar_fechas(args.filas)
+    print(f'Formato detectado: {detectar_formato(serie)}\n')
+
+    def camino_anterior():
+        # las tres conversiones que hacía el dashboard sobre la misma columna
+        fechas = None
+        for _ in range(3):
+            fechas = pd.to_datetime(serie, errors='coerce')
+        return fechas
+
+    def camino_nuevo():
+        fechas = parsear_fechas(serie)
+        for _ in range(2):
+            fechas = parsear_fechas(fechas)  # ya es datetime: no se vuelve a parsear
+        return fechas
+
+    anterior, t_anterior = medir('pd.to_datetime con inferencia (x3)', camino_anterior)
+    nuevo, t_nuevo = medir('parsear_fechas (1 parseo + 2 reutilizaciones)', camino_nuevo)
+
+    # el manejo de fechas inválidas tiene que ser el mismo
+    assert anterior.isna().sum() == nuevo.isna().sum()
+    assert anterior.equals(nuevo)
+    print(f'\nFechas inválidas descartadas: {nuevo.isna().sum():,} (idéntico en ambos caminos)')
+    print(f'Aceleración: {t_anterior / t_nuevo:.1f}x')
@@ -0,0 +1,70 @@
+"""
+Benchmark del tiempo de importación (arranque en frío).
+
+Importa cada módulo en un proceso nuevo con `python -X importtime`, suma el
+tiempo acumulado del import de más alto nivel y verifica que las librerías
+pesadas (scikit-learn, matplotlib, seaborn, scipy, pyarrow) no se carguen
+hasta que realmente se usan (pandas 2 ya carga pyarrow si está instalado, así que
+se informan solo las que se agregan a las de pandas). Se compara contra importar solo pandas.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_importacion --repeticiones 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# módulos que no deberían cargarse al importar el procesador de datos
+LIBRERIAS_PESADAS = ['sklearn', 'matplotlib', 'seaborn', 'scipy', 'pyarrow']
+
+IMPORTACIONES = {
+    'pandas (referencia)': 'import pandas',
+    'ProcesadorDatosGastos': 'from src.procesador_de_datos import ProcesadorDatosGastos',
+    'PredictorGastos': 'from src.predictor import PredictorGastos',
+    'CategorizadorGastos': 'from src.categorizador import CategorizadorGastos',
+    'VisualizadorGastos': 'from src.visualizador import VisualizadorGastos',
+    'GestorPresupuestos': 'from src.presupuestos import GestorPresupuestos',
+}
+
+def medir_importacion(codigo):
+    """
+    Returns:
+        tuple: (tiempo acumulado en ms, conjunto de módulos de primer nivel importados)
+    """
+    chequeo = f'{codigo}; import sys; print(",".join(sorted({{m.split(".")[0] for m in sys.modules}})))'
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', chequeo], capture_output=True, text=True, check=True)
+
+    total_us = 0
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or '|' not in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        if not acumulado.strip().isdigit():
+            continue  # encabezado
+        # solo los imports de primer nivel (sin sangría) para no contar dos veces
+        if not nombre.startswith('  '):
+            total_us += int(acumulado)
+    return total_us / 1000, set(proceso.stdout.strip().split(','))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = {}
+    cargadas_por_pandas = set()
+    for nombre, codigo in IMPORTACIONES.items():
+        tiempos = []
+        for _ in range(args.repeticiones):
+            tiempo, modulos = medir_importacion(codigo)
+            tiempos.append(tiempo)
+        resultados[nombre] = statistics.median(tiempos)
+        if not cargadas_por_pandas:
+            cargadas_por_pandas = modulos  # la primera importación es la de referencia
+        cargadas = [libreria for libreria in LIBRERIAS_PESADAS if libreria in modulos and libreria not in cargadas_por_pandas]
+        print(f'{nombre:<25} {resultados[nombre]:8.1f} ms   pesadas además de pandas: {", ".join(cargadas) or "ninguna"}')
+
+    referencia = resultados['pandas (referencia)']
+    relacion = resultados['ProcesadorDatosGastos'] / referencia
+    print(f'\nProcesadorDatosGastos / pandas: {relacion:.2f}x (objetivo <= 1.2x)')
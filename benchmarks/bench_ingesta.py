@@ -0,0 +1,90 @@
+"""
+Benchmark de la carga de un CSV de N transacciones con celdas inválidas.
+
+Compara el camino anterior (pd.read_csv con tipos inferidos + limpiar_datos) contra la
+ingesta validada (IngestorGastos: lector CSV de pyarrow con tipos explícitos, validación y
+cuarentena en la misma pasada), ambos seguidos de limpiar_datos. Verifica que queden las
+mismas transacciones válidas y muestra que el orden anterior de limpiar_datos
+(.abs() antes de pd.to_numeric) fallaba con un solo monto no numérico.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_ingesta --filas 10000000 --invalidas 0.001
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.procesador_de_datos import ProcesadorDatosGastos
+
+def generar_csv(ruta, filas, proporcion_invalidas):
+    rng = np.random.default_rng(42)
+    fechas = (pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, size=filas), unit='D')).strftime('%Y-%m-%d').to_numpy(dtype=object)
+    montos = rng.uniform(100, 50_000, size=filas).round(2).astype(str).astype(object)
+    descripciones = np.char.add('SUPERMERCADO ', rng.integers(0, 10_000, size=filas).astype(str)).astype(object)
+
+    # un poco de todo: montos con texto, vacíos o en cero, fechas imposibles y descripciones vacías
+    invalidas = rng.random(filas) < proporcion_invalidas
+    tipo = rng.integers(0, 5, size=filas)
+    montos[invalidas & (tipo == 0)] = '12,50 ARS'
+    montos[invalidas & (tipo == 1)] = ''
+    montos[invalidas & (tipo == 2)] = '0'
+    fechas[invalidas & (tipo == 3)] = '2023-02-30'
+    descripciones[invalidas & (tipo == 4)] = ''
+
+    pd.DataFrame({'fecha': fechas, 'descripcion': descripciones, 'monto': montos, 'categoria': 'Comida'}).to_csv(ruta, index=False)
+    return int(invalidas.sum())
+
+def medir(nombre, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    print(f'{nombre:<48} {duracion:8.2f} s')
+    return resultado, duracion
+
+def camino_anterior(ruta):
+    procesador = ProcesadorDatosGastos()
+    procesador.cargar_datos(ruta)
+    procesador.limpiar_datos()
+    return procesador.df
+
+def camino_validado(ruta, ruta_cuarentena):
+    procesador = ProcesadorDatosGastos()
+    procesador.cargar_datos_validados(ruta, ruta_cuarentena)
+    procesador.limpiar_datos()
+    return procesador.df
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=10_000_000)
+    parser.add_argument('--invalidas', type=float, default=0.001, help='proporción de filas con alguna celda inválida')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'gastos.csv')
+        ruta_cuarentena = os.path.join(directorio, 'cuarentena.csv')
+        print(f'Generando {args.filas:,} transacciones...')
+        cantidad_invalidas = generar_csv(ruta, args.filas, args.invalidas)
+        print(f'{cantidad_invalidas:,} filas con celdas inválidas ({os.path.getsize(ruta) / 1e6:.0f} MB)\n')
+
+        try:
+            montos = pd.read_csv(ruta, usecols=['monto'])['monto']
+            montos.abs()
+            print('orden anterior (.abs() antes de to_numeric): no falló')
+        except TypeError as e:
+            print(f'orden anterior (.abs() antes de to_numeric): falla toda la carga ({type(e).__name__})')
+        del montos
+
+        anterior, t_anterior = medir('read_csv + limpiar_datos', lambda: camino_anterior(ruta))
+        # el camino anterior no descarta las descripciones vacías
+        filas_anterior = int(anterior['descripcion'].notna().sum())
+        del anterior
+        validado, t_validado = medir('ingesta validada (pyarrow) + limpiar_datos', lambda: camino_validado(ruta, ruta_cuarentena))
+
+        assert len(validado) == filas_anterior, 'la cantidad de transacciones válidas no coincide'
+        print(f'\n{filas_anterior:,} transacciones válidas en ambos caminos; '
+              f'{len(pd.read_csv(ruta_cuarentena, usecols=["motivo"])):,} filas en cuarentena')
+        print(f'Aceleración: {t_anterior / t_validado:.1f}x')
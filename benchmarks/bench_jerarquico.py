@@ -0,0 +1,100 @@
+"""
+Benchmark de la predicción jerárquica (total -> categoría -> comercio) con miles de comercios.
+
+Compara:
+  - ajuste: una LinearRegression por serie contra la fórmula cerrada sobre la matriz de series;
+  - reconciliación MinT (W diagonal): la fórmula de libro con matrices densas,
+    (S' W^-1 S)^-1 S' W^-1, contra PredictorJerarquico, que solo resuelve el sistema
+    disperso de los niveles agregados (los dos fijan en cero los comercios negativos y reconcilian de nuevo).
+Verifica que ambos caminos den las mismas predicciones y que un total fijado se respete
+aunque haya predicciones base cortadas en cero.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_jerarquico --comercios 2000 --transacciones 500000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.jerarquico import PredictorJerarquico
+
+def generar_transacciones(comercios, transacciones, categorias=12):
+    rng = np.random.default_rng(42)
+    comercio = rng.integers(0, comercios, size=transacciones)
+    fechas = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 730, size=transacciones), unit='D')
+    montos = rng.uniform(100, 5_000, size=transacciones)
+    # un comercio de cada cinco se deja de usar: su tendencia baja y la predicción base se corta en cero
+    en_baja = comercio % 5 == 0
+    montos[en_baja] *= np.clip(1 - (fechas[en_baja] - fechas.min()).days / 500, 0.01, 1)
+    return pd.DataFrame({
+        'fecha': fechas,
+        'descripcion': np.char.add('COMERCIO ', np.array([f'C{c:05d}' for c in range(comercios)])[comercio]).astype(object),
+        'comercio': np.array([f'COMERCIO C{c:05d}' for c in range(comercios)], dtype=object)[comercio],
+        'monto': montos,
+        'categoria': np.array([f'CATEGORIA {c}' for c in range(categorias)], dtype=object)[comercio % categorias],
+    })
+
+def ajustar_por_serie(historia):
+    from sklearn.linear_model import LinearRegression
+
+    meses = historia.shape[1]
+    x = np.arange(meses).reshape(-1, 1)
+    return np.array([max(LinearRegression().fit(x, serie).predict([[meses]])[0], 0.0) for serie in historia])
+
+def mint_denso(suma, base, varianzas):
+    S = suma.toarray()
+    cantidad_agregadas = S.shape[0] - S.shape[1]
+    hojas = np.zeros(S.shape[1])
+    activas = np.arange(S.shape[1])
+    while len(activas):
+        filas = np.concatenate([np.arange(cantidad_agregadas), cantidad_agregadas + activas])
+        S_activa = S[np.ix_(filas, activas)]
+        W_inv = np.diag(1 / varianzas[filas])
+        G = np.linalg.solve(S_activa.T @ W_inv @ S_activa, S_activa.T @ W_inv)
+        valores = G @ base[filas]
+        if not (valores < 0).any():
+            hojas[activas] = valores
+            break
+        activas = activas[valores >= 0]
+    return S @ hojas
+
+def medir(nombre, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    print(f'{nombre:<52} {duracion:8.3f} s')
+    return resultado, duracion
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--comercios', type=int, default=2_000)
+    parser.add_argument('--transacciones', type=int, default=500_000)
+    args = parser.parse_args()
+
+    df = generar_transacciones(args.comercios, args.transacciones)
+    predictor = PredictorJerarquico(columna_categoria='categoria')
+    _, t_ajuste = medir('ajuste jerárquico completo (armado + fórmula cerrada)', lambda: predictor.ajustar(df))
+
+    base_por_serie, t_por_serie = medir('una LinearRegression por serie', lambda: ajustar_por_serie(predictor.historia))
+    assert np.allclose(base_por_serie, predictor.predicciones['prediccion_base'], rtol=1e-6, atol=1e-6), 'el ajuste no coincide'
+
+    base = predictor.predicciones['prediccion_base'].to_numpy()
+    varianzas = predictor.predicciones['varianza'].to_numpy()
+    denso, t_denso = medir('MinT denso (S\' W^-1 S)^-1 S\' W^-1', lambda: mint_denso(predictor.suma, base, varianzas))
+    disperso, t_disperso = medir('MinT disperso (sistema de los niveles agregados)', lambda: predictor.reconciliar('wls'))
+    assert np.allclose(denso, disperso['prediccion'], rtol=1e-6), 'la reconciliación no coincide'
+
+    assert (disperso['prediccion'] >= 0).all(), 'quedaron predicciones negativas'
+
+    # total fijado (p.ej. el de PredictorGastos) con predicciones base cortadas en cero: se respeta exacto
+    assert (predictor.predicciones['prediccion_base'] == 0).any(), 'ninguna predicción base quedó cortada en cero'
+    fijado = 0.8 * base[0]
+    con_total = predictor.reconciliar(total=fijado)
+    assert np.isclose(con_total.loc[con_total['nivel'] == 'total', 'prediccion'].iloc[0], fijado, rtol=1e-9), 'el total fijado no se respeta'
+    assert (con_total['prediccion'] >= 0).all(), 'quedaron predicciones negativas con el total fijado'
+
+    total = disperso[disperso['nivel'] == 'total']
+    print(f'\n{len(predictor.series):,} series; total base ${total["prediccion_base"].iloc[0]:,.0f} -> reconciliado ${total["prediccion"].iloc[0]:,.0f}')
+    print(f'Aceleración del ajuste: {t_por_serie / t_ajuste:.1f}x; de la reconciliación: {t_denso / t_disperso:.0f}x')
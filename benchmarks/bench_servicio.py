@@ -0,0 +1,95 @@
+"""
+Prueba de carga local del servicio HTTP (src/servicio.py).
+
+Levanta el servicio en un proceso aparte y lanza consultas concurrentes contra cada ruta
+en tres escenarios:
+  - frío: la primera ráfaga, todas las consultas idénticas llegan juntas y se calculan una sola vez;
+  - caché: el resultado ya está serializado para la versión vigente de los datos;
+  - 304: el cliente envía If-None-Match con la ETag y no se transfiere el cuerpo.
+Informa latencia p50/p99 y consultas por segundo.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_servicio --consultas 2000 --concurrencia 50
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+import numpy as np
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+
+RUTAS = ['/resumen/mensual', '/resumen/categoria', '/patrones', '/prediccion']
+
+async def esperar_servicio(url, segundos=120):
+    cliente = AsyncHTTPClient()
+    limite = time.perf_counter() + segundos
+    while time.perf_counter() < limite:
+        try:
+            await cliente.fetch(url + RUTAS[0])
+            return
+        except (ConnectionError, HTTPClientError, OSError):
+            await asyncio.sleep(0.2)
+    raise TimeoutError('el servicio no respondió a tiempo')
+
+async def rafaga(url, cantidad, concurrencia, encabezados=None):
+    """
+    Lanza cantidad consultas con a lo sumo concurrencia simultáneas.
+    Returns:
+        tuple: (latencias en segundos, duración total, códigos de respuesta)
+    """
+    cliente = AsyncHTTPClient(max_clients=concurrencia)
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias, codigos = [], []
+
+    async def consulta():
+        async with semaforo:
+            inicio = time.perf_counter()
+            respuesta = await cliente.fetch(url, headers=encabezados, raise_error=False)
+            latencias.append(time.perf_counter() - inicio)
+            codigos.append(respuesta.code)
+            return respuesta
+
+    inicio = time.perf_counter()
+    respuestas = await asyncio.gather(*[consulta() for _ in range(cantidad)])
+    return np.array(latencias), time.perf_counter() - inicio, codigos, respuestas[0]
+
+def informar(ruta, escenario, latencias, duracion, codigos):
+    p50, p99 = np.percentile(latencias * 1000, [50, 99])
+    print(f'{ruta:<20} {escenario:<7} {p50:9.2f} {p99:9.2f} {len(latencias) / duracion:10.0f}   {sorted(set(codigos))}')
+
+async def principal(args):
+    base = f'http://localhost:{args.puerto}'
+    await esperar_servicio(base)
+    print(f'\n{"ruta":<20} {"caso":<7} {"p50 ms":>9} {"p99 ms":>9} {"cons./s":>10}   códigos')
+    for ruta in RUTAS:
+        url = base + ruta
+        # frío: una ráfaga de consultas idénticas al mismo tiempo (se calcula una vez)
+        latencias, duracion, codigos, respuesta = await rafaga(url + '?frio=1', args.concurrencia, args.concurrencia)
+        informar(ruta, 'frío', latencias, duracion, codigos)
+
+        latencias, duracion, codigos, respuesta = await rafaga(url, args.consultas, args.concurrencia)
+        informar(ruta, 'caché', latencias, duracion, codigos)
+
+        etag = respuesta.headers.get('ETag')
+        latencias, duracion, codigos, _ = await rafaga(url, args.consultas, args.concurrencia, {'If-None-Match': etag})
+        informar(ruta, '304', latencias, duracion, codigos)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datos', default='data/gastos_personales.csv')
+    parser.add_argument('--puerto', type=int, default=8899)
+    parser.add_argument('--consultas', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=50)
+    args = parser.parse_args()
+
+    servicio = subprocess.Popen(
+        [sys.executable, '-m', 'src.servicio', '--datos', args.datos, '--puerto', str(args.puerto)],
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        asyncio.run(principal(args))
+    finally:
+        servicio.terminate()
+        servicio.wait()
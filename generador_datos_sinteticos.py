@@ -92,6 +92,32 @@ def generador_datos_gastos(fecha_inicio='2023-01-01', fecha_fin='2024-12-31', nu
     
     return df
 
+def generador_tasas(fecha_inicio='2023-01-01', fecha_fin='2024-12-31'):
+    """
+    Generamos tipos de cambio diarios (pesos por dólar y por euro) y un IPC mensual sintéticos,
+    con inflación alta y una devaluación fuerte en diciembre de 2023.
+    """
+    fechas = pd.date_range(fecha_inicio, fecha_fin, freq='D')
+    rng = np.random.default_rng(42)
+
+    # el dólar sube de a poco cada día, con ruido, y salta en la devaluación
+    variacion_diaria = np.where(fechas.year == 2023, 0.0019, 0.0008) + rng.normal(0, 0.003, size=len(fechas))
+    variacion_diaria[fechas == pd.Timestamp('2023-12-13')] += 0.79
+    dolar = 180 * np.exp(np.cumsum(variacion_diaria))
+    tipos_de_cambio = pd.concat([
+        pd.DataFrame({'fecha': fechas.strftime('%Y-%m-%d'), 'moneda': 'USD', 'ars_por_unidad': dolar.round(2)}),
+        pd.DataFrame({'fecha': fechas.strftime('%Y-%m-%d'), 'moneda': 'EUR', 'ars_por_unidad': (dolar * 1.08).round(2)}),
+    ], ignore_index=True)
+
+    # inflación mensual: alta en 2023, pico después de la devaluación y baja durante 2024
+    periodos = pd.period_range(fecha_inicio, fecha_fin, freq='M')
+    inflacion = np.where(periodos.year == 2023, 0.07, np.linspace(0.2, 0.03, len(periodos)))
+    inflacion[periodos == pd.Period('2023-12', freq='M')] = 0.25
+    indice = 100 * np.cumprod(np.r_[1.0, 1 + inflacion[1:]])
+    ipc = pd.DataFrame({'periodo': periodos.astype(str), 'indice': indice.round(2)})
+
+    return tipos_de_cambio, ipc
+
 # generamos los datos
 print('Generando datos sintéticos...')
 df_gastos = generador_datos_gastos(num_transacciones=1200)
@@ -118,6 +144,12 @@ print(resumen_categorias)
 df_gastos.to_csv('gastos_personales.csv', index=False)
 print("\nDatos guardados en 'gastos_personales.csv'")
 
+# tipos de cambio e IPC para convertir montos y ajustarlos por inflación
+tipos_de_cambio, ipc = generador_tasas()
+tipos_de_cambio.to_csv('tipos_de_cambio.csv', index=False)
+ipc.to_csv('ipc.csv', index=False)
+print("Tasas guardadas en 'tipos_de_cambio.csv' e 'ipc.csv'")
+
 # Visualización rápida
 plt.figure(figsize=(12, 8))
 
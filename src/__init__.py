@@ -0,0 +1,38 @@
+"""
+Paquete del predictor de gastos.
+Las clases se importan recién cuando se usan (p.ej. `from src import PredictorGastos`),
+así importar el procesador de datos no carga scikit-learn, matplotlib ni pyarrow.
+"""
+import importlib
+
+# clase pública -> módulo donde está definida
+_MODULOS = {
+    'ProcesadorDatosGastos': 'src.procesador_de_datos',
+    'CategorizadorGastos': 'src.categorizador',
+    'CategorizadorML': 'src.categorizador_ml',
+    'PredictorGastos': 'src.predictor',
+    'VisualizadorGastos': 'src.visualizador',
+    'LibroGastos': 'src.libro_gastos',
+    'DeduplicadorGastos': 'src.deduplicador',
+    'DetectorAnomalias': 'src.anomalias',
+    'GestorPresupuestos': 'src.presupuestos',
+    'DetectorRecurrentes': 'src.recurrentes',
+    'BufferColumnar': 'src.buffer_columnar',
+    'TablaTasas': 'src.tasas',
+    'IngestorGastos': 'src.ingesta',
+    'LibroSQL': 'src.consultas',
+    'PredictorJerarquico': 'src.jerarquico',
+}
+
+__all__ = list(_MODULOS)
+
+def __getattr__(nombre):
+    modulo = _MODULOS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module 'src' has no attribute '{nombre}'")
+    valor = getattr(importlib.import_module(modulo), nombre)
+    globals()[nombre] = valor  # las siguientes búsquedas no pasan por __getattr__
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,280 @@
+import pandas as pd
+import numpy as np
+
+from src.fechas import parsear_fechas
+from src.normalizacion import normalizar_comercio, normalizar_comercio_texto
+from src.tasas import descartar_sin_monto
+
+# columna que identifica al dueño de cada transacción cuando se procesan varios usuarios
+COLUMNA_USUARIO = 'usuario_id'
+# con varios usuarios las claves de grupo son '<usuario>|<categoría o comercio>'
+SEPARADOR_USUARIO = '|'
+
+# factor que hace al MAD comparable con el desvío estándar en datos normales
+FACTOR_MAD = 0.6745
+
+class DetectorAnomalias:
+    """
+    Detecta gastos anómalos con estadísticas robustas por categoría y por comercio,
+    en lugar de un único umbral IQR sobre todos los montos.
+    - Transacciones: puntaje z robusto 0.6745 * (monto - mediana) / MAD de su comercio; la categoría
+      solo se usa cuando el comercio tiene pocas transacciones (un alquiler fijo no es anómalo por
+      ser mucho más caro que el resto de los servicios).
+    - Meses: z-score del gasto mensual de cada categoría contra los meses anteriores (ventana móvil),
+      contando desde el primer mes de la categoría.
+    ajustar() calcula todo de forma vectorizada; actualizar() incorpora una transacción nueva en O(1).
+    """
+    def __init__(self, columna_categoria='categoria_auto', umbral_robusto=3.5, umbral_z=2.0,
+                 ventana_meses=6, minimo_observaciones=5, tasa_aprendizaje=0.05, minimo_meses=3, columna_monto='monto'):
+        """
+        Args:
+            columna_categoria (str): columna de categoría ('categoria_auto' o 'categoria').
+            umbral_robusto (float): puntaje robusto a partir del cual una transacción es anómala.
+            umbral_z (float): z-score mensual a partir del cual el gasto de una categoría es anómalo.
+            ventana_meses (int): meses anteriores contra los que se compara cada mes.
+            minimo_observaciones (int): transacciones mínimas de un grupo para evaluar sus anomalías.
+            tasa_aprendizaje (float): paso de la actualización incremental de mediana y MAD.
+            minimo_meses (int): meses anteriores mínimos de una categoría para calcular su z-score mensual.
+            columna_monto (str): 'monto' (nominal), 'monto_ars' o 'monto_real'.
+        """
+        self.columna_categoria = columna_categoria
+        self.umbral_robusto = umbral_robusto
+        self.umbral_z = umbral_z
+        self.ventana_meses = ventana_meses
+        self.minimo_observaciones = minimo_observaciones
+        self.tasa_aprendizaje = tasa_aprendizaje
+        self.minimo_meses = minimo_meses
+        self.columna_monto = columna_monto
+        # (nivel, clave) -> [mediana, mad, cantidad]
+        self.estadisticas = {}
+        # (clave de categoría, ordinal del mes) -> gasto total
+        self.totales_mensuales = {}
+        # clave de categoría -> ordinal de su primer mes con gastos
+        self.primer_mes = {}
+
+    def ajustar(self, df):
+        """
+        Calcula mediana y MAD por categoría y por comercio, y los totales mensuales por categoría
+        """
+        df = descartar_sin_monto(df, self.columna_monto)
+        claves = self._claves(df)
+        montos = df[self.columna_monto].astype(float)
+        self.estadisticas = {}
+        for nivel in ('categoria', 'comercio'):
+            grupos = montos.groupby(claves[nivel])
+            medianas = grupos.median()
+            desvios = (montos - claves[nivel].map(medianas)).abs()
+            tabla = pd.DataFrame({
+                'mediana': medianas,
+                'mad': desvios.groupby(claves[nivel]).median(),
+                'cantidad': grupos.size(),
+            })
+            for clave, fila in zip(tabla.index, tabla.itertuples(index=False)):
+                self.estadisticas[(nivel, clave)] = [fila.mediana, fila.mad, int(fila.cantidad)]
+
+        totales = montos.groupby([claves['categoria'], claves['mes']]).sum()
+        self.totales_mensuales = dict(zip(totales.index, totales.to_numpy()))
+        self.primer_mes = claves['mes'].groupby(claves['categoria']).min().to_dict()
+        print(f'Detector de anomalías ajustado: {len(self.estadisticas)} grupos, {len(self.totales_mensuales)} totales mensuales')
+        return self
+
+    def puntuar(self, df):
+        """
+        Agrega 'puntaje_anomalia' y 'es_anomalia'. Cada transacción se compara con su comercio si este
+        tiene al menos minimo_observaciones transacciones, y si no con su categoría.
+        """
+        claves = self._claves(df)
+        montos = df[self.columna_monto].astype(float).to_numpy()
+        puntajes = np.zeros(len(df))
+        evaluadas = np.zeros(len(df), dtype=bool)
+        # primero el comercio; la categoría solo para las filas cuyo comercio no tiene historia suficiente
+        for nivel in ('comercio', 'categoria'):
+            estadisticas = pd.DataFrame(
+                [(clave, *valores) for (n, clave), valores in self.estadisticas.items() if n == nivel],
+                columns=['clave', 'mediana', 'mad', 'cantidad']
+            ).set_index('clave')
+            fila = estadisticas.reindex(claves[nivel].to_numpy())
+            usar = ~evaluadas & (fila['cantidad'].to_numpy() >= self.minimo_observaciones)
+            puntaje = self._puntaje(montos, fila['mediana'].to_numpy(), fila['mad'].to_numpy())
+            puntajes[usar] = np.nan_to_num(puntaje[usar])
+            evaluadas |= usar
+
+        df['puntaje_anomalia'] = puntajes
+        df['es_anomalia'] = puntajes > self.umbral_robusto
+        return df
+
+    def zscores_mensuales(self):
+        """
+        z-score del gasto mensual de cada categoría contra la media y el desvío de los meses anteriores.
+        Returns:
+            pd.DataFrame: una fila por categoría y mes con total, media_previa, desvio_previo y z.
+        """
+        if not self.totales_mensuales:
+            return pd.DataFrame(columns=['categoria', 'periodo', 'total', 'media_previa', 'desvio_previo', 'z'])
+
+        totales = pd.Series(self.totales_mensuales)
+        totales.index.names = ['categoria', 'mes']
+        tabla = totales.unstack('categoria').sort_index()
+        tabla = tabla.reindex(np.arange(tabla.index.min(), tabla.index.max() + 1))
+        # los meses sin gasto cuentan como 0 para que la ventana sea de meses reales, pero solo desde
+        # el primer mes de cada categoría: antes de existir no tiene historia
+        tabla = tabla.fillna(0).where(tabla.notna().cummax())
+
+        previos = tabla.shift(1).rolling(self.ventana_meses, min_periods=self.minimo_meses)
+        media, desvio = previos.mean(), previos.std()
+        z = (tabla - media) / desvio.where(desvio > 0)
+
+        resultado = pd.DataFrame({
+            'total': tabla.stack(future_stack=True),
+            'media_previa': media.stack(future_stack=True),
+            'desvio_previo': desvio.stack(future_stack=True),
+            'z': z.stack(future_stack=True),
+        }).dropna(subset=['total']).reset_index()  # sin los meses anteriores al primero de cada categoría
+        resultado['periodo'] = pd.PeriodIndex.from_ordinals(resultado['mes'].to_numpy(), freq='M')
+        columnas = ['categoria', 'periodo', 'total', 'media_previa', 'desvio_previo', 'z']
+        if resultado['categoria'].str.contains(SEPARADOR_USUARIO, regex=False).all():
+            resultado[[COLUMNA_USUARIO, 'categoria']] = resultado['categoria'].str.split(SEPARADOR_USUARIO, n=1, expand=True)
+            columnas.insert(0, COLUMNA_USUARIO)
+        return resultado[columnas]
+
+    def generar_alertas(self, df, solo_ultimo_mes=True):
+        """
+        Genera en una pasada vectorizada las alertas de transacciones anómalas
+        y de categorías con gasto mensual fuera de lo normal.
+        Returns:
+            pd.DataFrame: tipo, categoria, periodo, descripcion, monto, puntaje y mensaje.
+        """
+        # vista con las columnas que se usan (sin copiarlas) para no agregarle los puntajes al DataFrame recibido
+        columnas = [c for c in (COLUMNA_USUARIO, self.columna_categoria, 'descripcion', 'fecha', self.columna_monto) if c in df.columns]
+        df = self.puntuar(pd.DataFrame({c: df[c] for c in columnas}, copy=False))
+        periodos = parsear_fechas(df['fecha']).dt.to_period('M')
+        ultimo_periodo = periodos.max()
+
+        seleccion = df['es_anomalia']
+        if solo_ultimo_mes:
+            seleccion = seleccion & (periodos == ultimo_periodo)
+        anomalas = df[seleccion]
+        alertas_transacciones = pd.DataFrame({
+            COLUMNA_USUARIO: anomalas[COLUMNA_USUARIO].astype(str) if COLUMNA_USUARIO in anomalas.columns else None,
+            'tipo': 'transaccion',
+            'categoria': anomalas[self.columna_categoria] if self.columna_categoria in anomalas.columns else None,
+            'periodo': periodos[seleccion],
+            'descripcion': anomalas['descripcion'],
+            'monto': anomalas[self.columna_monto],
+            'puntaje': anomalas['puntaje_anomalia'],
+        })
+        alertas_transacciones['mensaje'] = ('Gasto inusual en ' + alertas_transacciones['descripcion'].astype(str)
+                                            + ': $' + alertas_transacciones['monto'].map('{:,.2f}'.format))
+
+        mensuales = self.zscores_mensuales()
+        if solo_ultimo_mes:
+            mensuales = mensuales[mensuales['periodo'] == ultimo_periodo]
+        mensuales = mensuales[mensuales['z'] > self.umbral_z]
+        alertas_mensuales = pd.DataFrame({
+            COLUMNA_USUARIO: mensuales[COLUMNA_USUARIO] if COLUMNA_USUARIO in mensuales.columns else None,
+            'tipo': 'categoria_mensual',
+            'categoria': mensuales['categoria'],
+            'periodo': mensuales['periodo'],
+            'descripcion': None,
+            'monto': mensuales['total'],
+            'puntaje': mensuales['z'],
+        })
+        alertas_mensuales['mensaje'] = ('Gasto mensual en ' + alertas_mensuales['categoria'].astype(str) + ' de $'
+                                        + alertas_mensuales['monto'].map('{:,.2f}'.format) + ' ('
+                                        + alertas_mensuales['puntaje'].map('{:.1f}'.format) + ' desvíos sobre lo habitual)')
+
+        alertas = pd.concat([alertas_mensuales, alertas_transacciones], ignore_index=True)
+        if COLUMNA_USUARIO not in df.columns:
+            alertas = alertas.drop(columns=[COLUMNA_USUARIO])
+        return alertas.sort_values('puntaje', ascending=False).reset_index(drop=True)
+
+    def actualizar(self, transaccion):
+        """
+        Incorpora una transacción nueva en O(1) y devuelve sus alertas (lista vacía si no hay).
+        La mediana y el MAD se actualizan con una aproximación incremental (un paso hacia el
+        nuevo valor), y el total mensual de su categoría con una suma.
+        Args:
+            transaccion (dict): con 'fecha', 'descripcion', la columna de monto y la de categoría.
+        """
+        monto = float(transaccion[self.columna_monto])
+        if np.isnan(monto):
+            # sin cotización o IPC no hay monto comparable: no se incorpora
+            return []
+        claves = self._claves_transaccion(transaccion)
+        alertas = []
+
+        evaluada = False
+        # igual que puntuar: el comercio si tiene historia suficiente, si no la categoría
+        for nivel in ('comercio', 'categoria'):
+            clave = claves[nivel]
+            estadistica = self.estadisticas.get((nivel, clave))
+            if estadistica is None:
+                self.estadisticas[(nivel, clave)] = [monto, 0.0, 1]
+                continue
+
+            mediana, mad, cantidad = estadistica
+            escala = max(mad, abs(mediana) * 0.01)
+            if not evaluada and cantidad >= self.minimo_observaciones:
+                evaluada = True
+                puntaje = FACTOR_MAD * (monto - mediana) / escala if escala > 0 else 0.0
+                if puntaje > self.umbral_robusto:
+                    alertas.append({'tipo': 'transaccion', 'nivel': nivel, 'clave': clave, 'monto': monto, 'puntaje': puntaje})
+
+            paso = self.tasa_aprendizaje * max(escala, 1e-9)
+            mediana += paso if monto > mediana else -paso if monto < mediana else 0.0
+            desvio = abs(monto - mediana)
+            mad += paso if desvio > mad else -paso if desvio < mad else 0.0
+            self.estadisticas[(nivel, clave)] = [mediana, max(mad, 0.0), cantidad + 1]
+
+        # total mensual de la categoría y su z-score contra la ventana de meses anteriores
+        # (desde el primer mes de la categoría y con minimo_meses de historia, igual que zscores_mensuales)
+        clave_mes = (claves['categoria'], claves['mes'])
+        total = self.totales_mensuales.get(clave_mes, 0.0) + monto
+        self.totales_mensuales[clave_mes] = total
+        primer_mes = min(self.primer_mes.get(clave_mes[0], clave_mes[1]), clave_mes[1])
+        self.primer_mes[clave_mes[0]] = primer_mes
+        previos = [self.totales_mensuales.get((clave_mes[0], clave_mes[1] - i), 0.0)
+                   for i in range(1, self.ventana_meses + 1) if clave_mes[1] - i >= primer_mes]
+        if len(previos) < max(self.minimo_meses, 2):
+            return alertas
+        media = sum(previos) / len(previos)
+        desvio = (sum((x - media) ** 2 for x in previos) / (len(previos) - 1)) ** 0.5
+        if desvio > 0:
+            z = (total - media) / desvio
+            if z > self.umbral_z:
+                alertas.append({'tipo': 'categoria_mensual', 'nivel': 'categoria', 'clave': clave_mes[0], 'monto': total, 'puntaje': z})
+        return alertas
+
+    def _puntaje(self, montos, medianas, mads):
+        # con MAD 0 (montos siempre iguales, p.ej. un alquiler) usamos un piso del 1% de la mediana
+        escala = np.maximum(mads, np.abs(medianas) * 0.01)
+        escala = np.where(escala > 0, escala, np.nan)
+        return FACTOR_MAD * (montos - medianas) / escala
+
+    def _claves(self, df):
+        """
+        Claves de agrupación por fila: categoría, comercio y mes (con el usuario si hay varios)
+        """
+        columna = self.columna_categoria if self.columna_categoria in df.columns else 'categoria'
+        categoria = df[columna].astype(str)
+        comercio = normalizar_comercio(df['descripcion'])
+        if COLUMNA_USUARIO in df.columns:
+            usuario = df[COLUMNA_USUARIO].astype(str)
+            categoria = usuario + SEPARADOR_USUARIO + categoria
+            comercio = usuario + SEPARADOR_USUARIO + comercio
+        mes = pd.Series(parsear_fechas(df['fecha']).to_numpy().astype('datetime64[M]').astype(np.int64), index=df.index)
+        return {'categoria': categoria, 'comercio': comercio, 'mes': mes}
+
+    def _claves_transaccion(self, transaccion):
+        """
+        Las mismas claves que _claves para una sola transacción, sin pasar por pandas
+        """
+        categoria = str(transaccion.get(self.columna_categoria, transaccion.get('categoria')))
+        comercio = normalizar_comercio_texto(transaccion['descripcion'])
+        if COLUMNA_USUARIO in transaccion:
+            usuario = str(transaccion[COLUMNA_USUARIO])
+            categoria = usuario + SEPARADOR_USUARIO + categoria
+            comercio = usuario + SEPARADOR_USUARIO + comercio
+        fecha = pd.Timestamp(transaccion['fecha'])
+        mes = (fecha.year - 1970) * 12 + fecha.month - 1
+        return {'categoria': categoria, 'comercio': comercio, 'mes': mes}
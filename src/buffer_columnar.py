@@ -0,0 +1,99 @@
+import os
+import pandas as pd
+
+# archivo Arrow IPC donde se publican las transacciones procesadas
+RUTA_BUFFER_POR_DEFECTO = 'data/gastos_procesados.arrow'
+
+def _tipo_pandas(tipo):
+    """
+    Los textos quedan como StringDtype respaldado por Arrow (vista sobre el buffer, sin pasar a objetos Python)
+    """
+    import pyarrow as pa
+
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        return pd.StringDtype('pyarrow')
+    return None
+
+class BufferColumnar:
+    """
+    Transacciones procesadas guardadas una sola vez en un archivo Arrow IPC y mapeadas en memoria.
+    Cada etapa del pipeline (categorización, gráficos, predicción, alertas) pide su propio
+    DataFrame con a_dataframe(): las columnas numéricas y de fechas son vistas de solo lectura
+    sobre el archivo mapeado, así que ninguna etapa copia el DataFrame completo.
+    Las columnas que calcula una etapa se agregan como arreglos aparte (agregar_columna)
+    y las ven todas las vistas que se pidan después.
+    """
+    def __init__(self, ruta=RUTA_BUFFER_POR_DEFECTO):
+        """
+        Abre un buffer ya escrito (ver desde_dataframe)
+        """
+        import pyarrow as pa
+
+        self.ruta = ruta
+        self._archivo = pa.memory_map(ruta, 'r')
+        # read_all sobre un archivo mapeado no copia: los arreglos apuntan a las páginas del archivo
+        self.tabla = pa.ipc.open_file(self._archivo).read_all()
+        self.derivadas = {}  # columnas calculadas después de publicar el buffer
+
+    @classmethod
+    def desde_dataframe(cls, df, ruta=RUTA_BUFFER_POR_DEFECTO):
+        """
+        Escribe el DataFrame (sin índice) como Arrow IPC en ruta y lo devuelve ya mapeado
+        """
+        import pyarrow as pa
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        # se escribe a un temporal y se reemplaza, para no pisar un archivo que otra vista tiene mapeado
+        ruta_temporal = f'{ruta}.tmp'
+        with pa.OSFile(ruta_temporal, 'wb') as archivo:
+            with pa.ipc.new_file(archivo, tabla.schema) as escritor:
+                escritor.write_table(tabla)
+        os.replace(ruta_temporal, ruta)
+        print(f'Buffer columnar publicado en "{ruta}": {tabla.num_rows} filas, {tabla.num_columns} columnas')
+        return cls(ruta)
+
+    def __len__(self):
+        return self.tabla.num_rows
+
+    @property
+    def columnas(self):
+        return self.tabla.column_names + [nombre for nombre in self.derivadas if nombre not in self.tabla.column_names]
+
+    def agregar_columna(self, nombre, valores):
+        """
+        Agrega una columna calculada como arreglo Arrow aparte (no reescribe ni copia las columnas del buffer)
+        """
+        import pyarrow as pa
+
+        if len(valores) != len(self):
+            print(f'Error: la columna "{nombre}" tiene {len(valores)} valores y el buffer {len(self)} filas.')
+            return False
+        # de numpy a Arrow los tipos numéricos pasan sin copia; los textos se convierten una sola vez acá
+        self.derivadas[nombre] = pa.array(valores, from_pandas=True)
+        return True
+
+    def a_dataframe(self, columnas=None):
+        """
+        Devuelve un DataFrame nuevo cuyas columnas son vistas del buffer (y de las columnas derivadas).
+        Agregarle o reemplazarle columnas no afecta al buffer ni a otras vistas.
+        Args:
+            columnas (list): columnas a incluir; por defecto todas.
+        """
+        import pyarrow as pa
+
+        columnas = self.columnas if columnas is None else list(columnas)
+        faltantes = [c for c in columnas if c not in self.derivadas and c not in self.tabla.column_names]
+        if faltantes:
+            print(f'Error: el buffer no tiene las columnas {faltantes}.')
+            return None
+
+        tabla = pa.table(
+            [self.derivadas[c] if c in self.derivadas else self.tabla.column(c) for c in columnas],
+            names=columnas
+        )
+        # split_blocks evita consolidar columnas del mismo tipo en un bloque nuevo (eso sería una copia)
+        return tabla.to_pandas(split_blocks=True, types_mapper=_tipo_pandas)
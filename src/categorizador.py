@@ -1,49 +1,38 @@
 import pandas as pd
 import re
 
+from src.reglas import AlmacenReglas, RUTA_REGLAS_POR_DEFECTO
+
 class CategorizadorGastos:
     """
     Clase para categorizar automáticamebte las transacciooes/gastos
     """
-    def __init__(self):
-        self.reglas_categoria = self.reglas_categoria = {
-            'Comida': [
-                r'MERCADO', r'SUPERMERCADO', r'DIETETICA', r'CARNICERIA',r'VERDULERIA',
-                r'RESTAURANT', r'PIZZA', r'HAMBURGUESA', r'DELIVERY', r'CAFE', r'PANADERIA'
-                ],
-            'Transporte': [
-                r'UBER', r'TAXI', r'DIDY', r'CABIFY', r'COMBUSTIBLE', r'ESTACIONAMIENTO',
-                r'SUBE', r'PEAJE', r'NAFTA', r'COLECTIVO'
-                ],
-                'Entretenimiento': [
-                r'CINE', r'NETFLIX', r'SPOTIFY', r'TEATRO', r'BAR', r'CONCIERTO',
-                r'VIDEOJUEGOS', r'JUEGOS', r'STEAM', r'PLAYSTATION'
-                ],
-            'Servicios': [
-                r'EDENOR', r'TELECOM', r'MOVISTAR', r'PERSONAL', r'INTERNET', r'AGUA',
-                r'GAS', r'TELEFONO', r'LUZ', r'EXPENSAS', r'ALQUILER'
-                ],
-            'Salud': [
-                r'FARMACIA', r'MEDICO', r'HOSPITAL', r'DENTISTA', r'LABORATORIO',
-                r'CONSULTA', r'OBRA SOCIAL', r'PREPAGA'
-                ],
-            'Compras': [
-                r'AMAZON', r'MERCADOLIBRE', r'TIENDA', r'ROPA', r'ELECTRONICA',
-                r'ZAPATERIA', r'LIBRERIA', r'DEPORTE'
-                ],
-            'Educacion': [
-                r'CURSO', r'UDEMY', r'PLATZI', r'COLEGIO', r'UNIVERSIDAD', r'LIBROS'
-                ],
-            'Otros': [
-                r'VARIOS', r'DIVERSOS', r'REGALO', r'DONACION'
-                ]
-            }
+    def __init__(self, modelo_ml=None, ruta_reglas=RUTA_REGLAS_POR_DEFECTO):
+        # modelo aprendido (CategorizadorML) para las transacciones que ninguna regla reconoce
+        self.modelo_ml = modelo_ml
+        # las reglas viven en un archivo versionado y se recargan solas cuando cambia
+        self.almacen_reglas = AlmacenReglas(ruta_reglas)
+    
+    @property
+    def reglas_categoria(self):
+        """
+        Reglas vigentes como dict {categoria: [patrones]}
+        """
+        return self.almacen_reglas.obtener().reglas_categoria
+    
+    def perfilar_reglas(self, df):
+        """
+        Informa qué patrones cuestan más tiempo y cuáles nunca coinciden
+        """
+        return self.almacen_reglas.obtener().perfilar(df['descripcion'])
     
-    def categorizar(self, df):
+    def categorizar(self, df, procesos=1):
         """
         categoriza las transacciones de un datafra,e de gasytos.
         Args:
             df (pd.dataframe): dataframe con al menos una columna e descripcón.
+            procesos (int): con más de 1, las reglas se aplican en paralelo por fragmentos
+                (mismo resultado que en serie, conviene para columnas de millones de filas).
             Returns:
                 pd.dataframe: el datafra,e con una nueva columna categoria_auto.
         """
@@ -51,17 +40,26 @@ class CategorizadorGastos:
             print('Error: el DataFrame debe contener la columna "descripcion".')
             return df
         
-        df['categoria_auto'] = 'Desconocido'  # categoría por defecto
+        # cada fila queda con la categoría de mayor prioridad que coincide ('Desconocido' si ninguna)
+        if procesos is not None and procesos > 1:
+            # pyarrow y el pool de procesos solo se cargan si se pide el modo paralelo
+            from src.categorizador_paralelo import categorizar_en_paralelo
+            df['categoria_auto'] = categorizar_en_paralelo(df['descripcion'], self.almacen_reglas.ruta, procesos=procesos)
+        else:
+            df['categoria_auto'] = self.almacen_reglas.obtener().categorizar(df['descripcion'])
         
-        # vamos a iterar sobre cada categoría y sus reglas
-        for categoria, reglas in self.reglas_categoria.items():
-            for regla in reglas:
-                df.loc[df['descripcion'].str.contains(regla, na=False, regex=True, case=False), 'categoria_auto'] = categoria
+        # las reglas van primero; el modelo solo se usa para las filas que quedaron sin categoría
+        if self.modelo_ml is not None and self.modelo_ml.modelo is not None:
+            sin_categoria = (df['categoria_auto'] == 'Desconocido') & df['descripcion'].notna()
+            if sin_categoria.any():
+                df.loc[sin_categoria, 'categoria_auto'] = self.modelo_ml.predecir(df.loc[sin_categoria, 'descripcion'])
+                print(f'{sin_categoria.sum()} transacciones categorizadas por el modelo aprendido.')
         
         if 'gategoria' in df.columns:
             df.local[df['categoria_auto'] == 'Desconocido', 'categoria_auto'] = df['categoria']
             
         print('Transacciones categorizadas automáticamente.')
+        return df
 
 # vamos a categorizar nuestro contenido sintético generado y guatdado en gastos_personales.csv
 if __name__ == '__main__':
@@ -0,0 +1,130 @@
+import pandas as pd
+import numpy as np
+
+from src.normalizacion import normalizar_comercio
+
+def _crear_clasificador():
+    from sklearn.linear_model import SGDClassifier
+    return SGDClassifier(loss='hinge', alpha=1e-5, random_state=42)
+
+class CategorizadorML:
+    """
+    Categorizador aprendido a partir de la columna 'categoria' ya etiquetada.
+    Usa n-gramas de caracteres con hashing (no guarda vocabulario, memoria fija)
+    y un modelo lineal; las predicciones se hacen por lotes sobre matrices dispersas.
+    """
+    def __init__(self, cantidad_features=2**18, ngramas=(2, 4)):
+        """
+        Args:
+            cantidad_features (int): dimensión del espacio de hashing.
+            ngramas (tuple): rango de largos de n-gramas de caracteres.
+        """
+        # scikit-learn se importa recién al crear el categorizador, no al importar el módulo
+        from sklearn.feature_extraction.text import HashingVectorizer
+        
+        self.vectorizador = HashingVectorizer(
+            analyzer='char_wb',
+            ngram_range=ngramas,
+            n_features=cantidad_features,
+            alternate_sign=False,
+            dtype=np.float32
+        )
+        self.modelo = None
+        self.clases = None
+
+    def entrenar(self, df, columna_categoria='categoria'):
+        """
+        Entrena el modelo con todas las filas etiquetadas del DataFrame
+        """
+        etiquetadas = df.dropna(subset=['descripcion', columna_categoria])
+        if etiquetadas.empty:
+            print(f'Error: no hay filas con "descripcion" y "{columna_categoria}" para entrenar.')
+            return False
+
+        X = self._vectorizar(etiquetadas['descripcion'])
+        y = etiquetadas[columna_categoria].to_numpy()
+        self.modelo = _crear_clasificador()
+        self.modelo.fit(X, y)
+        self.clases = self.modelo.classes_
+        print(f'Modelo de categorización entrenado con {len(etiquetadas)} transacciones y {len(self.clases)} categorías')
+        return True
+
+    def entrenar_parcial(self, lotes, columna_categoria='categoria', clases=None, tamano_lote=100_000):
+        """
+        Entrena de a lotes con partial_fit, con memoria acotada al tamaño del lote.
+        Args:
+            lotes: un DataFrame (se recorre de a tamano_lote filas) o un iterable de DataFrames,
+                por ejemplo pd.read_csv(ruta, chunksize=...).
+            clases (list): todas las categorías posibles; obligatorio si lotes es un iterable,
+                porque partial_fit necesita conocerlas desde el primer lote.
+        """
+        if isinstance(lotes, pd.DataFrame):
+            if clases is None:
+                clases = lotes[columna_categoria].dropna().unique()
+            df = lotes
+            lotes = (df.iloc[inicio:inicio + tamano_lote] for inicio in range(0, len(df), tamano_lote))
+        elif clases is None and self.clases is None:
+            print('Error: para entrenar desde un iterable hay que indicar todas las clases.')
+            return False
+
+        if self.modelo is None:
+            self.modelo = _crear_clasificador()
+            self.clases = np.asarray(sorted(clases))
+
+        cantidad = 0
+        for lote in lotes:
+            etiquetadas = lote.dropna(subset=['descripcion', columna_categoria])
+            if etiquetadas.empty:
+                continue
+            X = self._vectorizar(etiquetadas['descripcion'])
+            self.modelo.partial_fit(X, etiquetadas[columna_categoria].to_numpy(), classes=self.clases)
+            cantidad += len(etiquetadas)
+
+        print(f'Modelo de categorización entrenado por lotes con {cantidad} transacciones')
+        return cantidad > 0
+
+    def predecir(self, descripciones, tamano_lote=200_000):
+        """
+        Predice la categoría de cada descripción.
+        Las descripciones repetidas (mismo comercio) se predicen una sola vez.
+        Returns:
+            np.ndarray: categoría predicha por fila (None donde la descripción es nula).
+        """
+        if self.modelo is None:
+            print('Error: el modelo de categorización no fue entrenado.')
+            return None
+
+        codigos, unicas = pd.factorize(normalizar_comercio(descripciones.fillna('')))
+        predicciones_unicas = np.empty(len(unicas), dtype=object)
+        for inicio in range(0, len(unicas), tamano_lote):
+            lote = unicas[inicio:inicio + tamano_lote]
+            predicciones_unicas[inicio:inicio + tamano_lote] = self.modelo.predict(self.vectorizador.transform(lote))
+
+        predicciones = predicciones_unicas[codigos]
+        predicciones[descripciones.isna().to_numpy()] = None
+        return predicciones
+
+    def guardar_modelo(self, ruta='data/categorizador_ml.joblib'):
+        if self.modelo is None:
+            print('No existe un modelo de categorización para guardar.')
+            return False
+        import joblib
+        joblib.dump({'modelo': self.modelo, 'vectorizador': self.vectorizador}, ruta)
+        print(f'Modelo de categorización guardado en "{ruta}"')
+        return True
+
+    def cargar_modelo(self, ruta='data/categorizador_ml.joblib'):
+        import joblib
+        try:
+            guardado = joblib.load(ruta)
+        except FileNotFoundError:
+            print(f'Error: archivo de modelo de categorización no encontrado en "{ruta}"')
+            return False
+        self.modelo = guardado['modelo']
+        self.vectorizador = guardado['vectorizador']
+        self.clases = self.modelo.classes_
+        print(f'Modelo de categorización cargado desde "{ruta}".')
+        return True
+
+    def _vectorizar(self, descripciones):
+        return self.vectorizador.transform(normalizar_comercio(descripciones))
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+
+from src.reglas import CATEGORIA_POR_DEFECTO, cargar_matcher
+
+# matcher de cada proceso trabajador (se carga una vez en el inicializador)
+_matcher_trabajador = None
+
+def _inicializar_trabajador(ruta_reglas):
+    global _matcher_trabajador
+    _matcher_trabajador = cargar_matcher(ruta_reglas)
+
+def _categorizar_fragmento(tarea):
+    """
+    Categoriza las filas [inicio, fin) leyendo las descripciones directamente
+    de los buffers Arrow en memoria compartida y escribe los códigos en el arreglo de salida.
+    """
+    entrada = shared_memory.SharedMemory(name=tarea['memoria_entrada'])
+    salida = shared_memory.SharedMemory(name=tarea['memoria_salida'])
+    try:
+        buffers = [
+            None if largo == 0 else pa.py_buffer(entrada.buf[desde:desde + largo])
+            for desde, largo in tarea['buffers']
+        ]
+        arreglo = pa.Array.from_buffers(pa.large_string(), tarea['filas_totales'], buffers, null_count=tarea['nulos'])
+        descripciones = arreglo.slice(tarea['inicio'], tarea['fin'] - tarea['inicio']).to_pandas()
+
+        categorias = _matcher_trabajador.categorizar(descripciones)
+        codigos = pd.Categorical(categorias, categories=tarea['categorias']).codes
+
+        destino = np.ndarray(tarea['filas_totales'], dtype=np.int16, buffer=salida.buf)
+        destino[tarea['inicio']:tarea['fin']] = codigos
+        del destino, arreglo, buffers, descripciones
+    finally:
+        entrada.close()
+        salida.close()
+    return tarea['fin'] - tarea['inicio']
+
+def categorizar_en_paralelo(descripciones, ruta_reglas, procesos=None, filas_por_fragmento=None):
+    """
+    Categoriza una columna de descripciones repartiéndola en fragmentos entre varios procesos.
+    Las descripciones se copian una sola vez a memoria compartida como buffers Arrow
+    (sin serializar arreglos de objetos con pickle) y cada proceso escribe sus resultados
+    en un arreglo int16 compartido. El resultado es idéntico al de MatcherReglas.categorizar.
+    Args:
+        descripciones (pd.Series): columna de descripciones.
+        ruta_reglas (str): archivo de reglas que carga cada proceso.
+        procesos (int): cantidad de procesos; por defecto, los núcleos disponibles.
+        filas_por_fragmento (int): tamaño de cada fragmento; por defecto se reparte en 4 fragmentos por proceso.
+    Returns:
+        np.ndarray: categoría de cada fila.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    filas = len(descripciones)
+    if filas == 0:
+        return np.array([], dtype=object)
+
+    matcher = cargar_matcher(ruta_reglas)
+    categorias = list(dict.fromkeys([regla['categoria'] for regla in matcher.reglas] + [CATEGORIA_POR_DEFECTO]))
+
+    # mismo tratamiento que el camino serial: los nulos quedan nulos y el resto se lee como texto
+    valores = descripciones.astype(str).where(descripciones.notna(), None)
+    arreglo = pa.array(valores.to_numpy(dtype=object), type=pa.large_string(), from_pandas=True)
+    buffers_origen = arreglo.buffers()
+
+    # un único bloque de memoria compartida con los buffers (validez, offsets, datos) uno detrás de otro
+    ubicaciones = []
+    tamano_total = 0
+    for buffer in buffers_origen:
+        largo = 0 if buffer is None else buffer.size
+        ubicaciones.append((tamano_total, largo))
+        tamano_total += largo
+    entrada = shared_memory.SharedMemory(create=True, size=max(tamano_total, 1))
+    salida = shared_memory.SharedMemory(create=True, size=filas * np.dtype(np.int16).itemsize)
+    try:
+        for buffer, (desde, largo) in zip(buffers_origen, ubicaciones):
+            if largo:
+                entrada.buf[desde:desde + largo] = memoryview(buffer).cast('B')
+
+        filas_por_fragmento = filas_por_fragmento or max(1, -(-filas // (procesos * 4)))
+        tareas = [{
+            'memoria_entrada': entrada.name,
+            'memoria_salida': salida.name,
+            'buffers': ubicaciones,
+            'filas_totales': filas,
+            'nulos': arreglo.null_count,
+            'inicio': inicio,
+            'fin': min(inicio + filas_por_fragmento, filas),
+            'categorias': categorias,
+        } for inicio in range(0, filas, filas_por_fragmento)]
+
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador, initargs=(ruta_reglas,)) as ejecutor:
+            procesadas = sum(ejecutor.map(_categorizar_fragmento, tareas))
+
+        codigos = np.ndarray(filas, dtype=np.int16, buffer=salida.buf).copy()
+    finally:
+        entrada.close()
+        entrada.unlink()
+        salida.close()
+        salida.unlink()
+
+    print(f'{procesadas} transacciones categorizadas en {len(tareas)} fragmentos con {procesos} procesos.')
+    return np.asarray(categorias, dtype=object)[codigos]
@@ -0,0 +1,270 @@
+import argparse
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+COLUMNA_USUARIO = 'usuario_id'
+
+TABLA = 'gastos'
+
+# columnas indexadas si están: los filtros por fecha y los agrupamientos por mes o categoría usan el índice
+COLUMNAS_INDEXADAS = ['fecha', 'periodo', 'categoria', 'categoria_auto', COLUMNA_USUARIO]
+
+# agregados que acepta agrupar(), con los mismos nombres que en pandas
+AGREGADOS_SQL = {'sum': 'SUM', 'mean': 'AVG', 'count': 'COUNT', 'min': 'MIN', 'max': 'MAX'}
+
+NOMBRES_DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+NOMBRES_MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+def _identificador(nombre):
+    return '"' + nombre.replace('"', '""') + '"'
+
+def _tipo_sql(tipo):
+    import pyarrow as pa
+
+    if pa.types.is_integer(tipo) or pa.types.is_boolean(tipo):
+        return 'INTEGER'
+    if pa.types.is_floating(tipo):
+        return 'REAL'
+    return 'TEXT'
+
+def _valores_sql(arreglo):
+    """
+    Valores de una columna Arrow como lista de Python para sqlite3.
+    Las fechas quedan como texto ISO (las funciones date() de SQLite las entienden)
+    y los períodos mensuales como 'AAAA-MM'.
+    """
+    import pyarrow as pa
+
+    tipo = arreglo.type
+    if isinstance(tipo, pa.ExtensionType):
+        if tipo.extension_name == 'pandas.period':
+            # el período se guarda como ordinal mensual (meses desde 1970-01); el mínimo de int64 es NaT
+            ordinales = arreglo.storage.fill_null(np.iinfo(np.int64).min).to_numpy()
+            return _fechas_como_texto(ordinales.view('datetime64[M]'), 'M')
+        arreglo = arreglo.storage
+        tipo = arreglo.type
+    if pa.types.is_timestamp(tipo) or pa.types.is_date(tipo):
+        return _fechas_como_texto(arreglo.to_numpy(zero_copy_only=False).astype('datetime64[s]'))
+    if pa.types.is_dictionary(tipo):
+        arreglo = arreglo.cast(tipo.value_type)
+    # NaN se guarda como NULL, así los agregados lo ignoran igual que pandas
+    return arreglo.to_numpy(zero_copy_only=False).tolist()
+
+def _fechas_como_texto(valores, unidad=None):
+    # las fechas se repiten mucho: se formatea cada fecha distinta una sola vez
+    unicas, posiciones = np.unique(valores, return_inverse=True)
+    if unidad is None:
+        unidad = 'D' if (unicas[~np.isnat(unicas)].astype(np.int64) % 86400 == 0).all() else 's'
+    textos = np.where(np.isnat(unicas), None, np.datetime_as_string(unicas, unit=unidad))
+    return textos[posiciones].tolist()
+
+class LibroSQL:
+    """
+    Transacciones procesadas en una tabla SQLite (en memoria o en archivo) con índices por
+    fecha, período y categoría. Los resúmenes del procesador se resuelven como consultas
+    agrupadas sobre los índices, y se pueden hacer agrupamientos o consultas SQL a medida
+    sin pasar todo el DataFrame a pandas: solo vuelve el resultado.
+    """
+    def __init__(self, ruta=':memory:'):
+        """
+        Args:
+            ruta (str): archivo de la base SQLite, o ':memory:' para tenerla solo en memoria.
+        """
+        self.ruta = ruta
+        # check_same_thread=False: el servicio consulta desde su hilo de cálculo
+        self.conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self.columnas = self._columnas_tabla()
+
+    @classmethod
+    def desde_dataframe(cls, df, ruta=':memory:'):
+        libro = cls(ruta)
+        libro.cargar(df)
+        return libro
+
+    @classmethod
+    def desde_buffer(cls, buffer, ruta=':memory:'):
+        """
+        Carga un BufferColumnar lote por lote (sin armar el DataFrame completo)
+        """
+        import pyarrow as pa
+
+        tabla = buffer.tabla
+        for nombre, valores in buffer.derivadas.items():
+            if nombre not in tabla.column_names:
+                tabla = tabla.append_column(nombre, pa.chunked_array([valores]))
+        libro = cls(ruta)
+        libro.cargar(tabla)
+        return libro
+
+    def __len__(self):
+        if not self.columnas:
+            return 0
+        return self.conexion.execute(f'SELECT COUNT(*) FROM {TABLA}').fetchone()[0]
+
+    def cargar(self, datos, tamano_lote=100_000):
+        """
+        Reemplaza la tabla con las transacciones de datos y crea los índices.
+        Args:
+            datos (pd.DataFrame o pyarrow.Table): transacciones procesadas.
+            tamano_lote (int): filas que se insertan por vez.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        tabla = datos if isinstance(datos, pa.Table) else pa.Table.from_pandas(datos, preserve_index=False)
+        if 'fecha' in tabla.column_names:
+            # ordenada por fecha: los rangos de fechas y los meses quedan en páginas contiguas
+            tabla = tabla.take(pc.sort_indices(tabla['fecha']))
+        columnas = tabla.column_names
+        definicion = ', '.join(f'{_identificador(c)} {_tipo_sql(tabla.schema.field(c).type)}' for c in columnas)
+        insertar = f'INSERT INTO {TABLA} VALUES ({", ".join("?" * len(columnas))})'
+
+        with self.conexion:
+            self.conexion.execute(f'DROP TABLE IF EXISTS {TABLA}')
+            self.conexion.execute(f'CREATE TABLE {TABLA} ({definicion})')
+            for lote in tabla.to_batches(max_chunksize=tamano_lote):
+                self.conexion.executemany(insertar, zip(*[_valores_sql(lote.column(c)) for c in columnas]))
+            # los índices se crean al final: es más rápido que mantenerlos durante la carga
+            for columna in COLUMNAS_INDEXADAS:
+                if columna in columnas:
+                    self.conexion.execute(f'CREATE INDEX {_identificador("idx_" + columna)} ON {TABLA} ({_identificador(columna)})')
+            self.conexion.execute('ANALYZE')
+        self.columnas = columnas
+        print(f'Libro SQL: {tabla.num_rows} transacciones en "{self.ruta}"')
+
+    def consultar(self, sql, parametros=()):
+        """
+        Ejecuta una consulta SQL sobre la tabla 'gastos' y devuelve el resultado como DataFrame
+        """
+        try:
+            return pd.read_sql_query(sql, self.conexion, params=parametros)
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
+            print(f'Error en la consulta: {e}')
+            return None
+
+    def agrupar(self, por, columna_monto='monto', agregados=('sum', 'mean', 'count'), desde=None, hasta=None, filtros=None):
+        """
+        Agrupamiento a medida, resuelto en SQLite.
+        Args:
+            por (str o list): columnas por las que agrupar (p.ej. ['periodo', 'categoria_auto']).
+            columna_monto (str): columna a agregar.
+            agregados (tuple): cualquiera de 'sum', 'mean', 'count', 'min', 'max'.
+            desde, hasta (str): rango de fechas inclusivo ('AAAA-MM-DD'); usa el índice por fecha.
+            filtros (dict): columna -> valor que deben cumplir las transacciones.
+        Returns:
+            pd.DataFrame: una fila por grupo, indexado por las columnas de por.
+        """
+        por = [por] if isinstance(por, str) else list(por)
+        filtros = filtros or {}
+        desconocidas = [c for c in por + [columna_monto] + list(filtros) if c not in self.columnas]
+        if desconocidas:
+            print(f'Error: el libro no tiene las columnas {desconocidas}.')
+            return None
+        if any(agregado not in AGREGADOS_SQL for agregado in agregados):
+            print(f'Error: agregados válidos: {list(AGREGADOS_SQL)}.')
+            return None
+
+        condiciones, parametros = [], []
+        if desde is not None:
+            condiciones.append('fecha >= ?')
+            parametros.append(str(pd.Timestamp(desde).date()))
+        if hasta is not None:
+            # hasta es inclusivo: todo lo anterior al día siguiente (las fechas pueden tener hora)
+            condiciones.append('fecha < ?')
+            parametros.append(str((pd.Timestamp(hasta) + pd.Timedelta(days=1)).date()))
+        for columna, valor in filtros.items():
+            condiciones.append(f'{_identificador(columna)} = ?')
+            parametros.append(valor)
+
+        claves = ', '.join(_identificador(c) for c in por)
+        seleccion = ', '.join(f'{AGREGADOS_SQL[a]}({_identificador(columna_monto)}) AS {a}' for a in agregados)
+        donde = f'WHERE {" AND ".join(condiciones)}' if condiciones else ''
+        resultado = self.consultar(
+            f'SELECT {claves}, {seleccion} FROM {TABLA} {donde} GROUP BY {claves} ORDER BY {claves}',
+            parametros
+        )
+        return None if resultado is None else resultado.set_index(por)
+
+    def resumen_mensual(self, columna_monto='monto'):
+        """
+        Mismo resultado que ProcesadorDatosGastos.obtener_resumen_mensual
+        """
+        monto = _identificador(columna_monto)
+        resumen = self.consultar(
+            f'SELECT periodo, TOTAL({monto}) AS Total, AVG({monto}) AS Promedio, COUNT({monto}) AS Transacciones, '
+            f'COUNT(DISTINCT categoria) AS "Categorías" FROM {TABLA} GROUP BY periodo ORDER BY periodo'
+        )
+        if resumen is None:
+            return None
+        resumen.index = pd.PeriodIndex(resumen.pop('periodo'), freq='M', name='periodo')
+        return resumen.round(2)
+
+    def resumen_categoria(self, columna_monto='monto'):
+        """
+        Mismo resultado que ProcesadorDatosGastos.obtener_resumen_categoria
+        """
+        if 'categoria' not in self.columnas:
+            return None
+        monto = _identificador(columna_monto)
+        resumen = self.consultar(
+            f'SELECT categoria, TOTAL({monto}) AS Total, AVG({monto}) AS Promedio, COUNT({monto}) AS Transacciones, '
+            f'MIN(fecha) AS Primera, MAX(fecha) AS "Última" FROM {TABLA} GROUP BY categoria'
+        )
+        if resumen is None:
+            return None
+        resumen = resumen.set_index('categoria')
+        resumen['Primera'] = pd.to_datetime(resumen['Primera'])
+        resumen['Última'] = pd.to_datetime(resumen['Última'])
+        resumen = resumen.round(2)
+        total_gastos = self.conexion.execute(f'SELECT TOTAL({monto}) FROM {TABLA}').fetchone()[0]
+        resumen['Porcentaje'] = (resumen['Total'] / total_gastos * 100).round(1)
+        return resumen.sort_values('Total', ascending=False)
+
+    def detectar_patrones(self, columna_monto='monto'):
+        """
+        Mismo resultado que ProcesadorDatosGastos.detectar_patrones
+        """
+        patrones = {}
+        for clave, columna, nombres in (
+            ('por_dia', 'dia_semana', NOMBRES_DIAS),
+            ('por_mes', 'mes', NOMBRES_MESES),
+            ('fin_semana', 'es_fin_semana', ['Días laborables', 'Fin de semana']),
+        ):
+            grupo = self.agrupar(columna, columna_monto=columna_monto)
+            if grupo is None:
+                return None
+            # es_fin_semana se guarda como 0/1 y mes empieza en 1
+            desplazamiento = 1 if columna == 'mes' else 0
+            grupo.index = [nombres[int(valor) - desplazamiento] for valor in grupo.index]
+            grupo['sum'] = grupo['sum'].fillna(0.0)
+            patrones[clave] = grupo
+        return patrones
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def _columnas_tabla(self):
+        # si la base ya existe en el archivo, se puede consultar sin volver a cargarla
+        return [fila[1] for fila in self.conexion.execute(f'PRAGMA table_info({TABLA})')]
+
+if __name__ == '__main__':
+    from src.buffer_columnar import BufferColumnar, RUTA_BUFFER_POR_DEFECTO
+
+    parser = argparse.ArgumentParser(description='Agrupamientos y consultas SQL sobre las transacciones procesadas')
+    parser.add_argument('--buffer', default=RUTA_BUFFER_POR_DEFECTO, help='buffer Arrow publicado por la app')
+    parser.add_argument('--por', nargs='+', default=['periodo'], help='columnas por las que agrupar')
+    parser.add_argument('--monto', default='monto')
+    parser.add_argument('--desde')
+    parser.add_argument('--hasta')
+    parser.add_argument('--sql', help="consulta SQL sobre la tabla gastos (reemplaza --por)")
+    args = parser.parse_args()
+
+    libro = LibroSQL.desde_buffer(BufferColumnar(args.buffer))
+    if args.sql:
+        resultado = libro.consultar(args.sql)
+    else:
+        resultado = libro.agrupar(args.por, columna_monto=args.monto, desde=args.desde, hasta=args.hasta)
+    if resultado is not None:
+        print(resultado.to_string())
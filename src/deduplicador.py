@@ -0,0 +1,146 @@
+import os
+import pandas as pd
+import numpy as np
+
+from src.fechas import parsear_fechas
+from src.normalizacion import normalizar_comercio, normalizar_descripcion
+
+# columnas opcionales que, si existen, forman parte de la identidad de una transacción
+COLUMNA_USUARIO = 'usuario_id'
+COLUMNA_CUENTA = 'cuenta'
+
+class DeduplicadorGastos:
+    """
+    Detecta transacciones repetidas al importar extractos que se superponen.
+    - Duplicados exactos: hash de (fecha, descripción normalizada, monto, cuenta) buscado
+      en un índice hash persistente (un set), O(1) por fila. Dentro del mismo archivo solo se
+      descartan las copias de un bloque de filas (un mes importado dos veces: filas_bloque o más
+      filas seguidas que repiten, en orden, filas seguidas anteriores). Un cargo igual suelto
+      (dos boletos el mismo día) puede ser real: se conserva y se marca como posible duplicado.
+    - Posibles duplicados: mismo comercio y monto dentro de N días, buscados ordenando
+      las filas y comparando cada una con la anterior (ventana deslizante, sin comparar todos contra todos).
+    """
+    def __init__(self, ruta_indice=None, dias_tolerancia=3, filas_bloque=3):
+        """
+        Args:
+            ruta_indice (str): archivo .npy donde se guarda el índice de hashes; None para usar solo memoria.
+            dias_tolerancia (int): días máximos entre dos cargos iguales para marcarlos como posible duplicado.
+            filas_bloque (int): filas seguidas repetidas a partir de las cuales se toman como un bloque reimportado.
+        """
+        self.ruta_indice = ruta_indice
+        self.dias_tolerancia = dias_tolerancia
+        self.filas_bloque = filas_bloque
+        self.indice = set()  # hashes de las transacciones ya importadas
+
+        if ruta_indice is not None and os.path.exists(ruta_indice):
+            self.indice = set(np.load(ruta_indice).tolist())
+            print(f'Índice de duplicados cargado: {len(self.indice)} transacciones conocidas')
+
+    def calcular_hashes(self, df):
+        """
+        Calcula un hash uint64 por fila a partir de fecha, descripción normalizada, monto y cuenta
+        """
+        claves = pd.DataFrame({
+            'fecha': parsear_fechas(df['fecha']).dt.normalize(),
+            'descripcion': normalizar_descripcion(df['descripcion']),
+            'monto_centavos': (pd.to_numeric(df['monto'], errors='coerce').abs() * 100).round().astype('Int64'),
+        })
+        for columna in (COLUMNA_CUENTA, COLUMNA_USUARIO):
+            if columna in df.columns:
+                claves[columna] = df[columna].astype(str)
+        return pd.util.hash_pandas_object(claves, index=False).to_numpy()
+
+    def marcar_duplicados(self, df):
+        """
+        Agrega las columnas 'es_duplicado' (exacto, ya visto en el índice de importaciones anteriores o
+        copia de un bloque anterior del mismo lote) y 'es_posible_duplicado' (repetido suelto en el mismo lote,
+        o mismo comercio y monto dentro de la tolerancia de días).
+        Returns:
+            tuple: (df marcado, hashes de cada fila)
+        """
+        hashes = self.calcular_hashes(df)
+        # una búsqueda en el set por fila: no depende del tamaño del índice
+        ya_vistos = np.fromiter((h in self.indice for h in hashes.tolist()), dtype=bool, count=len(hashes))
+        repetidos_en_lote, copias_de_bloque = self._repetidos_en_lote(hashes)
+        es_duplicado = ya_vistos | copias_de_bloque
+        df['es_duplicado'] = es_duplicado
+        df['es_posible_duplicado'] = (self._marcar_posibles_duplicados(df) | repetidos_en_lote) & ~es_duplicado
+        return df, hashes
+
+    def registrar(self, hashes):
+        """
+        Agrega hashes al índice y lo guarda si es persistente
+        """
+        cantidad_antes = len(self.indice)
+        self.indice.update(hashes.tolist())
+        if self.ruta_indice is not None and len(self.indice) > cantidad_antes:
+            np.save(self.ruta_indice, np.fromiter(self.indice, dtype=np.uint64, count=len(self.indice)))
+
+    def filtrar(self, df):
+        """
+        Elimina los duplicados exactos, marca los posibles duplicados y registra las filas aceptadas
+        """
+        df, hashes = self.marcar_duplicados(df)
+        aceptadas = ~df['es_duplicado'].to_numpy()
+        cantidad_duplicados = int((~aceptadas).sum())
+
+        self.registrar(hashes[aceptadas])
+        df = df[aceptadas].drop(columns=['es_duplicado'])
+
+        if cantidad_duplicados > 0:
+            print(f'Eliminadas {cantidad_duplicados} transacciones duplicadas')
+        cantidad_posibles = int(df['es_posible_duplicado'].sum())
+        if cantidad_posibles > 0:
+            print(f'Marcadas {cantidad_posibles} transacciones como posibles duplicados '
+                  f'(mismo comercio y monto con {self.dias_tolerancia} días o menos de diferencia)')
+        return df
+
+    def _repetidos_en_lote(self, hashes):
+        """
+        Returns:
+            tuple: (filas que repiten una anterior del lote, las que además son parte de una copia de bloque)
+        """
+        codigos, _ = pd.factorize(hashes)
+        _, primeras = np.unique(codigos, return_index=True)
+        original = primeras[codigos]  # posición de la primera aparición de cada fila
+        repetida = original != np.arange(len(hashes))
+
+        # cada tramo de filas repetidas seguidas se compara con las filas a la misma distancia que su
+        # primera fila y su original; la copia de un bloque coincide fila a fila (aunque el bloque tenga
+        # filas iguales entre sí), un cargo suelto repetido no
+        copia = np.zeros(len(hashes), dtype=bool)
+        cambios = np.flatnonzero(np.diff(np.concatenate([[False], repetida, [False]]).astype(np.int8)))
+        for inicio, fin in zip(cambios[::2], cambios[1::2]):
+            posicion = inicio
+            while posicion < fin:
+                distancia = posicion - original[posicion]
+                iguales = hashes[posicion:fin] == hashes[posicion - distancia:fin - distancia]
+                largo = int(np.argmin(iguales)) if not iguales.all() else len(iguales)
+                if largo >= self.filas_bloque:
+                    copia[posicion:posicion + largo] = True
+                posicion += max(largo, 1)
+        return repetida, copia
+
+    def _marcar_posibles_duplicados(self, df):
+        claves = pd.DataFrame({
+            'comercio': normalizar_comercio(df['descripcion']),
+            'monto_centavos': (pd.to_numeric(df['monto'], errors='coerce').abs() * 100).round(),
+            'fecha': parsear_fechas(df['fecha']).dt.normalize(),
+        })
+        grupo = ['comercio', 'monto_centavos']
+        for columna in (COLUMNA_CUENTA, COLUMNA_USUARIO):
+            if columna in df.columns:
+                claves[columna] = df[columna].to_numpy()
+                grupo.insert(0, columna)
+
+        # al ordenar por (grupo, fecha) cada fila solo necesita compararse con la anterior:
+        # si algún cargo igual cayó dentro de la ventana, el inmediato anterior también
+        claves['posicion'] = np.arange(len(claves))
+        claves = claves.sort_values(grupo + ['fecha'], kind='stable')
+        mismo_grupo = (claves[grupo] == claves[grupo].shift()).all(axis=1)
+        dias = (claves['fecha'] - claves['fecha'].shift()).dt.days
+        posible = (mismo_grupo & (dias <= self.dias_tolerancia)).to_numpy()
+
+        resultado = np.zeros(len(claves), dtype=bool)
+        resultado[claves['posicion'].to_numpy()] = posible
+        return resultado
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# formatos que aparecen en los extractos bancarios, en orden de preferencia.
+# Si toda la muestra sirve con mes/día y con día/mes (p.ej. '01/02/2024') gana mes/día,
+# que es lo que infería pd.to_datetime sin formato
+FORMATOS_CONOCIDOS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%Y/%m/%d',
+]
+
+def detectar_formato(serie, tamano_muestra=1000):
+    """
+    Detecta el formato de una columna de fechas probando los formatos conocidos sobre una muestra.
+    Args:
+        serie (pd.Series): columna de fechas como texto.
+        tamano_muestra (int): cantidad de valores iniciales a revisar.
+    Returns:
+        str: el primer formato que interpreta todos los valores de la muestra que interpreta algún
+            formato conocido, o None si ninguno los cubre (forzar un formato parcial dejaría fechas
+            válidas como NaT). Los valores que ningún formato interpreta (fechas mal escritas) no
+            cuentan: igual quedan como NaT, y uno solo no debe mandar toda la columna a la inferencia lenta.
+    """
+    # tomamos la muestra antes de descartar nulos para no recorrer toda la columna
+    muestra = serie.iloc[:tamano_muestra].dropna().astype(str)
+    if muestra.empty:
+        return None
+
+    interpretadas = {formato: pd.to_datetime(muestra, format=formato, errors='coerce').notna().to_numpy()
+                     for formato in FORMATOS_CONOCIDOS}
+    alguna = np.logical_or.reduce(list(interpretadas.values()))
+    if not alguna.any():
+        return None
+    for formato, validas in interpretadas.items():
+        if validas[alguna].all():
+            return formato
+    return None
+
+def parsear_fechas(serie, formato=None):
+    """
+    Convierte una columna a datetime detectando el formato una sola vez.
+    Si la columna ya es datetime se devuelve tal cual: guardar el resultado en el
+    DataFrame funciona como caché y los pasos siguientes no vuelven a parsear.
+    Las fechas inválidas quedan como NaT, igual que con errors='coerce'.
+    Args:
+        serie (pd.Series): columna de fechas.
+        formato (str): formato explícito; si es None se detecta con detectar_formato.
+    Returns:
+        pd.Series: la columna como datetime64.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+
+    if formato is None:
+        formato = detectar_formato(serie)
+    if formato is None:
+        # ningún formato conocido sirve para toda la muestra: se infiere como antes
+        return pd.to_datetime(serie, errors='coerce')
+
+    # igual que antes, lo que no respeta el formato queda como NaT y se descarta después
+    return pd.to_datetime(serie, format=formato, errors='coerce')
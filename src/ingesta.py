@@ -0,0 +1,262 @@
+import csv
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.fechas import detectar_formato
+
+# columnas sin las cuales no se puede cargar el archivo
+COLUMNAS_OBLIGATORIAS = ['fecha', 'descripcion', 'monto']
+
+# monto válido: lo que acepta pd.to_numeric salvo inf/nan: signo opcional, decimales con punto
+# (también ".5" o "5.") y exponente opcional (p.ej. "-1234.5", "1.5e3"); los que se
+# desbordan al convertir (p.ej. "1e400" -> inf) se rechazan aparte como monto_fuera_de_rango
+PATRON_MONTO = r'^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$'
+
+RUTA_CUARENTENA_POR_DEFECTO = 'data/cuarentena.csv'
+
+class IngestorGastos:
+    """
+    Carga un CSV de transacciones validándolo en una sola pasada por bloques (lector CSV de pyarrow).
+    Todas las columnas se leen como texto y se convierten con tipos explícitos; las filas con
+    fecha, monto o descripción inválidos, o mal formadas (cantidad de columnas distinta), no
+    frenan la carga: se apartan a un archivo de cuarentena con el motivo y se cuentan por tipo de error.
+    """
+    def __init__(self, ruta_cuarentena=RUTA_CUARENTENA_POR_DEFECTO, formato_fecha=None, tamano_bloque=1 << 24):
+        """
+        Args:
+            ruta_cuarentena (str): CSV donde se escriben las filas rechazadas (None para no escribirlas).
+            formato_fecha (str): formato de las fechas; si es None se detecta con el primer bloque
+                (y si ningún formato conocido sirve, se infiere como pd.to_datetime sin formato).
+            tamano_bloque (int): bytes del archivo que se leen y validan por vez.
+        """
+        self.ruta_cuarentena = ruta_cuarentena
+        self.formato_fecha = formato_fecha
+        self.tamano_bloque = tamano_bloque
+        self.errores = Counter()  # motivo -> cantidad de filas
+        self.filas_leidas = 0  # filas con la cantidad de columnas correcta
+        self.filas_validas = 0
+
+    def cargar(self, ruta_archivo):
+        """
+        Returns:
+            pd.DataFrame: las filas válidas (fecha datetime64, monto float positivo, el resto texto),
+                o None si el archivo no se puede leer o le faltan columnas obligatorias.
+        """
+        import pyarrow as pa
+        import pyarrow.csv as pv
+
+        try:
+            with open(ruta_archivo, newline='', encoding='utf-8') as archivo:
+                columnas = next(csv.reader(archivo), [])
+        except (OSError, UnicodeDecodeError) as e:
+            print(f'Error al abrir "{ruta_archivo}": {e}')
+            return None
+
+        faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in columnas]
+        if faltantes:
+            print(f'Error: al archivo "{ruta_archivo}" le faltan las columnas {faltantes}.')
+            return None
+
+        self.errores = Counter()
+        self.filas_leidas = 0
+        self.filas_validas = 0
+        self._columnas = columnas
+        self._mal_formadas = []  # (línea, texto) de las filas con otra cantidad de columnas, aún sin escribir
+        self._lineas_mal_formadas = []  # líneas de las ya escritas
+        self._escritor = None
+        self._formato_revisado = False
+        # la cuarentena es de esta carga: si no se rechaza nada no debe quedar la de una carga anterior
+        if self.ruta_cuarentena is not None and os.path.exists(self.ruta_cuarentena):
+            os.remove(self.ruta_cuarentena)
+
+        def fila_mal_formada(fila):
+            self._mal_formadas.append((fila.number, fila.text))
+            return 'skip'
+
+        lector = pv.open_csv(
+            ruta_archivo,
+            read_options=pv.ReadOptions(block_size=self.tamano_bloque, use_threads=False),
+            parse_options=pv.ParseOptions(invalid_row_handler=fila_mal_formada),
+            # todo como texto: la conversión y validación de tipos la hacemos nosotros
+            convert_options=pv.ConvertOptions(
+                column_types={columna: pa.string() for columna in columnas},
+                strings_can_be_null=True, null_values=[''],
+            ),
+        )
+
+        validas = []
+        try:
+            for lote in lector:
+                validas.append(self._validar_lote(pa.Table.from_batches([lote])))
+                self._apartar_mal_formadas()
+        finally:
+            if self._escritor is not None:
+                self._escritor.close()
+
+        tabla = self._inferir_tipos(pa.concat_tables(validas)) if validas else None
+        df = tabla.to_pandas() if tabla is not None else pd.DataFrame(columns=columnas)
+        self._informar(ruta_archivo)
+        return df
+
+    def resumen_errores(self):
+        """
+        Cantidad de filas rechazadas por tipo de error
+        """
+        return pd.Series(dict(self.errores), name='filas', dtype='int64').sort_values(ascending=False)
+
+    def _validar_lote(self, lote):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        filas = lote.num_rows
+        lineas = self._lineas_del_archivo(filas)
+        self.filas_leidas += filas
+
+        fecha_texto = pc.utf8_trim_whitespace(lote['fecha'])
+        if self.formato_fecha is None and not self._formato_revisado:
+            self.formato_fecha = detectar_formato(pd.Series(fecha_texto.to_pandas()))
+            self._formato_revisado = True
+        fechas = self._parsear_fechas(fecha_texto)
+
+        monto_texto = lote['monto']
+        monto_valido = pc.fill_null(pc.match_substring_regex(monto_texto, PATRON_MONTO), False)
+        # todos los gastos son positivos: el signo se descarta después de convertir a número
+        montos = pc.abs(pc.cast(pc.utf8_trim_whitespace(pc.if_else(monto_valido, monto_texto, '0')), pa.float64()))
+
+        descripcion = pc.utf8_trim_whitespace(lote['descripcion'])
+
+        # cada fila se rechaza por el primer problema que tenga, en este orden
+        condiciones = {
+            'fecha_vacia': pc.is_null(fecha_texto),
+            'fecha_invalida': pc.is_null(fechas),
+            'monto_vacio': pc.is_null(monto_texto),
+            'monto_no_numerico': pc.invert(monto_valido),
+            'monto_fuera_de_rango': pc.invert(pc.is_finite(montos)),
+            'monto_cero': pc.equal(montos, 0.0),
+            'descripcion_vacia': pc.or_(pc.is_null(descripcion), pc.equal(descripcion, '')),
+        }
+        mascaras = [pc.fill_null(condicion, True).to_numpy(zero_copy_only=False) for condicion in condiciones.values()]
+        motivos = np.select(mascaras, list(condiciones), default='')
+        rechazadas = motivos != ''
+
+        if rechazadas.any():
+            nombres, cantidades = np.unique(motivos[rechazadas], return_counts=True)
+            self.errores.update(dict(zip(nombres, cantidades.tolist())))
+            self._escribir_cuarentena(
+                lote.filter(pa.array(rechazadas)),
+                lineas[rechazadas],
+                motivos[rechazadas],
+                textos=None
+            )
+
+        aceptadas = pa.array(~rechazadas)
+        valido = lote.filter(aceptadas)
+        valido = valido.set_column(valido.column_names.index('fecha'), 'fecha', fechas.filter(aceptadas))
+        valido = valido.set_column(valido.column_names.index('monto'), 'monto', montos.filter(aceptadas))
+        valido = valido.set_column(valido.column_names.index('descripcion'), 'descripcion', descripcion.filter(aceptadas))
+        self.filas_validas += valido.num_rows
+        return valido
+
+    def _parsear_fechas(self, fecha_texto):
+        """
+        Fechas con el formato detectado; las inválidas quedan nulas.
+        Se parsea cada fecha distinta una vez (en un extracto se repiten mucho) y se reparte a sus filas.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        unicas = pc.unique(fecha_texto)
+        if self.formato_fecha is None:
+            inferidas = pd.to_datetime(pd.Series(unicas.to_pandas()), errors='coerce')
+            fechas = pa.array(inferidas.to_numpy(dtype='datetime64[ns]'), type=pa.timestamp('ns'), from_pandas=True)
+            return fechas.take(pc.index_in(fecha_texto, value_set=unicas))
+        fechas = pc.strptime(unicas, format=self.formato_fecha, unit='ns', error_is_null=True)
+        # strptime de arrow corre los días que no existen (2023-02-30 -> 2023-03-02): las fechas que no
+        # vuelven al mismo texto (esas, o las escritas sin ceros como 2023-1-5) se revisan con pandas
+        texto_normalizado = pc.strftime(pc.cast(fechas, pa.timestamp('s')), format=self.formato_fecha)
+        revisar = pc.fill_null(pc.not_equal(texto_normalizado, unicas), False).to_numpy(zero_copy_only=False)
+        if revisar.any():
+            posiciones = np.flatnonzero(revisar)
+            revisadas = pd.to_datetime(pd.Series(unicas.take(pa.array(posiciones)).to_pandas()), format=self.formato_fecha, errors='coerce')
+            valores = fechas.to_numpy(zero_copy_only=False).astype('datetime64[ns]')
+            valores[posiciones] = revisadas.to_numpy(dtype='datetime64[ns]')
+            fechas = pa.array(valores, type=pa.timestamp('ns'), from_pandas=True)
+        return fechas.take(pc.index_in(fecha_texto, value_set=unicas))
+
+    def _inferir_tipos(self, tabla):
+        """
+        Las columnas no obligatorias (usuario_id, cuenta, ...) pasan a número si todos sus valores lo son;
+        si no, quedan como texto en lugar de frenar la carga.
+        """
+        import pyarrow as pa
+
+        for posicion, columna in enumerate(tabla.column_names):
+            if columna in COLUMNAS_OBLIGATORIAS:
+                continue
+            for tipo in (pa.int64(), pa.float64()):
+                try:
+                    tabla = tabla.set_column(posicion, columna, tabla[columna].cast(tipo))
+                    break
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    continue
+        return tabla
+
+    def _lineas_del_archivo(self, filas):
+        """
+        Línea del archivo de cada fila del lote (la 1 es el encabezado), salteando las filas mal formadas
+        """
+        indices = np.arange(self.filas_leidas, self.filas_leidas + filas) + 2
+        mal_formadas = np.sort(np.array(
+            self._lineas_mal_formadas + [n for n, _ in self._mal_formadas if n is not None], dtype=np.int64
+        ))
+        lineas = indices
+        # la línea real es el índice más las filas mal formadas anteriores a ella
+        while True:
+            nuevas = indices + np.searchsorted(mal_formadas, lineas, side='right')
+            if (nuevas == lineas).all():
+                return lineas
+            lineas = nuevas
+
+    def _apartar_mal_formadas(self):
+        import pyarrow as pa
+
+        if not self._mal_formadas:
+            return
+        lineas = np.array([n if n is not None else -1 for n, _ in self._mal_formadas], dtype=np.int64)
+        textos = [texto for _, texto in self._mal_formadas]
+        self.errores['fila_mal_formada'] += len(textos)
+        vacias = pa.table({columna: pa.nulls(len(textos), pa.string()) for columna in self._columnas})
+        self._escribir_cuarentena(vacias, lineas, np.full(len(textos), 'fila_mal_formada'), textos)
+        self._lineas_mal_formadas.extend(int(n) for n in lineas if n >= 0)
+        self._mal_formadas = []
+
+    def _escribir_cuarentena(self, filas, lineas, motivos, textos):
+        import pyarrow as pa
+        import pyarrow.csv as pv
+
+        if self.ruta_cuarentena is None:
+            return
+        tabla = pa.table({
+            'linea': pa.array(lineas, pa.int64()),
+            'motivo': pa.array(motivos, pa.string()),
+            'texto_original': pa.array(textos, pa.string()) if textos is not None else pa.nulls(len(lineas), pa.string()),
+            **{columna: filas[columna].cast(pa.string()) for columna in self._columnas},
+        })
+        if self._escritor is None:
+            directorio = os.path.dirname(self.ruta_cuarentena)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            self._escritor = pv.CSVWriter(self.ruta_cuarentena, tabla.schema)
+        self._escritor.write_table(tabla)
+
+    def _informar(self, ruta_archivo):
+        rechazadas = sum(self.errores.values())
+        leidas = self.filas_leidas + self.errores['fila_mal_formada']
+        print(f'Ingesta de "{ruta_archivo}": {leidas} filas leídas, {self.filas_validas} válidas, {rechazadas} en cuarentena')
+        for motivo, cantidad in self.errores.most_common():
+            print(f'  {motivo}: {cantidad}')
+        if rechazadas and self.ruta_cuarentena:
+            print(f'Filas rechazadas guardadas en "{self.ruta_cuarentena}"')
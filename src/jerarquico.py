@@ -0,0 +1,254 @@
+import pandas as pd
+import numpy as np
+# scipy se importa dentro de los métodos que arman las matrices de agregación
+
+from src.libro_gastos import LibroGastos
+from src.normalizacion import normalizar_comercio
+from src.tasas import descartar_sin_monto
+
+# columna que identifica al dueño de cada transacción cuando se procesan varios usuarios
+COLUMNA_USUARIO = 'usuario_id'
+
+METODOS_RECONCILIACION = ('bottom_up', 'ols', 'wls')
+
+class PredictorJerarquico:
+    """
+    Predice el gasto del mes siguiente en todos los niveles de una jerarquía
+    (total -> categoría -> comercio, y por usuario si hay varios) de forma coherente:
+    la suma de los comercios da su categoría y la de las categorías da el total.
+
+    1. Se arma la matriz de sumas S (dispersa): cada fila es una serie de la jerarquía y
+       cada columna un comercio (serie del nivel más bajo).
+    2. Todas las series mensuales se ajustan de una vez con la fórmula cerrada de mínimos
+       cuadrados sobre la matriz de series (una recta por serie, sin un modelo por serie),
+       con la predicción cortada en cero.
+    3. Las predicciones base, que por separado no suman, se reconcilian:
+       - 'bottom_up': se suman las predicciones de los comercios.
+       - 'ols' / 'wls': MinT con W = I o W = varianza de los residuos de cada serie.
+         Solo se resuelve un sistema del tamaño de los niveles agregados (C W C'),
+         así que escala a miles de comercios. Los comercios que quedan negativos se fijan en
+         cero y se vuelve a reconciliar con el resto, así los agregados no cambian por el corte.
+    4. Como en PredictorGastos, si se pasa un DetectorRecurrentes las series son el gasto discrecional
+       y los cargos recurrentes proyectados se suman a sus comercios después de reconciliar.
+    """
+    def __init__(self, columna_categoria='categoria_auto', columna_monto='monto', metodo='wls'):
+        """
+        Args:
+            columna_categoria (str): categoría de cada transacción ('categoria' si no está).
+            columna_monto (str): 'monto' (nominal), 'monto_ars' o 'monto_real'.
+            metodo (str): 'bottom_up', 'ols' o 'wls'.
+        """
+        self.columna_categoria = columna_categoria
+        self.columna_monto = columna_monto
+        self.metodo = metodo
+        self.niveles = None  # columnas de la jerarquía, de la más agregada a la más desagregada
+        self.series = None  # una fila por serie: nivel y claves
+        self.suma = None  # matriz de sumas S (series x comercios)
+        self.historia = None  # gasto mensual de cada serie (series x meses)
+        self.periodo_siguiente = None
+        self.predicciones = None
+        self.recurrente_hojas = None  # cargos recurrentes proyectados de cada comercio para el mes siguiente
+
+    def ajustar(self, df, recurrentes=None):
+        """
+        Arma la jerarquía con las transacciones de df y ajusta todas las series.
+        Args:
+            recurrentes (DetectorRecurrentes): si se pasa (y df tiene 'es_recurrente'), las series se
+                ajustan sin los cargos recurrentes, que se proyectan aparte.
+        Returns:
+            bool: True si se pudo ajustar.
+        """
+        if df is None or df.empty:
+            print('Error: DataFrame vacío o nulo para la predicción jerárquica.')
+            return False
+        columna_categoria = self.columna_categoria if self.columna_categoria in df.columns else 'categoria'
+        faltantes = [c for c in ('fecha', 'descripcion', self.columna_monto, columna_categoria) if c not in df.columns]
+        if faltantes:
+            print(f'Error: faltan las columnas {faltantes} para la predicción jerárquica.')
+            return False
+
+        df = descartar_sin_monto(df, self.columna_monto)
+        if df.empty:
+            print(f'Error: ninguna transacción tiene valor en "{self.columna_monto}".')
+            return False
+
+        libro = LibroGastos(df)
+        comercio = libro.df['comercio'] if 'comercio' in libro.df.columns else normalizar_comercio(libro.df['descripcion'])
+        claves = {COLUMNA_USUARIO: libro.df[COLUMNA_USUARIO]} if COLUMNA_USUARIO in libro.df.columns else {}
+        claves['categoria'] = libro.df[columna_categoria]
+        claves['comercio'] = comercio
+        self.niveles = list(claves)
+
+        # cada comercio (dentro de su categoría y usuario) es una serie del nivel más bajo
+        hojas = pd.DataFrame({nivel: np.asarray(valores) for nivel, valores in claves.items()})
+        codigos, hojas_unicas = pd.MultiIndex.from_frame(hojas).factorize()
+        hojas_unicas = hojas_unicas.to_frame(index=False, name=self.niveles)
+
+        # gasto de cada comercio por mes (también los meses sin gasto, que cuentan como cero)
+        montos = libro.df[self.columna_monto].to_numpy(dtype=float)
+        separar_recurrentes = recurrentes is not None and 'es_recurrente' in libro.df.columns
+        if separar_recurrentes:
+            montos = np.where(libro.df['es_recurrente'].to_numpy(dtype=bool), 0.0, montos)
+        meses = libro.cantidad_meses
+        historia_hojas = np.bincount(
+            codigos * meses + libro.mes_offset, weights=montos, minlength=len(hojas_unicas) * meses
+        ).reshape(len(hojas_unicas), meses)
+
+        self.series, self.suma = self._matriz_de_sumas(hojas_unicas)
+        self.historia = self.suma @ historia_hojas
+        self.periodo_siguiente = libro.periodo(meses)
+        self.recurrente_hojas = (self._recurrentes_por_hoja(recurrentes, hojas_unicas) if separar_recurrentes
+                                 else np.zeros(len(hojas_unicas)))
+
+        self.predicciones = self._ajustar_series()
+        print(f'Predicción jerárquica: {len(self.series)} series ({len(hojas_unicas)} comercios) ajustadas en {meses} meses.')
+        return True
+
+    def reconciliar(self, metodo=None, total=None):
+        """
+        Reconcilia las predicciones base para que cada nivel sume el de arriba.
+        Args:
+            total (float): predicción del total (con los recurrentes) que se debe respetar, p.ej. la de
+                PredictorGastos. Con 'ols' / 'wls' el total entra con varianza cero y el resto se ajusta a él.
+        Returns:
+            pd.DataFrame: nivel, claves, prediccion_base, recurrente y prediccion (reconciliada) de cada serie.
+        """
+        metodo = metodo or self.metodo
+        if self.predicciones is None:
+            print('Error: la jerarquía no fue ajustada (ver ajustar).')
+            return None
+        if metodo not in METODOS_RECONCILIACION:
+            print(f'Error: método de reconciliación desconocido "{metodo}" (válidos: {METODOS_RECONCILIACION}).')
+            return None
+        if total is not None and metodo == 'bottom_up':
+            print('Error: con "bottom_up" el total es la suma de los comercios y no se puede fijar.')
+            return None
+
+        base = self.predicciones['prediccion_base'].to_numpy().copy()
+        cantidad_hojas = self.suma.shape[1]
+        agregadas = self.suma[:-cantidad_hojas]  # A: filas de los niveles agregados
+        if metodo == 'bottom_up':
+            hojas = base[-cantidad_hojas:]
+        else:
+            varianzas = np.ones(len(base)) if metodo == 'ols' else self.predicciones['varianza'].to_numpy().copy()
+            if total is not None:
+                # la primera serie es el total; su parte discrecional queda fija
+                base[0] = total - self.recurrente_hojas.sum()
+                varianzas[0] = 0.0
+            hojas = self._mint_no_negativo(agregadas, base, varianzas)
+
+        resultado = self.predicciones.copy()
+        recurrente = self.suma @ self.recurrente_hojas
+        resultado['prediccion_base'] = self.predicciones['prediccion_base'].to_numpy() + recurrente
+        resultado['recurrente'] = recurrente
+        # las hojas reconciliadas se vuelven a sumar con S: el resultado es coherente por construcción
+        resultado['prediccion'] = self.suma @ (hojas + self.recurrente_hojas)
+        resultado['periodo'] = self.periodo_siguiente
+        return resultado
+
+    def desglose(self, nivel='categoria', metodo=None, total=None):
+        """
+        Predicción reconciliada del mes siguiente de un nivel ('total', 'categoria', 'comercio' o 'usuario_id'),
+        ordenada de mayor a menor.
+        """
+        reconciliadas = self.reconciliar(metodo, total)
+        if reconciliadas is None:
+            return None
+        columnas = self.niveles[:self.niveles.index(nivel) + 1] if nivel in self.niveles else []
+        filas = reconciliadas[reconciliadas['nivel'] == nivel]
+        return (filas[columnas + ['prediccion_base', 'recurrente', 'prediccion']]
+                .sort_values('prediccion', ascending=False).reset_index(drop=True))
+
+    def _recurrentes_por_hoja(self, recurrentes, hojas_unicas):
+        """
+        Suma de los cargos recurrentes proyectados para el mes siguiente en cada comercio (hoja)
+        """
+        proyectados = recurrentes.proyectar_mes(self.periodo_siguiente)
+        claves = [c for c in (COLUMNA_USUARIO, 'comercio') if c in self.niveles]
+        # un comercio que aparece en varias categorías recibe sus cargos en la primera
+        hojas = hojas_unicas[claves].assign(hoja=np.arange(len(hojas_unicas))).drop_duplicates(subset=claves)
+        cargos = proyectados.merge(hojas, on=claves, how='inner')
+        return np.bincount(cargos['hoja'].to_numpy(dtype=np.int64), weights=cargos['monto'].to_numpy(dtype=float),
+                           minlength=len(hojas_unicas))
+
+    def _matriz_de_sumas(self, hojas_unicas):
+        """
+        S dispersa: una fila para el total, una por cada grupo de cada nivel agregado
+        (p.ej. cada categoría) y la identidad para los comercios.
+        """
+        import scipy.sparse as sp
+
+        cantidad_hojas = len(hojas_unicas)
+        bloques = [sp.csr_matrix(np.ones((1, cantidad_hojas)))]
+        series = [pd.DataFrame({'nivel': ['total']})]
+        for profundidad, nivel in enumerate(self.niveles[:-1], start=1):
+            grupo, grupos_unicos = pd.MultiIndex.from_frame(hojas_unicas[self.niveles[:profundidad]]).factorize()
+            bloques.append(sp.csr_matrix(
+                (np.ones(cantidad_hojas), (grupo, np.arange(cantidad_hojas))), shape=(len(grupos_unicos), cantidad_hojas)
+            ))
+            series.append(grupos_unicos.to_frame(index=False, name=self.niveles[:profundidad]).assign(nivel=nivel))
+        bloques.append(sp.identity(cantidad_hojas, format='csr'))
+        series.append(hojas_unicas.assign(nivel=self.niveles[-1]))
+
+        series = pd.concat(series, ignore_index=True)
+        return series[['nivel'] + self.niveles], sp.vstack(bloques, format='csr')
+
+    def _ajustar_series(self):
+        """
+        Recta de mínimos cuadrados para todas las series a la vez (fórmula cerrada sobre la matriz de series)
+        """
+        meses = self.historia.shape[1]
+        x = np.arange(meses, dtype=float)
+        x_centrado = x - x.mean()
+        denominador = (x_centrado ** 2).sum()
+        # con un solo mes de datos no hay pendiente: se predice el promedio
+        pendiente = self.historia @ x_centrado / denominador if denominador > 0 else np.zeros(len(self.historia))
+        ordenada = self.historia.mean(axis=1) - pendiente * x.mean()
+
+        residuos = self.historia - (ordenada[:, None] + pendiente[:, None] * x)
+        # varianza mínima positiva: una serie constante no debe quedar con peso infinito en la reconciliación
+        varianza = np.maximum((residuos ** 2).mean(axis=1), 1e-6)
+
+        predicciones = self.series.copy()
+        # un gasto no puede ser negativo: las series en baja (comercios que se dejan de usar) se cortan en cero.
+        # Por ese corte (y porque cada nivel tiene su propio ruido) las predicciones base de los niveles no suman
+        predicciones['prediccion_base'] = np.maximum(ordenada + pendiente * meses, 0.0)
+        predicciones['varianza'] = varianza
+        return predicciones
+
+    def _mint_no_negativo(self, agregadas, base, varianzas):
+        """
+        MinT con los comercios no negativos: los que salen negativos quedan en cero y se reconcilia
+        de nuevo sin ellos, hasta que ninguno sea negativo. Cortarlos en cero sin reconciliar de nuevo
+        subiría los agregados (y un total fijado dejaría de cumplirse).
+        """
+        cantidad_agregadas = agregadas.shape[0]
+        hojas = np.zeros(agregadas.shape[1])
+        activas = np.arange(agregadas.shape[1])
+        # cada vuelta saca al menos un comercio: termina
+        while len(activas):
+            filas = np.concatenate([np.arange(cantidad_agregadas), cantidad_agregadas + activas])
+            valores = self._mint(agregadas[:, activas], base[filas], varianzas[filas])
+            negativas = valores < 0
+            if not negativas.any():
+                hojas[activas] = valores
+                break
+            activas = activas[~negativas]
+        return hojas
+
+    def _mint(self, agregadas, base, varianzas):
+        """
+        MinT con W diagonal: con C = [I  -A], las hojas reconciliadas son
+        b + W_b A' (C W C')^-1 (a - A b), donde C W C' = W_a + A W_b A' es del tamaño de los niveles agregados.
+        """
+        import scipy.sparse as sp
+        from scipy.sparse.linalg import spsolve
+
+        cantidad_agregadas = agregadas.shape[0]
+        base_agregadas, base_hojas = base[:cantidad_agregadas], base[cantidad_agregadas:]
+        varianzas_agregadas, varianzas_hojas = varianzas[:cantidad_agregadas], varianzas[cantidad_agregadas:]
+
+        incoherencia = base_agregadas - agregadas @ base_hojas
+        sistema = sp.diags(varianzas_agregadas) + agregadas @ sp.diags(varianzas_hojas) @ agregadas.T
+        multiplicadores = np.atleast_1d(spsolve(sistema.tocsc(), incoherencia))
+        return base_hojas + varianzas_hojas * (agregadas.T @ multiplicadores)
@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+
+from src.fechas import parsear_fechas
+
+class LibroGastos:
+    """
+    Libro de transacciones ordenado por fecha con un índice mensual precalculado.
+    Los recortes por mes, por últimos N días o entre fechas se resuelven con
+    búsquedas binarias (searchsorted) en lugar de recorrer toda la columna.
+    """
+    def __init__(self, df, columna_fecha='fecha'):
+        """
+        Args:
+            df (pd.DataFrame): transacciones con una columna de fechas.
+            columna_fecha (str): nombre de la columna de fechas.
+        """
+        self.columna_fecha = columna_fecha
+
+        fechas = parsear_fechas(df[columna_fecha])
+        validas = fechas.notna().to_numpy()
+        if not validas.all():
+            df = df.loc[validas]
+            fechas = fechas[validas]
+
+        # ordenamos solo si hace falta (los extractos suelen venir ordenados)
+        valores = fechas.to_numpy(dtype='datetime64[ns]')
+        if len(valores) > 1 and not (valores[1:] >= valores[:-1]).all():
+            orden = np.argsort(valores, kind='stable')
+            df = df.iloc[orden]
+            valores = valores[orden]
+
+        self.df = df
+        self.fechas = valores
+
+        # ordinal mensual de cada fila (meses desde 1970-01, el mismo ordinal que usa pd.Period)
+        ordinales = valores.astype('datetime64[M]').astype(np.int64)
+        self.mes_base = int(ordinales[0]) if len(ordinales) else 0
+        self.mes_offset = (ordinales - self.mes_base).astype(np.int32)
+
+        # limites_mes[i] es la primera fila del mes i; limites_mes[i + 1] la primera del siguiente
+        cantidad_meses = int(self.mes_offset[-1]) + 1 if len(self.mes_offset) else 0
+        self.limites_mes = np.searchsorted(self.mes_offset, np.arange(cantidad_meses + 1), side='left')
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def cantidad_meses(self):
+        return len(self.limites_mes) - 1
+
+    def periodo(self, offset):
+        """
+        Convierte un offset mensual del libro en un pd.Period
+        """
+        return pd.Period(ordinal=self.mes_base + int(offset), freq='M')
+
+    def periodos(self):
+        """
+        Devuelve el período mensual de cada fila sin recalcular to_period
+        """
+        return pd.PeriodIndex.from_ordinals(self.mes_offset.astype(np.int64) + self.mes_base, freq='M')
+
+    def mes(self, periodo):
+        """
+        Devuelve las transacciones de un mes (pd.Period o texto 'AAAA-MM')
+        """
+        offset = pd.Period(periodo, freq='M').ordinal - self.mes_base
+        if offset < 0 or offset >= self.cantidad_meses:
+            return self.df.iloc[0:0]
+        return self.df.iloc[self.limites_mes[offset]:self.limites_mes[offset + 1]]
+
+    def ultimo_mes(self):
+        """
+        Devuelve las transacciones del último mes con datos
+        """
+        if self.cantidad_meses == 0:
+            return self.df.iloc[0:0]
+        return self.df.iloc[self.limites_mes[-2]:]
+
+    def ultimos_dias(self, dias, referencia=None):
+        """
+        Devuelve las transacciones de los últimos N días (incluye la fecha de referencia).
+        Por defecto la referencia es la fecha más reciente del libro.
+        """
+        if len(self.fechas) == 0:
+            return self.df.iloc[0:0]
+        fin = self.fechas[-1] if referencia is None else np.datetime64(pd.Timestamp(referencia), 'ns')
+        inicio = (fin.astype('datetime64[D]') - np.timedelta64(dias - 1, 'D')).astype('datetime64[ns]')
+        return self._recortar(inicio, fin)
+
+    def entre_fechas(self, inicio, fin):
+        """
+        Devuelve las transacciones entre dos fechas, ambas incluidas
+        """
+        return self._recortar(np.datetime64(pd.Timestamp(inicio), 'ns'), np.datetime64(pd.Timestamp(fin), 'ns'))
+
+    def totales_mensuales(self, columna='monto', valores=None):
+        """
+        Suma una columna por mes usando el índice mensual (solo meses con transacciones).
+        Con 'valores' se suma ese arreglo (alineado con las filas del libro) en lugar de la columna.
+        Los valores faltantes (p.ej. monto_ars sin cotización) no se suman, como en los resúmenes de pandas y SQL.
+        """
+        if valores is None:
+            valores = self.df[columna].to_numpy(dtype=float)
+        sin_valor = np.isnan(valores)
+        if sin_valor.any():
+            print(f'Aviso: {int(sin_valor.sum())} transacciones sin valor en "{columna}" no se suman a los totales mensuales.')
+            valores = np.where(sin_valor, 0.0, valores)
+        totales = np.bincount(self.mes_offset, weights=valores, minlength=self.cantidad_meses)
+        con_datos = np.diff(self.limites_mes) > 0
+        indice = pd.PeriodIndex.from_ordinals(np.flatnonzero(con_datos) + self.mes_base, freq='M')
+        return pd.Series(totales[con_datos], index=indice, name=columna)
+
+    def _recortar(self, inicio, fin):
+        # incluimos todo el día de 'fin' aunque las fechas tengan hora
+        fin_exclusivo = fin.astype('datetime64[D]') + np.timedelta64(1, 'D')
+        desde = np.searchsorted(self.fechas, inicio, side='left')
+        hasta = np.searchsorted(self.fechas, fin_exclusivo, side='left')
+        return self.df.iloc[desde:hasta]
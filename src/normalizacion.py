@@ -0,0 +1,29 @@
+import re
+
+# todo lo que no es letra (números de ticket/referencia, signos) se descarta del nombre del comercio
+PATRON_NO_LETRAS = r'[^A-ZÁÉÍÓÚÑÜ ]+'
+PATRON_ESPACIOS = r'\s+'
+
+_expresion_no_letras = re.compile(PATRON_NO_LETRAS)
+_expresion_espacios = re.compile(PATRON_ESPACIOS)
+
+def normalizar_descripcion(serie):
+    """
+    Normaliza descripciones: mayúsculas, sin espacios al principio/final y espacios internos simples
+    """
+    return serie.astype(str).str.strip().str.upper().str.replace(PATRON_ESPACIOS, ' ', regex=True)
+
+def normalizar_comercio(serie):
+    """
+    Obtiene el comercio de una descripción quitando números de ticket/referencia y signos.
+    Ej: 'NETFLIX 1234' y 'netflix  #5678' quedan como 'NETFLIX'
+    """
+    comercio = normalizar_descripcion(serie).str.replace(PATRON_NO_LETRAS, ' ', regex=True)
+    return comercio.str.replace(PATRON_ESPACIOS, ' ', regex=True).str.strip()
+
+def normalizar_comercio_texto(texto):
+    """
+    Igual que normalizar_comercio pero para una sola descripción (sin armar una Serie)
+    """
+    texto = _expresion_espacios.sub(' ', str(texto).strip().upper())
+    return _expresion_espacios.sub(' ', _expresion_no_letras.sub(' ', texto)).strip()
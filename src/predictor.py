@@ -1,40 +1,79 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-import joblib
+# scikit-learn y joblib se importan dentro de los métodos que los usan:
+# preparar datos o proyectar el cierre de mes no necesita cargarlos
+
+from src.libro_gastos import LibroGastos
+from src.tasas import descartar_sin_monto
+
+# columna que identifica al dueño de cada transacción cuando se procesan varios usuarios
+COLUMNA_USUARIO = 'usuario_id'
+
 class PredictorGastos:
     def __init__(self):
         # pass
-        def __init__(self):
-            self.modelo = None # aquí se almacenará el modelo entrenado
-            self.df_preparado = None # DataFrame con datos preparados para el modelo
+        self.modelo = None # aquí se almacenará el modelo entrenado
+        self.df_preparado = None # DataFrame con datos preparados para el modelo
+        self.recurrentes = None # DetectorRecurrentes: sus cargos se proyectan aparte, sin regresión
+        self.columna_objetivo = 'gasto_total_mensual' # lo que modela la regresión
+        self.columna_objetivo_modelo = None # con qué columna se entrenó el modelo actual
+        self.columna_monto = 'monto' # monto que se agrega por mes: nominal, 'monto_ars' o 'monto_real'
+        self.columna_monto_modelo = None # con qué monto se entrenó el modelo actual
 
-    def preparar_datos(self, df):
+    def preparar_datos(self, df, recurrentes=None, columna_monto='monto'):
         # pass
+        """
+        Agrega los gastos por mes. Si se pasa un DetectorRecurrentes (y df tiene 'es_recurrente')
+        la regresión se entrena solo con el gasto discrecional y los cargos recurrentes se
+        proyectan de forma determinística al predecir.
+        Con columna_monto='monto_real' se modela el gasto ajustado por inflación, así la suba
+        de precios no aparece como una tendencia de gasto.
+        """
         if df is None or df.empty:
             print('Error: DataFrame vacío o nulo para preparar los datos.')
             return None
-        if 'fecha' not in df.columns or 'monto' not in df.columns:
-            print('Error: el DataFra,e debe contener las columnas "fecha" y "monto"')
+        if 'fecha' not in df.columns or columna_monto not in df.columns:
+            print(f'Error: el DataFra,e debe contener las columnas "fecha" y "{columna_monto}"')
             return None
         
-        # 2fecha2 debe ser del tipo datetimw y se agrega un 'período' mensual
-        df['fecha'] = pd.to_datetime(df['fecha'], errors='coerce')
-        df = df.dropna(subset=['fecha'])
-        df['periodo'] = df['fecha'].dt.to_period('M')
+        df = descartar_sin_monto(df, columna_monto)
+        if df.empty:
+            print(f'Error: ninguna transacción tiene valor en "{columna_monto}".')
+            return None
+
+        # el libro ordena por fecha (descartando fechas inválidas) y ya trae el período de cada fila
+        libro = LibroGastos(df)
         
-        # agregamos gastos por mes
-        gastos_mensuales = df.groupby('peridodo')['monto'].sum().reset_index()
-        gastos_mensuales.columns = ['periodo', 'gasto_total_mensual']
+        # agregamos gastos por mes (y por usuario si hay varios)
+        separar_recurrentes = recurrentes is not None and 'es_recurrente' in df.columns
+        montos = libro.df[columna_monto].to_numpy(dtype=float)
+        columnas = {'gasto_total_mensual': montos}
+        if separar_recurrentes:
+            columnas['gasto_recurrente'] = np.where(libro.df['es_recurrente'].to_numpy(dtype=bool), montos, 0.0)
+            columnas['gasto_discrecional'] = montos - columnas['gasto_recurrente']
+        
+        if COLUMNA_USUARIO in df.columns:
+            claves = [COLUMNA_USUARIO, 'periodo']
+            gastos_mensuales = pd.DataFrame(columnas).groupby([libro.df[COLUMNA_USUARIO].to_numpy(), libro.periodos()]).sum().reset_index()
+        else:
+            claves = ['periodo']
+            gastos_mensuales = pd.concat(
+                [libro.totales_mensuales(valores=valores).rename(nombre) for nombre, valores in columnas.items()], axis=1
+            ).reset_index()
+        gastos_mensuales.columns = claves + list(columnas)
+        
+        self.recurrentes = recurrentes if separar_recurrentes else None
+        self.columna_monto = columna_monto
+        self.columna_objetivo = 'gasto_discrecional' if separar_recurrentes else 'gasto_total_mensual'
         
         # conertimos el período a una representación numérica
         # lo que es útil y neecsario para la regresión lineal temporal
-        gastos_mensuales['mes_numerico'] = (gastos_mensuales['periodo'] - gastos_mensuales['periodo'].min()).apply(lambda x: x.n)
+        ordinales = pd.PeriodIndex(gastos_mensuales['periodo']).asi8
+        gastos_mensuales['mes_numerico'] = ordinales - ordinales.min()
         
         self.df_preparado = gastos_mensuales
-        print(f'Datos preparados para la predicción. Hay {len(self.df_preparado)} meses de datos.')
+        print(f'Datos preparados para la predicción. Hay {gastos_mensuales["periodo"].nunique()} meses de datos.')
+        return self.df_preparado
 
     def entrenar_modelo(self, df_preparado=None):
         # pass
@@ -45,13 +84,23 @@ class PredictorGastos:
             print('Error: no hay datos preparados para entrenarel modelo.')
             return False
         
+        # con varios usuarios hay una fila por usuario y mes: el modelo total se ajusta sobre la suma
+        # de todos los usuarios de cada mes (los modelos por usuario están en predecir_siguiente_mes_por_usuario)
+        if COLUMNA_USUARIO in df_preparado.columns:
+            df_preparado = df_preparado.groupby('mes_numerico', as_index=False)[self.columna_objetivo].sum()
+        
         # características variables independientes (X) y la variable objetivo o variable predicha (y)
         X = df_preparado[['mes_numerico']]
-        y = df_preparado['gasto_total_mensual']
+        y = df_preparado[self.columna_objetivo]
+        
+        from sklearn.linear_model import LinearRegression
+        from sklearn.metrics import mean_absolute_error, mean_squared_error
         
         # entrenamos el modelo con los datos disponibles
         self.modelo = LinearRegression()
         self.modelo.fit(X, y)
+        self.columna_objetivo_modelo = self.columna_objetivo
+        self.columna_monto_modelo = self.columna_monto
         
         print('Modelo de regresión lineal entrenado con exito')
         
@@ -83,22 +132,86 @@ class PredictorGastos:
         periodo_base = self.df_preparado['periodo'].min()
         siguiente_periodo = periodo_base + siguiente_mes_numerico
         
+        # si el modelo solo estima lo discrecional, sumamos los cargos recurrentes esperados
+        if self.columna_objetivo_modelo == 'gasto_discrecional' and self.recurrentes is not None:
+            gasto_recurrente = self.recurrentes.proyectar_mes(siguiente_periodo)['monto'].sum()
+            print(f'Gasto discrecional predicho: ${prediccion:,.2f} + recurrente proyectado: ${gasto_recurrente:,.2f}')
+            prediccion += gasto_recurrente
+        
         print(f'Gasto predicho para el perídodo {siguiente_periodo}: ${prediccion:,.2f}')
         
         return prediccion
 
+    def predecir_siguiente_mes_por_usuario(self, df_preparado=None):
+        """
+        Predice el gasto del mes siguiente de cada usuario en una sola pasada vectorizada.
+        Ajusta una recta por usuario con la fórmula cerrada de mínimos cuadrados
+        (sumas agrupadas), sin entrenar un modelo por usuario.
+        Returns:
+            pd.DataFrame: usuario_id, periodo (mes predicho) y prediccion.
+        """
+        if df_preparado is None:
+            df_preparado = self.df_preparado
+        
+        if df_preparado is None or df_preparado.empty or COLUMNA_USUARIO not in df_preparado.columns:
+            print(f'Error: no hay datos preparados con la columna "{COLUMNA_USUARIO}".')
+            return None
+        
+        columna_objetivo = self.columna_objetivo if self.columna_objetivo in df_preparado.columns else 'gasto_total_mensual'
+        x = df_preparado['mes_numerico'].astype(float)
+        y = df_preparado[columna_objetivo].astype(float)
+        sumas = pd.DataFrame({
+            COLUMNA_USUARIO: df_preparado[COLUMNA_USUARIO],
+            'n': 1.0, 'x': x, 'y': y, 'xx': x * x, 'xy': x * y
+        }).groupby(COLUMNA_USUARIO).sum()
+        ultimo_mes = df_preparado.groupby(COLUMNA_USUARIO)['mes_numerico'].max()
+        
+        denominador = sumas['n'] * sumas['xx'] - sumas['x'] ** 2
+        # con un solo mes de datos no hay pendiente: se predice el promedio
+        pendiente = (sumas['n'] * sumas['xy'] - sumas['x'] * sumas['y']).div(denominador.where(denominador != 0)).fillna(0.0)
+        ordenada = (sumas['y'] - pendiente * sumas['x']) / sumas['n']
+        siguiente_mes = ultimo_mes + 1
+        
+        periodo_base = df_preparado['periodo'].min()
+        predicciones = pd.DataFrame({
+            'periodo': [periodo_base + int(m) for m in siguiente_mes],
+            'prediccion': ordenada + pendiente * siguiente_mes
+        }, index=sumas.index).reset_index()
+        
+        # lo recurrente no pasa por la regresión: se suman los cargos esperados de cada usuario en su mes
+        if columna_objetivo == 'gasto_discrecional' and self.recurrentes is not None:
+            for periodo in predicciones['periodo'].unique():
+                proyectados = self.recurrentes.proyectar_mes(periodo).groupby(COLUMNA_USUARIO)['monto'].sum()
+                en_periodo = predicciones['periodo'] == periodo
+                predicciones.loc[en_periodo, 'prediccion'] += predicciones.loc[en_periodo, COLUMNA_USUARIO].map(proyectados).fillna(0.0)
+        
+        print(f'Gasto predicho para {len(predicciones)} usuarios.')
+        return predicciones
+
     def guardar_modelo(self, ruta='data/modelo_gastos.joblib'):
         # pass
         if self.modelo:
-            joblib.dump(self.modelo, ruta)
+            import joblib
+            joblib.dump({'modelo': self.modelo, 'columna_objetivo': self.columna_objetivo_modelo, 'columna_monto': self.columna_monto_modelo}, ruta)
             print(f'Modelo guardado en "{ruta}"')
         else:
             print('No existe un modelo para guardar.')
 
     def cargar_modelo(self, ruta='modelo_gastos.joblib'):
         # pass
+        import joblib
+        
         try:
-            self.modelo = joblib.load(ruta)
+            guardado = joblib.load(ruta)
+            # los modelos guardados antes eran solo el estimador, entrenado con el gasto total
+            if isinstance(guardado, dict):
+                self.modelo = guardado['modelo']
+                self.columna_objetivo_modelo = guardado['columna_objetivo']
+                self.columna_monto_modelo = guardado.get('columna_monto', 'monto')
+            else:
+                self.modelo = guardado
+                self.columna_objetivo_modelo = 'gasto_total_mensual'
+                self.columna_monto_modelo = 'monto'
             print(f'Modelo cargado desde "{ruta}".')
             return True
         except FileNotFoundError:
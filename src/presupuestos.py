@@ -0,0 +1,222 @@
+import pandas as pd
+import numpy as np
+
+# columna que identifica al dueño de cada transacción cuando se procesan varios usuarios
+COLUMNA_USUARIO = 'usuario_id'
+
+# usuario al que se asignan los datos y presupuestos que no tienen usuario_id
+USUARIO_UNICO = ''
+
+def proyectar_por_ritmo_diario(gastado, fecha_corte):
+    """
+    Proyecta el gasto al cierre del mes a partir de lo gastado hasta fecha_corte, suponiendo
+    que se sigue gastando al mismo ritmo diario. GestorPresupuestos la usa para las categorías
+    sin una previsión del modelo (ver definir_proyecciones).
+    Args:
+        gastado (float o np.ndarray): gasto acumulado del mes (admite arreglos para proyectar muchos a la vez).
+        fecha_corte: fecha hasta la que se acumuló el gasto.
+    """
+    fecha_corte = pd.Timestamp(fecha_corte)
+    return np.asarray(gastado, dtype=float) * fecha_corte.days_in_month / fecha_corte.day
+
+class GestorPresupuestos:
+    """
+    Presupuestos por categoría y mes, con alertas de exceso y de ritmo de gasto
+    (p.ej. "ya gastaste el 70% del presupuesto de Comida y es el día 10").
+    Mantiene totales mensuales acumulados por (usuario, categoría, mes) que se
+    actualizan en O(1) con cada gasto, y evalúa todos los presupuestos de todos
+    los usuarios en una sola pasada vectorizada. La proyección al cierre usa la previsión
+    del modelo para el mes si se cargó (definir_proyecciones) y si no el ritmo diario.
+    No depende de Streamlit.
+    """
+    def __init__(self, presupuestos=None, margen_ritmo=0.1):
+        """
+        Args:
+            presupuestos (pd.DataFrame): columnas categoria, monto_presupuesto y opcionalmente
+                periodo ('AAAA-MM'; vacío = todos los meses) y usuario_id.
+            margen_ritmo (float): cuánto puede adelantarse el gasto respecto de lo transcurrido
+                del mes antes de alertar (0.1 = 10 puntos porcentuales).
+        """
+        self.margen_ritmo = margen_ritmo
+        self.presupuestos = pd.DataFrame(columns=[COLUMNA_USUARIO, 'categoria', 'periodo', 'monto_presupuesto'])
+        # (usuario, categoría, ordinal del mes) -> gasto acumulado
+        self.acumulados = {}
+        # (usuario, categoría, período o None) -> monto, para buscar el presupuesto de un gasto en O(1)
+        self._indice_presupuestos = {}
+        # (usuario, categoría, período) -> gasto previsto por el modelo para todo el mes
+        self._proyecciones = {}
+        self.ultima_fecha = None
+        if presupuestos is not None:
+            self.agregar_presupuestos(presupuestos)
+
+    def cargar_presupuestos(self, ruta_archivo):
+        """
+        Carga presupuestos desde un CSV (categoria, monto_presupuesto[, periodo][, usuario_id])
+        """
+        try:
+            self.agregar_presupuestos(pd.read_csv(ruta_archivo))
+            print(f'Presupuestos cargados: {len(self.presupuestos)}')
+            return True
+        except FileNotFoundError:
+            print(f'Error: archivo de presupuestos no encontrado en "{ruta_archivo}"')
+            return False
+
+    def agregar_presupuestos(self, presupuestos):
+        """
+        Agrega (o reemplaza) presupuestos. Un presupuesto sin período vale para todos los meses;
+        uno con período tiene prioridad sobre el general en ese mes.
+        """
+        nuevos = presupuestos.copy()
+        if COLUMNA_USUARIO not in nuevos.columns:
+            nuevos[COLUMNA_USUARIO] = USUARIO_UNICO
+        if 'periodo' not in nuevos.columns:
+            nuevos['periodo'] = None
+        nuevos[COLUMNA_USUARIO] = nuevos[COLUMNA_USUARIO].astype(str)
+        # una columna periodo toda vacía se lee como float NaN: como object, el None no vuelve a ser NaN
+        nuevos['periodo'] = nuevos['periodo'].astype(object).where(nuevos['periodo'].notna(), None)
+        nuevos['periodo'] = [None if p is None else str(pd.Period(p, freq='M')) for p in nuevos['periodo']]
+
+        claves = [COLUMNA_USUARIO, 'categoria', 'periodo']
+        todos = pd.concat([self.presupuestos, nuevos[claves + ['monto_presupuesto']]], ignore_index=True)
+        self.presupuestos = todos.drop_duplicates(subset=claves, keep='last').reset_index(drop=True)
+        self._indice_presupuestos = dict(zip(
+            zip(self.presupuestos[COLUMNA_USUARIO], self.presupuestos['categoria'], self.presupuestos['periodo']),
+            self.presupuestos['monto_presupuesto'].astype(float)
+        ))
+
+    def definir_presupuesto(self, categoria, monto, periodo=None, usuario_id=USUARIO_UNICO):
+        self.agregar_presupuestos(pd.DataFrame([{
+            COLUMNA_USUARIO: usuario_id, 'categoria': categoria, 'periodo': periodo, 'monto_presupuesto': monto
+        }]))
+
+    def definir_proyecciones(self, proyecciones, periodo):
+        """
+        Carga el gasto previsto por el modelo para cada categoría en un mes, p.ej.
+        PredictorJerarquico.desglose('categoria') ajustado con los meses anteriores.
+        La proyección al cierre de esas categorías pasa a ser lo gastado más la parte del mes
+        que falta de la previsión; las demás siguen con el ritmo diario.
+        Args:
+            proyecciones (pd.DataFrame): columnas categoria, prediccion y opcionalmente usuario_id.
+            periodo: mes de la previsión (pd.Period o 'AAAA-MM').
+        """
+        periodo = str(pd.Period(periodo, freq='M'))
+        usuarios = proyecciones[COLUMNA_USUARIO].astype(str) if COLUMNA_USUARIO in proyecciones.columns else [USUARIO_UNICO] * len(proyecciones)
+        for usuario, categoria, prediccion in zip(usuarios, proyecciones['categoria'], proyecciones['prediccion'].astype(float)):
+            self._proyecciones[(usuario, categoria, periodo)] = prediccion
+
+    def acumular(self, totales):
+        """
+        Suma totales mensuales ya agregados (ver ProcesadorDatosGastos.obtener_totales_mensuales_categoria)
+        """
+        usuarios = totales[COLUMNA_USUARIO].astype(str) if COLUMNA_USUARIO in totales.columns else pd.Series(USUARIO_UNICO, index=totales.index)
+        ordinales = pd.PeriodIndex(totales['periodo'], freq='M').asi8
+        for clave, gastado in zip(zip(usuarios, totales['categoria'], ordinales), totales['gastado'].to_numpy()):
+            self.acumulados[clave] = self.acumulados.get(clave, 0.0) + float(gastado)
+        if 'ultima_fecha' in totales.columns and not totales.empty:
+            self._actualizar_ultima_fecha(totales['ultima_fecha'].max())
+
+    def registrar_gasto(self, categoria, fecha, monto, usuario_id=USUARIO_UNICO):
+        """
+        Suma un gasto a su total mensual en O(1) y devuelve la alerta de ese presupuesto (o None)
+        """
+        fecha = pd.Timestamp(fecha)
+        clave = (str(usuario_id), categoria, pd.Period(fecha, freq='M').ordinal)
+        self.acumulados[clave] = self.acumulados.get(clave, 0.0) + float(monto)
+        self._actualizar_ultima_fecha(fecha)
+
+        presupuesto = self._presupuesto_vigente(clave)
+        if presupuesto is None:
+            return None
+        evaluacion = self._evaluar(
+            np.array([self.acumulados[clave]]), np.array([presupuesto]), fecha, [categoria], [clave[0]]
+        )
+        if evaluacion['estado'][0] == 'ok':
+            return None
+        return {COLUMNA_USUARIO: clave[0], 'categoria': categoria, 'monto_presupuesto': presupuesto,
+                **{nombre: valores[0] for nombre, valores in evaluacion.items()}}
+
+    def evaluar(self, fecha_corte=None):
+        """
+        Evalúa todos los presupuestos (de todos los usuarios) para el mes de fecha_corte.
+        Args:
+            fecha_corte: fecha a la que se mide el avance del mes; por defecto la última registrada.
+        Returns:
+            pd.DataFrame: usuario_id, categoria, periodo, gastado, monto_presupuesto, porcentaje_usado,
+                porcentaje_mes, proyeccion_cierre, fuente_proyeccion ('modelo' o 'ritmo_diario'),
+                estado ('ok', 'ritmo_alto', 'proyectado_excedido', 'excedido') y mensaje.
+        """
+        if fecha_corte is None and self.ultima_fecha is None:
+            print('Error: no hay gastos registrados ni fecha de corte para evaluar los presupuestos.')
+            return None
+        fecha_corte = pd.Timestamp(fecha_corte if fecha_corte is not None else self.ultima_fecha)
+        periodo = pd.Period(fecha_corte, freq='M')
+
+        # el presupuesto del mes tiene prioridad sobre el general de la categoría
+        vigentes = self.presupuestos[self.presupuestos['periodo'].isna() | (self.presupuestos['periodo'] == str(periodo))]
+        vigentes = (vigentes.assign(especifico=vigentes['periodo'].notna())
+                    .sort_values('especifico')
+                    .drop_duplicates(subset=[COLUMNA_USUARIO, 'categoria'], keep='last'))
+
+        gastado = np.array([
+            self.acumulados.get((usuario, categoria, periodo.ordinal), 0.0)
+            for usuario, categoria in zip(vigentes[COLUMNA_USUARIO], vigentes['categoria'])
+        ])
+        evaluacion = self._evaluar(gastado, vigentes['monto_presupuesto'].to_numpy(dtype=float), fecha_corte,
+                                   vigentes['categoria'].to_numpy(), vigentes[COLUMNA_USUARIO].to_numpy())
+
+        resultado = pd.DataFrame({
+            COLUMNA_USUARIO: vigentes[COLUMNA_USUARIO].to_numpy(),
+            'categoria': vigentes['categoria'].to_numpy(),
+            'periodo': periodo,
+            'monto_presupuesto': vigentes['monto_presupuesto'].to_numpy(dtype=float),
+            **evaluacion,
+        })
+        return resultado.sort_values('porcentaje_usado', ascending=False).reset_index(drop=True)
+
+    def _evaluar(self, gastado, presupuesto, fecha_corte, categorias, usuarios):
+        dias_mes = fecha_corte.days_in_month
+        porcentaje_mes = fecha_corte.day / dias_mes
+        # un presupuesto de 0 no tiene porcentaje: cualquier gasto ya lo excede
+        porcentaje_usado = np.divide(gastado, presupuesto, out=np.full(len(gastado), np.nan), where=presupuesto > 0)
+
+        # lo que falta del mes según la previsión del modelo; sin previsión, el ritmo diario
+        periodo = str(pd.Period(fecha_corte, freq='M'))
+        previstos = np.array([self._proyecciones.get((usuario, categoria, periodo), np.nan)
+                              for usuario, categoria in zip(usuarios, categorias)], dtype=float)
+        con_modelo = ~np.isnan(previstos)
+        proyeccion = np.where(con_modelo, gastado + np.nan_to_num(previstos) * (1 - porcentaje_mes),
+                              proyectar_por_ritmo_diario(gastado, fecha_corte))
+
+        estado = np.select(
+            [gastado > presupuesto, proyeccion > presupuesto, porcentaje_usado > porcentaje_mes + self.margen_ritmo],
+            ['excedido', 'proyectado_excedido', 'ritmo_alto'],
+            default='ok'
+        )
+        mensajes = np.array([
+            (f'Gastaste el {usado:.0%} del presupuesto de {categoria}' if limite > 0
+             else f'Gastaste ${gasto:,.2f} en {categoria}, que tiene presupuesto cero,')
+            + f' y va el día {fecha_corte.day} del mes (proyección al cierre: ${proyectado:,.2f} de ${limite:,.2f})'
+            for usado, gasto, categoria, proyectado, limite in zip(porcentaje_usado, gastado, categorias, proyeccion, presupuesto)
+        ], dtype=object)
+        mensajes[estado == 'ok'] = None
+        return {
+            'gastado': gastado,
+            'porcentaje_usado': porcentaje_usado,
+            'porcentaje_mes': np.full(len(gastado), porcentaje_mes),
+            'proyeccion_cierre': proyeccion,
+            'fuente_proyeccion': np.where(con_modelo, 'modelo', 'ritmo_diario'),
+            'estado': estado,
+            'mensaje': mensajes,
+        }
+
+    def _presupuesto_vigente(self, clave):
+        usuario, categoria, ordinal = clave
+        especifico = self._indice_presupuestos.get((usuario, categoria, str(pd.Period(ordinal=ordinal, freq='M'))))
+        if especifico is not None:
+            return especifico
+        return self._indice_presupuestos.get((usuario, categoria, None))
+
+    def _actualizar_ultima_fecha(self, fecha):
+        fecha = pd.Timestamp(fecha)
+        if self.ultima_fecha is None or fecha > self.ultima_fecha:
+            self.ultima_fecha = fecha
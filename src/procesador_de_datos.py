@@ -2,9 +2,17 @@ import pandas as pd
 import numpy as np
 import re
 from datetime import datetime, timedelta
+import os
+
+from src.deduplicador import DeduplicadorGastos
+from src.fechas import parsear_fechas
+from src.ingesta import IngestorGastos, RUTA_CUARENTENA_POR_DEFECTO
 import warnings
 warnings.filterwarnings('ignore')
 
+# columna que identifica al dueño de cada transacción cuando se procesan varios usuarios
+COLUMNA_USUARIO = 'usuario_id'
+
 class ProcesadorDatosGastos:
     """
     Clase para procesar y limpiar datos de gastos personales
@@ -13,6 +21,9 @@ class ProcesadorDatosGastos:
     def __init__(self):
         self.df = None
         self.df_original = None
+        self.errores_ingesta = None  # filas rechazadas por tipo de error en cargar_datos_validados
+        self._indices_usuario = None  # posiciones de las filas de cada usuario
+        self.libro_sql = None  # LibroSQL con los datos actuales (ver usar_sql)
         
     def cargar_datos(self, ruta_archivo):
         """
@@ -20,21 +31,40 @@ class ProcesadorDatosGastos:
         """
         try:
             self.df = pd.read_csv(ruta_archivo)
-            self.df_original = self.df.copy()
+            self.df_original = self.df  # referencia a lo leído: limpiar_datos no lo modifica, así que no hace falta copiarlo
             print(f"Datos cargados exitosamente: {len(self.df)} transacciones")
             return True
         except Exception as e:
             print(f"Error al cargar datos: {e}")
             return False
     
+    def cargar_datos_validados(self, ruta_archivo, ruta_cuarentena=RUTA_CUARENTENA_POR_DEFECTO):
+        """
+        Carga datos desde archivo CSV con tipos explícitos, validando cada fila en la misma pasada.
+        Las filas inválidas no frenan la carga: se apartan a ruta_cuarentena con el motivo
+        (None para no escribirlas).
+        """
+        ingestor = IngestorGastos(ruta_cuarentena=ruta_cuarentena)
+        df = ingestor.cargar(ruta_archivo)
+        if df is None:
+            return False
+        self.df = df
+        self.df_original = self.df
+        self.errores_ingesta = ingestor.resumen_errores()
+        print(f"Datos cargados exitosamente: {len(self.df)} transacciones")
+        return True
+    
     def limpiar_datos(self):
         """
         Limpia y prepara los datos
         """
         print("Limpiando datos...")
         
-        # Convertir fecha a datetime
-        self.df['fecha'] = pd.to_datetime(self.df['fecha'], errors='coerce')
+        # copia superficial: reemplazar columnas no toca df_original y no se duplican los datos
+        self.df = self.df.copy(deep=False)
+        
+        # Convertir fecha a datetime (formato detectado una vez; si ya es datetime no se reparsea)
+        self.df['fecha'] = parsear_fechas(self.df['fecha'])
         
         # Eliminar filas con fechas inválidas
         cantidad_antes = len(self.df)
@@ -42,9 +72,9 @@ class ProcesadorDatosGastos:
         if len(self.df) < cantidad_antes:
             print(f"Eliminadas {cantidad_antes - len(self.df)} filas con fechas inválidas")
         
-        # Limpiar montos (remover signos negativos, convertir a float)
-        self.df['monto'] = self.df['monto'].abs()  # Todos los gastos son positivos
-        self.df['monto'] = pd.to_numeric(self.df['monto'], errors='coerce')
+        # Limpiar montos (convertir a float y después remover signos negativos:
+        # con .abs() primero, un solo monto no numérico hacía fallar toda la carga)
+        self.df['monto'] = pd.to_numeric(self.df['monto'], errors='coerce').abs()  # Todos los gastos son positivos
         
         # Eliminar transacciones con montos inválidos o cero
         self.df = self.df[(self.df['monto'] > 0) & (self.df['monto'].notna())]
@@ -53,16 +83,28 @@ class ProcesadorDatosGastos:
         self.df['descripcion'] = self.df['descripcion'].str.strip().str.upper()
         
         # Detectar y marcar outliers (gastos extremadamente altos)
-        q1 = self.df['monto'].quantile(0.25)
-        q3 = self.df['monto'].quantile(0.75)
-        rango_intercuartil = q3 - q1
-        umbral_outlier = q3 + 1.5 * rango_intercuartil
-        
-        self.df['es_outlier'] = self.df['monto'] > umbral_outlier
-        cantidad_outliers = self.df['es_outlier'].sum()
-        
-        if cantidad_outliers > 0:
-            print(f"Detectados {cantidad_outliers} outliers (gastos > ${umbral_outlier:,.2f})")
+        if COLUMNA_USUARIO in self.df.columns:
+            # Con varios usuarios el umbral se calcula por usuario, no sobre todos los montos
+            montos_usuario = self.df.groupby(COLUMNA_USUARIO)['monto']
+            q1 = montos_usuario.quantile(0.25)
+            q3 = montos_usuario.quantile(0.75)
+            umbrales = q3 + 1.5 * (q3 - q1)
+            self.df['es_outlier'] = self.df['monto'] > self.df[COLUMNA_USUARIO].map(umbrales)
+            cantidad_outliers = self.df['es_outlier'].sum()
+            
+            if cantidad_outliers > 0:
+                print(f"Detectados {cantidad_outliers} outliers en {len(umbrales)} usuarios (umbral por usuario)")
+        else:
+            q1 = self.df['monto'].quantile(0.25)
+            q3 = self.df['monto'].quantile(0.75)
+            rango_intercuartil = q3 - q1
+            umbral_outlier = q3 + 1.5 * rango_intercuartil
+            
+            self.df['es_outlier'] = self.df['monto'] > umbral_outlier
+            cantidad_outliers = self.df['es_outlier'].sum()
+            
+            if cantidad_outliers > 0:
+                print(f"Detectados {cantidad_outliers} outliers (gastos > ${umbral_outlier:,.2f})")
         
         # Agregar columnas de fecha útiles
         self.df['año'] = self.df['fecha'].dt.year
@@ -73,31 +115,147 @@ class ProcesadorDatosGastos:
         # Crear período mensual para análisis
         self.df['periodo'] = self.df['fecha'].dt.to_period('M')
         
+        self._indices_usuario = None
+        self.libro_sql = None
         print(f"Datos limpios: {len(self.df)} transacciones válidas")
+    
+    def eliminar_duplicados(self, ruta_indice=None, dias_tolerancia=3):
+        """
+        Elimina transacciones duplicadas (extractos que se superponen o importados dos veces, también
+        dentro del mismo archivo) y marca los posibles duplicados en 'es_posible_duplicado'.
+        Con ruta_indice el índice de hashes persiste entre importaciones.
+        """
+        deduplicador = DeduplicadorGastos(ruta_indice=ruta_indice, dias_tolerancia=dias_tolerancia)
+        self.df = deduplicador.filtrar(self.df)
+        self._indices_usuario = None
+        self.libro_sql = None
+        return deduplicador
+    
+    def agregar_montos_ajustados(self, tasas, periodo_base=None):
+        """
+        Agrega 'monto_ars' (convertido a pesos según la moneda y la fecha) y 'monto_real'
+        (ajustado por inflación a pesos de periodo_base) usando una TablaTasas.
+        Los resúmenes aceptan columna_monto='monto_ars' o 'monto_real' en lugar de 'monto'.
+        """
+        if tasas is None:
+            print('Error: no hay tabla de tasas para ajustar los montos.')
+            return False
+        self.df = tasas.agregar_montos(self.df, periodo_base=periodo_base)
+        self.libro_sql = None
+        sin_cotizacion = self.df['monto_ars'].isna().sum()
+        if sin_cotizacion > 0:
+            print(f"Advertencia: {sin_cotizacion} transacciones sin tipo de cambio vigente para su fecha")
+        return True
+    
+    def obtener_datos_usuario(self, usuario_id):
+        """
+        Devuelve las transacciones de un usuario usando un índice por usuario
+        (se construye una sola vez, las consultas siguientes no recorren el DataFrame)
+        """
+        if self.df is None or COLUMNA_USUARIO not in self.df.columns:
+            print(f'Error: los datos no tienen la columna "{COLUMNA_USUARIO}".')
+            return None
+        
+        if self._indices_usuario is None:
+            self._indices_usuario = self.df.groupby(COLUMNA_USUARIO).indices
         
-    def obtener_estadisticas_resumen(self):
+        posiciones = self._indices_usuario.get(usuario_id)
+        if posiciones is None:
+            return self.df.iloc[0:0]
+        return self.df.iloc[posiciones]
+    
+    def guardar_particionado(self, directorio='data/gastos_por_usuario'):
+        """
+        Guarda los datos en Parquet particionado por usuario (una carpeta usuario_id=<id> por usuario)
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        if self.df is None or COLUMNA_USUARIO not in self.df.columns:
+            print(f'Error: los datos no tienen la columna "{COLUMNA_USUARIO}".')
+            return False
+        
+        # 'periodo' se recalcula al cargar, no hace falta guardarlo
+        tabla = pa.Table.from_pandas(self.df.drop(columns=['periodo'], errors='ignore'), preserve_index=False)
+        pq.write_to_dataset(tabla, root_path=directorio, partition_cols=[COLUMNA_USUARIO],
+                            existing_data_behavior='delete_matching')
+        print(f"Datos particionados por usuario guardados en: {directorio}")
+        return True
+    
+    def cargar_usuario(self, directorio, usuario_id):
+        """
+        Carga solo la partición de un usuario: el filtro por usuario_id se resuelve con los nombres
+        de las carpetas, así que no se leen los archivos del resto
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        
+        if not os.path.isdir(directorio):
+            print(f'Error: no existe el directorio "{directorio}".')
+            return False
+        
+        # pyarrow codifica los valores en el nombre de la carpeta (p.ej. 'ana/b' -> usuario_id=ana%2Fb):
+        # el dataset los decodifica igual que al escribirlos; se leen como texto para comparar con cualquier id
+        particiones = ds.partitioning(pa.schema([(COLUMNA_USUARIO, pa.string())]), flavor='hive')
+        dataset = ds.dataset(directorio, format='parquet', partitioning=particiones)
+        tabla = dataset.to_table(filter=ds.field(COLUMNA_USUARIO) == str(usuario_id))
+        if tabla.num_rows == 0:
+            print(f'Error: no existe la partición del usuario "{usuario_id}" en "{directorio}".')
+            return False
+        
+        self.df = tabla.to_pandas()
+        self.df[COLUMNA_USUARIO] = usuario_id
+        if 'fecha' in self.df.columns:
+            self.df['periodo'] = self.df['fecha'].dt.to_period('M')
+        self.df_original = None
+        self.errores_ingesta = None
+        self._indices_usuario = None
+        self.libro_sql = None
+        print(f"Datos del usuario {usuario_id} cargados: {len(self.df)} transacciones")
+        return True
+        
+    def usar_sql(self, ruta=':memory:'):
+        """
+        Pasa los datos actuales a un LibroSQL (SQLite indexado por fecha, período y categoría).
+        Mientras los datos no cambien, el resumen mensual, el resumen por categoría y los patrones
+        se calculan con consultas agrupadas en SQLite, y self.libro_sql acepta agrupamientos a medida.
+        """
+        from src.consultas import LibroSQL
+        
+        if self.df is None:
+            print('Error: no hay datos cargados.')
+            return None
+        self.libro_sql = LibroSQL.desde_dataframe(self.df, ruta)
+        return self.libro_sql
+    
+    def obtener_estadisticas_resumen(self, columna_monto='monto'):
         """
         Obtiene estadísticas resumidas de los datos
+        Args:
+            columna_monto (str): 'monto' (nominal), 'monto_ars' o 'monto_real' (ver agregar_montos_ajustados).
         """
         estadisticas = {
             'total_transacciones': len(self.df),
-            'gasto_total': self.df['monto'].sum(),
-            'gasto_promedio': self.df['monto'].mean(),
-            'gasto_mediana': self.df['monto'].median(),
+            'gasto_total': self.df[columna_monto].sum(),
+            'gasto_promedio': self.df[columna_monto].mean(),
+            'gasto_mediana': self.df[columna_monto].median(),
             'fecha_inicio': self.df['fecha'].min(),
             'fecha_fin': self.df['fecha'].max(),
             'categorias_unicas': self.df['categoria'].nunique() if 'categoria' in self.df.columns else 0,
             'outliers': self.df['es_outlier'].sum(),
-            'gastos_fin_semana': self.df[self.df['es_fin_semana']]['monto'].sum()
+            'gastos_fin_semana': self.df[self.df['es_fin_semana']][columna_monto].sum()
         }
         return estadisticas
     
-    def obtener_resumen_mensual(self):
+    def obtener_resumen_mensual(self, columna_monto='monto'):
         """
         Obtiene resumen mensual de gastos
         """
+        if self.libro_sql is not None:
+            return self.libro_sql.resumen_mensual(columna_monto)
+        
         resumen_mensual = self.df.groupby('periodo').agg({
-            'monto': ['sum', 'mean', 'count'],
+            columna_monto: ['sum', 'mean', 'count'],
             'categoria': 'nunique'
         }).round(2)
         
@@ -106,47 +264,70 @@ class ProcesadorDatosGastos:
         
         return resumen_mensual
     
-    def obtener_resumen_categoria(self):
+    def obtener_totales_mensuales_categoria(self, columna_categoria='categoria_auto', columna_monto='monto'):
+        """
+        Obtiene el gasto total por categoría y mes (y por usuario si hay varios),
+        con la última fecha registrada de cada grupo. Es la entrada de GestorPresupuestos.acumular.
+        """
+        if columna_categoria not in self.df.columns:
+            columna_categoria = 'categoria'
+        if columna_categoria not in self.df.columns:
+            return None
+        
+        claves = [COLUMNA_USUARIO] if COLUMNA_USUARIO in self.df.columns else []
+        totales = self.df.groupby(claves + [columna_categoria, 'periodo']).agg(
+            gastado=(columna_monto, 'sum'),
+            ultima_fecha=('fecha', 'max')
+        ).reset_index()
+        return totales.rename(columns={columna_categoria: 'categoria'})
+    
+    def obtener_resumen_categoria(self, columna_monto='monto'):
         """
         Obtiene resumen por categoría
         """
+        if self.libro_sql is not None:
+            return self.libro_sql.resumen_categoria(columna_monto)
+        
         if 'categoria' not in self.df.columns:
             return None
             
         resumen_categoria = self.df.groupby('categoria').agg({
-            'monto': ['sum', 'mean', 'count'],
+            columna_monto: ['sum', 'mean', 'count'],
             'fecha': ['min', 'max']
         }).round(2)
         
         resumen_categoria.columns = ['Total', 'Promedio', 'Transacciones', 'Primera', 'Última']
         
         # Calcular porcentaje del total
-        total_gastos = self.df['monto'].sum()
+        total_gastos = self.df[columna_monto].sum()
         resumen_categoria['Porcentaje'] = (resumen_categoria['Total'] / total_gastos * 100).round(1)
         
         return resumen_categoria.sort_values('Total', ascending=False)
     
-    def detectar_patrones(self):
+    def detectar_patrones(self, columna_monto='monto'):
         """
         Detecta patrones en los gastos
         """
+        if self.libro_sql is not None:
+            return self.libro_sql.detectar_patrones(columna_monto)
+        
         patrones = {}
         
         # Patrones por día de la semana
-        patrones_dia = self.df.groupby('dia_semana')['monto'].agg(['sum', 'mean', 'count'])
+        patrones_dia = self.df.groupby('dia_semana')[columna_monto].agg(['sum', 'mean', 'count'])
         nombres_dias = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
         patrones_dia.index = nombres_dias
         patrones['por_dia'] = patrones_dia
         
         # Patrones por mes
-        patrones_mes = self.df.groupby('mes')['monto'].agg(['sum', 'mean', 'count'])
+        patrones_mes = self.df.groupby('mes')[columna_monto].agg(['sum', 'mean', 'count'])
         nombres_meses = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun',
                         'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
         patrones_mes.index = [nombres_meses[i-1] for i in patrones_mes.index]
         patrones['por_mes'] = patrones_mes
         
         # Fin de semana vs días laborables
-        comparacion_fin_semana = self.df.groupby('es_fin_semana')['monto'].agg(['sum', 'mean', 'count'])
+        comparacion_fin_semana = self.df.groupby('es_fin_semana')[columna_monto].agg(['sum', 'mean', 'count'])
         comparacion_fin_semana.index = ['Días laborables', 'Fin de semana']
         patrones['fin_semana'] = comparacion_fin_semana
         
@@ -0,0 +1,135 @@
+import pandas as pd
+import numpy as np
+
+from src.fechas import parsear_fechas
+from src.normalizacion import normalizar_comercio
+
+# columna que identifica al dueño de cada transacción cuando se procesan varios usuarios
+COLUMNA_USUARIO = 'usuario_id'
+
+# periodicidades reconocidas: días entre cargos esperados y tolerancia en días
+PERIODICIDADES = {
+    'semanal': (7, 2),
+    'quincenal': (15, 3),
+    'mensual': (30.4, 4),
+    'bimestral': (61, 6),
+    'anual': (365, 15),
+}
+
+class DetectorRecurrentes:
+    """
+    Detecta gastos recurrentes (suscripciones, servicios, alquiler): cargos del mismo
+    comercio con intervalos regulares y montos estables.
+    Todo se calcula en una pasada vectorizada: se ordena por (comercio, fecha), se toman
+    las diferencias de días entre cargos consecutivos y se resumen por comercio.
+    Un recurrente sin cargos en más de intervalos_inactivo intervalos (hasta la última fecha de los
+    datos) se da por cancelado: sus cargos pasados siguen marcados, pero no se proyecta.
+    """
+    def __init__(self, minimo_ocurrencias=3, tolerancia_intervalo=0.2, tolerancia_monto=0.15, intervalos_inactivo=2.0):
+        """
+        Args:
+            minimo_ocurrencias (int): cargos mínimos de un comercio para considerarlo recurrente.
+            tolerancia_intervalo (float): dispersión relativa máxima de los intervalos (MAD / mediana).
+            tolerancia_monto (float): dispersión relativa máxima de los montos (MAD / mediana).
+            intervalos_inactivo (float): intervalos típicos sin cargos a partir de los cuales un recurrente se da por cancelado.
+        """
+        self.minimo_ocurrencias = minimo_ocurrencias
+        self.tolerancia_intervalo = tolerancia_intervalo
+        self.tolerancia_monto = tolerancia_monto
+        self.intervalos_inactivo = intervalos_inactivo
+        self.recurrentes = None  # resumen de los comercios recurrentes vigentes
+        self.recurrentes_inactivos = None  # los que dejaron de cobrarse (suscripciones canceladas)
+
+    def detectar(self, df, columna_monto='monto'):
+        """
+        Marca las transacciones recurrentes en 'es_recurrente' y guarda el resumen por comercio en self.recurrentes.
+        Con columna_monto='monto_real' los montos típicos (y sus proyecciones) quedan ajustados por inflación.
+        Returns:
+            pd.DataFrame: el mismo DataFrame con las columnas 'comercio' y 'es_recurrente'.
+        """
+        claves = [COLUMNA_USUARIO, 'comercio'] if COLUMNA_USUARIO in df.columns else ['comercio']
+        datos = pd.DataFrame({
+            'comercio': normalizar_comercio(df['descripcion']),
+            'fecha': parsear_fechas(df['fecha']),
+            'monto': df[columna_monto].astype(float),
+        }, index=df.index)
+        if COLUMNA_USUARIO in df.columns:
+            datos[COLUMNA_USUARIO] = df[COLUMNA_USUARIO]
+
+        datos = datos.dropna(subset=['fecha']).sort_values(claves + ['fecha'], kind='stable')
+        mismo_grupo = (datos[claves] == datos[claves].shift()).all(axis=1)
+        datos['intervalo'] = (datos['fecha'] - datos['fecha'].shift()).dt.days.where(mismo_grupo)
+
+        grupos = datos.groupby(claves)
+        resumen = grupos.agg(
+            cantidad=('monto', 'size'),
+            intervalo_dias=('intervalo', 'median'),
+            monto_tipico=('monto', 'median'),
+            ultima_fecha=('fecha', 'max'),
+        )
+        desvio_intervalo = (datos['intervalo'] - grupos['intervalo'].transform('median')).abs().groupby([datos[c] for c in claves]).median()
+        desvio_monto = (datos['monto'] - grupos['monto'].transform('median')).abs().groupby([datos[c] for c in claves]).median()
+        resumen['dispersion_intervalo'] = desvio_intervalo / resumen['intervalo_dias']
+        resumen['dispersion_monto'] = desvio_monto / resumen['monto_tipico']
+        resumen['periodicidad'] = self._clasificar_periodicidad(resumen['intervalo_dias'])
+
+        es_recurrente = (
+            (resumen['cantidad'] >= self.minimo_ocurrencias)
+            & resumen['periodicidad'].notna()
+            & (resumen['dispersion_intervalo'] <= self.tolerancia_intervalo)
+            & (resumen['dispersion_monto'] <= self.tolerancia_monto)
+        )
+        # sin cargos en varios intervalos hasta el final de los datos: cancelado
+        dias_sin_cargos = (datos['fecha'].max() - resumen['ultima_fecha']).dt.days
+        inactivo = dias_sin_cargos > self.intervalos_inactivo * resumen['intervalo_dias']
+        self.recurrentes = resumen[es_recurrente & ~inactivo].reset_index()
+        self.recurrentes_inactivos = resumen[es_recurrente & inactivo].reset_index()
+
+        # los cargos pasados de los cancelados también fueron recurrentes: no cuentan como gasto discrecional
+        df['comercio'] = datos['comercio'].reindex(df.index)
+        marcados = resumen[es_recurrente].reset_index()
+        recurrentes_idx = pd.MultiIndex.from_frame(marcados[claves]) if len(claves) > 1 else pd.Index(marcados['comercio'])
+        filas = pd.MultiIndex.from_frame(df[claves]) if len(claves) > 1 else pd.Index(df['comercio'])
+        df['es_recurrente'] = filas.isin(recurrentes_idx)
+
+        print(f'Detectados {len(self.recurrentes)} gastos recurrentes ({df["es_recurrente"].sum()} transacciones)'
+              + (f', {len(self.recurrentes_inactivos)} cancelados' if len(self.recurrentes_inactivos) else ''))
+        return df
+
+    def proyectar_mes(self, periodo):
+        """
+        Proyecta de forma determinística los cargos recurrentes de un mes: se avanza desde
+        el último cargo de cada comercio vigente de a su intervalo típico y se cuentan los que caen en el mes
+        (los cancelados quedan en recurrentes_inactivos y no se proyectan).
+        Returns:
+            pd.DataFrame: un cargo esperado por fila (comercio, fecha_esperada, monto).
+        """
+        columnas = [c for c in (COLUMNA_USUARIO, 'comercio') if self.recurrentes is not None and c in self.recurrentes.columns]
+        if self.recurrentes is None or self.recurrentes.empty:
+            return pd.DataFrame(columns=columnas + ['fecha_esperada', 'monto'])
+
+        periodo = pd.Period(periodo, freq='M')
+        inicio, fin = periodo.start_time.normalize(), periodo.end_time.normalize()
+        intervalo = pd.to_timedelta(self.recurrentes['intervalo_dias'], unit='D')
+        ultima = self.recurrentes['ultima_fecha']
+
+        # primer cargo esperado dentro del mes y cantidad de cargos hasta fin de mes
+        saltos_hasta_inicio = np.ceil(((inicio - ultima) / intervalo).clip(lower=1)).astype(int)
+        primera = ultima + intervalo * saltos_hasta_inicio
+        cantidad = np.floor((fin - primera) / intervalo).astype(int) + 1
+        cantidad = cantidad.clip(lower=0)
+
+        repeticiones = np.repeat(np.arange(len(self.recurrentes)), cantidad)
+        numero_cargo = np.arange(len(repeticiones)) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+        proyectados = self.recurrentes.iloc[repeticiones][columnas].reset_index(drop=True)
+        proyectados['fecha_esperada'] = pd.DatetimeIndex(
+            primera.iloc[repeticiones].to_numpy() + intervalo.iloc[repeticiones].to_numpy() * numero_cargo
+        ).normalize()
+        proyectados['monto'] = self.recurrentes['monto_tipico'].iloc[repeticiones].to_numpy()
+        return proyectados
+
+    def _clasificar_periodicidad(self, intervalos):
+        periodicidad = pd.Series(None, index=intervalos.index, dtype=object)
+        for nombre, (dias, tolerancia) in PERIODICIDADES.items():
+            periodicidad[(intervalos - dias).abs() <= tolerancia] = nombre
+        return periodicidad
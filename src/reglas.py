@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import re
+import time
+import pandas as pd
+import numpy as np
+
+# archivo de reglas que se usa si no se indica otro
+RUTA_REGLAS_POR_DEFECTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'reglas_categoria.json')
+
+CATEGORIA_POR_DEFECTO = 'Desconocido'
+
+# matchers ya compilados, compartidos por todas las instancias (clave: hash del contenido del archivo)
+_MATCHERS_POR_HASH = {}
+
+class MatcherReglas:
+    """
+    Reglas de categorización compiladas una sola vez.
+    Cada categoría se compila en una única expresión regular con todos sus patrones.
+    Se evalúan de mayor a menor prioridad y cada fila queda con la primera categoría que coincide,
+    así que ante varias coincidencias gana la de mayor prioridad (a igual prioridad, la última del archivo).
+    """
+    def __init__(self, reglas, version=None, hash_contenido=None):
+        """
+        Args:
+            reglas (list): dicts con 'categoria', 'patrones' y opcionalmente 'prioridad' (por defecto 0).
+            version: versión declarada en el archivo de reglas.
+            hash_contenido (str): sha256 del archivo del que salieron las reglas.
+        """
+        self.version = version
+        self.hash_contenido = hash_contenido
+        self.reglas = []
+        for posicion, regla in enumerate(reglas):
+            patrones = list(regla['patrones'])
+            self.reglas.append({
+                'categoria': regla['categoria'],
+                'prioridad': regla.get('prioridad', 0),
+                'posicion': posicion,
+                'patrones': patrones,
+                'expresion': re.compile('|'.join(f'(?:{patron})' for patron in patrones), re.IGNORECASE),
+            })
+        self.reglas.sort(key=lambda regla: (-regla['prioridad'], -regla['posicion']))
+
+    @property
+    def reglas_categoria(self):
+        """
+        Reglas como dict {categoria: [patrones]} en el orden del archivo
+        """
+        return {regla['categoria']: regla['patrones'] for regla in sorted(self.reglas, key=lambda r: r['posicion'])}
+
+    def categorizar(self, descripciones, por_defecto=CATEGORIA_POR_DEFECTO):
+        """
+        Devuelve la categoría de cada descripción (por_defecto si ninguna regla coincide)
+        """
+        resultado = np.full(len(descripciones), por_defecto, dtype=object)
+        pendientes = descripciones.notna().to_numpy()
+        valores = descripciones.astype(str)
+        for regla in self.reglas:
+            if not pendientes.any():
+                break
+            # solo se evalúan las filas que todavía no tienen categoría
+            posiciones = np.flatnonzero(pendientes)
+            coincide = valores.iloc[posiciones].str.contains(regla['expresion'], regex=True, na=False).to_numpy()
+            resultado[posiciones[coincide]] = regla['categoria']
+            pendientes[posiciones[coincide]] = False
+        return resultado
+
+    def perfilar(self, descripciones):
+        """
+        Mide cada patrón por separado sobre las descripciones.
+        Returns:
+            pd.DataFrame: categoria, patron, prioridad, segundos y coincidencias,
+                ordenado de más costoso a menos costoso. Los patrones con 0 coincidencias nunca se usan.
+        """
+        valores = descripciones.dropna().astype(str)
+        filas = []
+        for regla in self.reglas:
+            for patron in regla['patrones']:
+                expresion = re.compile(patron, re.IGNORECASE)
+                inicio = time.perf_counter()
+                coincidencias = int(valores.str.contains(expresion, regex=True, na=False).sum())
+                filas.append({
+                    'categoria': regla['categoria'],
+                    'patron': patron,
+                    'prioridad': regla['prioridad'],
+                    'segundos': time.perf_counter() - inicio,
+                    'coincidencias': coincidencias,
+                })
+        return pd.DataFrame(filas).sort_values('segundos', ascending=False).reset_index(drop=True)
+
+def _leer_reglas(ruta, contenido):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.toml':
+        import tomllib
+        return tomllib.loads(contenido.decode('utf-8'))
+    if extension in ('.yaml', '.yml'):
+        import yaml  # opcional: solo hace falta para reglas en YAML
+        return yaml.safe_load(contenido)
+    return json.loads(contenido)
+
+def cargar_matcher(ruta=RUTA_REGLAS_POR_DEFECTO):
+    """
+    Carga un archivo de reglas (JSON, TOML o YAML) y devuelve su matcher compilado.
+    Si el mismo contenido ya se compiló antes se reutiliza el matcher de la caché.
+    """
+    with open(ruta, 'rb') as archivo:
+        contenido = archivo.read()
+    hash_contenido = hashlib.sha256(contenido).hexdigest()
+
+    matcher = _MATCHERS_POR_HASH.get(hash_contenido)
+    if matcher is None:
+        datos = _leer_reglas(ruta, contenido)
+        matcher = MatcherReglas(datos['reglas'], version=datos.get('version'), hash_contenido=hash_contenido)
+        _MATCHERS_POR_HASH[hash_contenido] = matcher
+        print(f'Reglas de categorización cargadas desde "{ruta}" (versión {matcher.version}, {len(matcher.reglas)} categorías)')
+    return matcher
+
+class AlmacenReglas:
+    """
+    Reglas de categorización leídas de un archivo y recargadas cuando el archivo cambia.
+    """
+    def __init__(self, ruta=RUTA_REGLAS_POR_DEFECTO):
+        self.ruta = ruta
+        self._firma = None
+        self._matcher = None
+
+    def obtener(self):
+        """
+        Devuelve el matcher vigente; si el archivo cambió desde la última vez lo recarga
+        """
+        estado = os.stat(self.ruta)
+        firma = (estado.st_mtime_ns, estado.st_size)
+        if firma != self._firma:
+            self._matcher = cargar_matcher(self.ruta)
+            self._firma = firma
+        return self._matcher
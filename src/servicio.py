@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import tornado.web
+
+from src.procesador_de_datos import ProcesadorDatosGastos, COLUMNA_USUARIO
+from src.categorizador import CategorizadorGastos
+from src.predictor import PredictorGastos
+from src.recurrentes import DetectorRecurrentes
+from src.tasas import cargar_tasas, RUTA_TIPOS_DE_CAMBIO_POR_DEFECTO, RUTA_IPC_POR_DEFECTO
+
+RUTA_DATOS_POR_DEFECTO = 'data/gastos_personales.csv'
+PUERTO_POR_DEFECTO = 8888
+
+# valores del parámetro ?monto= y la columna que usan los resúmenes y la predicción
+COLUMNAS_MONTO = {'nominal': 'monto', 'ars': 'monto_ars', 'real': 'monto_real'}
+
+# parámetros que aceptan las consultas y su valor por defecto; el resto de la query string se ignora
+PARAMETROS_CONSULTA = {'monto': 'nominal'}
+
+# resultados serializados que se guardan como máximo (los menos usados se descartan primero)
+MAXIMO_RESULTADOS = 64
+
+def _a_registros(df):
+    """
+    Convierte un DataFrame (con su índice) en una lista de dicts serializable a JSON
+    """
+    df = df.reset_index()
+    for columna in df.columns:
+        if isinstance(df[columna].dtype, pd.PeriodDtype) or pd.api.types.is_datetime64_any_dtype(df[columna]):
+            df[columna] = df[columna].astype(str)
+    return df.to_dict(orient='records')
+
+class DatosServicio:
+    """
+    Datos procesados compartidos por todas las consultas del servicio.
+    Cada consulta se calcula una sola vez por versión de los datos y se guarda ya serializada
+    (hasta MAXIMO_RESULTADOS, descartando la menos usada);
+    las consultas idénticas que llegan mientras se calcula esperan el mismo resultado
+    en lugar de recalcularlo. Los datos se recargan cuando cambia el archivo.
+    """
+    def __init__(self, ruta_datos=RUTA_DATOS_POR_DEFECTO):
+        self.ruta_datos = ruta_datos
+        self.version = None
+        self.procesador = None
+        self._firma = None
+        # (consulta, parámetros) -> cuerpo JSON de la versión vigente, de la menos a la más usada
+        self._resultados = OrderedDict()
+        # (versión, consulta, parámetros) -> tarea en curso compartida por las consultas idénticas
+        self._en_curso = {}
+        # un solo hilo para los cálculos con pandas: no bloquean el loop y no corren en paralelo sobre el mismo DataFrame
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='consultas')
+        self.consultas = {
+            'resumen_mensual': self._resumen_mensual,
+            'resumen_categoria': self._resumen_categoria,
+            'patrones': self._patrones,
+            'prediccion': self._prediccion,
+        }
+
+    async def obtener_version(self):
+        """
+        Devuelve la versión vigente de los datos; si el archivo (o las tasas) cambiaron, los recarga primero
+        """
+        estado = os.stat(self.ruta_datos)
+        firma = (estado.st_mtime_ns, estado.st_size) + tuple(
+            (os.stat(ruta).st_mtime_ns, os.stat(ruta).st_size)
+            for ruta in (RUTA_TIPOS_DE_CAMBIO_POR_DEFECTO, RUTA_IPC_POR_DEFECTO) if os.path.exists(ruta)
+        )
+        if firma != self._firma:
+            await self._compartir(('carga', firma), self._cargar, firma)
+        return self.version
+
+    async def consultar(self, consulta, parametros=()):
+        """
+        Returns:
+            tuple: (versión de los datos, cuerpo JSON en bytes) o (versión, None) si la consulta no tiene resultado.
+        """
+        version = await self.obtener_version()
+        clave = (consulta, parametros)
+        if clave not in self._resultados:
+            cuerpo = await self._compartir((version, consulta, parametros), self.consultas[consulta], dict(parametros))
+            # si los datos cambiaron mientras se calculaba, el resultado no se guarda para la versión nueva
+            if version == self.version:
+                self._resultados[clave] = cuerpo
+                if len(self._resultados) > MAXIMO_RESULTADOS:
+                    self._resultados.popitem(last=False)
+            return version, cuerpo
+        self._resultados.move_to_end(clave)
+        return version, self._resultados[clave]
+
+    async def _compartir(self, clave, funcion, *argumentos):
+        tarea = self._en_curso.get(clave)
+        if tarea is None:
+            tarea = asyncio.get_running_loop().run_in_executor(self._ejecutor, funcion, *argumentos)
+            self._en_curso[clave] = tarea
+            tarea.add_done_callback(lambda _: self._en_curso.pop(clave, None))
+        # shield: si un cliente corta la conexión, la tarea sigue para los demás que la esperan
+        return await asyncio.shield(tarea)
+
+    def _cargar(self, firma):
+        procesador = ProcesadorDatosGastos()
+        if not procesador.cargar_datos(self.ruta_datos):
+            raise RuntimeError(f'no se pudieron cargar los datos de "{self.ruta_datos}"')
+        procesador.limpiar_datos()
+        procesador.eliminar_duplicados()
+        tasas = cargar_tasas()
+        if tasas is not None:
+            procesador.agregar_montos_ajustados(tasas)
+        procesador.df = CategorizadorGastos().categorizar(procesador.df)
+
+        self.procesador = procesador
+        self._resultados = OrderedDict()
+        self._firma = firma
+        self.version = hashlib.sha1(repr(firma).encode()).hexdigest()[:16]
+        print(f'Servicio: datos versión {self.version} ({len(procesador.df)} transacciones)')
+
+    def _serializar(self, resultado):
+        return json.dumps(resultado, ensure_ascii=False, default=str).encode('utf-8')
+
+    def _columna_monto(self, parametros):
+        columna = COLUMNAS_MONTO.get(parametros.get('monto', 'nominal'))
+        return columna if columna in self.procesador.df.columns else None
+
+    def _resumen_mensual(self, parametros):
+        columna_monto = self._columna_monto(parametros)
+        if columna_monto is None:
+            return None
+        return self._serializar(_a_registros(self.procesador.obtener_resumen_mensual(columna_monto)))
+
+    def _resumen_categoria(self, parametros):
+        columna_monto = self._columna_monto(parametros)
+        resumen = self.procesador.obtener_resumen_categoria(columna_monto) if columna_monto else None
+        if resumen is None:
+            return None
+        return self._serializar(_a_registros(resumen))
+
+    def _patrones(self, parametros):
+        columna_monto = self._columna_monto(parametros)
+        if columna_monto is None:
+            return None
+        patrones = self.procesador.detectar_patrones(columna_monto)
+        return self._serializar({nombre: _a_registros(tabla) for nombre, tabla in patrones.items()})
+
+    def _prediccion(self, parametros):
+        columna_monto = self._columna_monto(parametros)
+        if columna_monto is None:
+            return None
+        # copia superficial: detectar agrega columnas y no deben quedar en los datos compartidos
+        detector = DetectorRecurrentes()
+        df = detector.detectar(self.procesador.df.copy(deep=False), columna_monto=columna_monto)
+        predictor = PredictorGastos()
+        df_preparado = predictor.preparar_datos(df, recurrentes=detector, columna_monto=columna_monto)
+        if df_preparado is None or not predictor.entrenar_modelo(df_preparado):
+            return None
+
+        prediccion = predictor.predecir_siguiente_mes()
+        if prediccion is None:
+            return None
+        resultado = {
+            'periodo': str(df_preparado['periodo'].max() + 1),
+            'prediccion': float(prediccion),
+            'recurrentes': _a_registros(detector.recurrentes[[c for c in (COLUMNA_USUARIO, 'comercio', 'periodicidad', 'monto_tipico') if c in detector.recurrentes.columns]]),
+        }
+        if COLUMNA_USUARIO in df_preparado.columns:
+            resultado['por_usuario'] = _a_registros(predictor.predecir_siguiente_mes_por_usuario().set_index(COLUMNA_USUARIO))
+        return self._serializar(resultado)
+
+class ManejadorConsulta(tornado.web.RequestHandler):
+    """
+    GET de una consulta. La ETag es la versión de los datos: si el cliente ya tiene esa versión
+    (If-None-Match) se responde 304 sin calcular ni enviar nada.
+    """
+    def initialize(self, datos, consulta):
+        self.datos = datos
+        self.consulta = consulta
+
+    def compute_etag(self):
+        return f'"{self.datos.version}"' if self.datos.version else None
+
+    async def get(self):
+        try:
+            await self.datos.obtener_version()
+            self.set_etag_header()
+            if self.check_etag_header():
+                self.set_status(304)
+                return
+            parametros = self._parametros()
+            if parametros is None:
+                return
+            version, cuerpo = await self.datos.consultar(self.consulta, parametros)
+        except (OSError, RuntimeError) as e:
+            self.clear_header('Etag')
+            self.set_status(503)
+            self.write({'error': f'datos no disponibles: {e}'})
+            return
+
+        if cuerpo is None:
+            self.clear_header('Etag')
+            self.set_status(404)
+            self.write({'error': f'la consulta "{self.consulta}" no tiene resultado con los datos actuales'})
+            return
+        self.set_header('ETag', f'"{version}"')
+        self.set_header('Cache-Control', 'no-cache')  # el cliente revalida siempre con la ETag
+        self.set_header('Content-Type', 'application/json; charset=UTF-8')
+        self.write(cuerpo)
+
+    def _parametros(self):
+        """
+        Solo los parámetros conocidos (con su valor por defecto si faltan), para que la clave de la
+        consulta no dependa de argumentos ajenos. Un valor inválido se responde con 400 y devuelve None.
+        """
+        parametros = tuple((nombre, self.get_argument(nombre, defecto)) for nombre, defecto in PARAMETROS_CONSULTA.items())
+        monto = dict(parametros)['monto']
+        if monto not in COLUMNAS_MONTO:
+            self.clear_header('Etag')
+            self.set_status(400)
+            self.write({'error': f'monto inválido "{monto}" (válidos: {list(COLUMNAS_MONTO)})'})
+            return None
+        return parametros
+
+def crear_aplicacion(datos):
+    """
+    Rutas del servicio:
+        /resumen/mensual, /resumen/categoria, /patrones, /prediccion
+    Todas aceptan ?monto=nominal (por defecto), ars (convertido a pesos) o real (ajustado por inflación);
+    otro valor responde 400 y los demás argumentos se ignoran.
+    """
+    return tornado.web.Application([
+        (r'/resumen/mensual', ManejadorConsulta, dict(datos=datos, consulta='resumen_mensual')),
+        (r'/resumen/categoria', ManejadorConsulta, dict(datos=datos, consulta='resumen_categoria')),
+        (r'/patrones', ManejadorConsulta, dict(datos=datos, consulta='patrones')),
+        (r'/prediccion', ManejadorConsulta, dict(datos=datos, consulta='prediccion')),
+    ])
+
+async def main(ruta_datos=RUTA_DATOS_POR_DEFECTO, puerto=PUERTO_POR_DEFECTO):
+    datos = DatosServicio(ruta_datos)
+    await datos.obtener_version()  # los datos se cargan antes de aceptar consultas
+    crear_aplicacion(datos).listen(puerto)
+    print(f'Servicio de gastos escuchando en http://localhost:{puerto}')
+    await asyncio.Event().wait()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servicio HTTP con resúmenes y predicciones de gastos')
+    parser.add_argument('--datos', default=RUTA_DATOS_POR_DEFECTO)
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO)
+    args = parser.parse_args()
+    asyncio.run(main(args.datos, args.puerto))
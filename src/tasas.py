@@ -0,0 +1,147 @@
+import os
+import pandas as pd
+import numpy as np
+
+from src.fechas import parsear_fechas
+
+# columna opcional con la moneda de cada transacción (sin ella todo está en la moneda base)
+COLUMNA_MONEDA = 'moneda'
+MONEDA_BASE = 'ARS'
+
+RUTA_TIPOS_DE_CAMBIO_POR_DEFECTO = 'data/tipos_de_cambio.csv'
+RUTA_IPC_POR_DEFECTO = 'data/ipc.csv'
+
+# tablas ya indexadas, compartidas por todas las instancias (clave: rutas y firma de los archivos)
+_TABLAS_POR_FIRMA = {}
+
+class TablaTasas:
+    """
+    Tipos de cambio diarios por moneda e índice de precios (IPC) mensual, indexados por fecha.
+    Cada transacción toma la última cotización publicada hasta su fecha (join as-of) con una
+    búsqueda binaria (searchsorted) sobre las fechas ordenadas de su moneda: O(n log m),
+    sin ordenar ni recorrer las transacciones en Python.
+    """
+    def __init__(self, tipos_de_cambio=None, ipc=None):
+        """
+        Args:
+            tipos_de_cambio (pd.DataFrame): columnas fecha, moneda y ars_por_unidad (una cotización por día).
+            ipc (pd.DataFrame): columnas periodo ('AAAA-MM') e indice.
+        """
+        # moneda -> (fechas en ns ordenadas, pesos por unidad)
+        self.cotizaciones = {}
+        self.ipc_ordinales = np.array([], dtype=np.int64)
+        self.ipc_indices = np.array([], dtype=float)
+        if tipos_de_cambio is not None:
+            self.agregar_tipos_de_cambio(tipos_de_cambio)
+        if ipc is not None:
+            self.agregar_ipc(ipc)
+
+    def agregar_tipos_de_cambio(self, tipos_de_cambio):
+        fechas = parsear_fechas(tipos_de_cambio['fecha']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        tasas = tipos_de_cambio['ars_por_unidad'].to_numpy(dtype=float)
+        for moneda, posiciones in tipos_de_cambio.groupby('moneda').indices.items():
+            orden = posiciones[np.argsort(fechas[posiciones], kind='stable')]
+            self.cotizaciones[str(moneda).upper()] = (fechas[orden], tasas[orden])
+
+    def agregar_ipc(self, ipc):
+        ordinales = pd.PeriodIndex(ipc['periodo'].astype(str), freq='M').asi8
+        orden = np.argsort(ordinales, kind='stable')
+        self.ipc_ordinales = ordinales[orden]
+        self.ipc_indices = ipc['indice'].to_numpy(dtype=float)[orden]
+
+    @property
+    def periodo_base(self):
+        """
+        Último mes con IPC: los montos reales quedan expresados en pesos de ese mes
+        """
+        if len(self.ipc_ordinales) == 0:
+            return None
+        return pd.Period(ordinal=int(self.ipc_ordinales[-1]), freq='M')
+
+    def convertir(self, df, columna_monto='monto', columna_moneda=COLUMNA_MONEDA):
+        """
+        Convierte los montos a la moneda base con la cotización vigente en la fecha de cada transacción.
+        Returns:
+            np.ndarray: monto en pesos (NaN si no hay cotización de esa moneda hasta esa fecha).
+        """
+        montos = df[columna_monto].to_numpy(dtype=float)
+        if columna_moneda not in df.columns:
+            return montos.copy()
+
+        resultado = montos.copy()
+        fechas = parsear_fechas(df['fecha']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        # factorize: cada moneda distinta se procesa una vez (las filas sin moneda quedan con código -1)
+        codigos, monedas = pd.factorize(df[columna_moneda])
+        for codigo, moneda in enumerate(monedas):
+            moneda = str(moneda).strip().upper()
+            if moneda in (MONEDA_BASE, ''):
+                continue
+            filas = np.flatnonzero(codigos == codigo)
+            cotizacion = self.cotizaciones.get(moneda)
+            if cotizacion is None:
+                print(f'Advertencia: no hay tipo de cambio para "{moneda}" ({len(filas)} transacciones sin convertir).')
+                resultado[filas] = np.nan
+                continue
+            resultado[filas] = montos[filas] * self._valor_vigente(cotizacion[0], cotizacion[1], fechas[filas])
+        return resultado
+
+    def deflactar(self, montos, fechas, periodo_base=None):
+        """
+        Expresa montos nominales en pesos del periodo_base (por defecto el último mes con IPC):
+        monto * IPC(periodo_base) / IPC(mes de la transacción).
+        """
+        if len(self.ipc_ordinales) == 0:
+            print('Error: no hay IPC cargado para ajustar por inflación.')
+            return None
+        ordinales = np.asarray(fechas, dtype='datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+        indice_mes = self._valor_vigente(self.ipc_ordinales, self.ipc_indices, ordinales)
+        periodo_base = self.periodo_base if periodo_base is None else pd.Period(periodo_base, freq='M')
+        indice_base = self._valor_vigente(self.ipc_ordinales, self.ipc_indices, np.array([periodo_base.ordinal]))[0]
+        return np.asarray(montos, dtype=float) * indice_base / indice_mes
+
+    def agregar_montos(self, df, columna_monto='monto', periodo_base=None):
+        """
+        Agrega 'monto_ars' (convertido a pesos) y, si hay IPC, 'monto_real' (ajustado por inflación)
+        """
+        df['monto_ars'] = self.convertir(df, columna_monto=columna_monto)
+        if len(self.ipc_ordinales):
+            df['monto_real'] = self.deflactar(df['monto_ars'].to_numpy(), parsear_fechas(df['fecha']).to_numpy(), periodo_base)
+        return df
+
+    def _valor_vigente(self, claves, valores, consultas):
+        # último valor publicado hasta cada consulta (as-of hacia atrás); antes del primero no hay valor
+        posiciones = np.searchsorted(claves, consultas, side='right') - 1
+        resultado = valores[np.clip(posiciones, 0, None)] if len(valores) else np.full(len(consultas), np.nan)
+        return np.where(posiciones >= 0, resultado, np.nan)
+
+def descartar_sin_monto(df, columna_monto):
+    """
+    Quita las filas sin monto en columna_monto (en 'monto_ars' o 'monto_real', las que no tienen
+    cotización o IPC para su fecha) e informa cuántas son: contarlas como cero bajaría los totales.
+    """
+    sin_monto = df[columna_monto].isna()
+    if sin_monto.any():
+        print(f'Aviso: se descartan {int(sin_monto.sum())} transacciones sin valor en "{columna_monto}" (falta la cotización o el IPC).')
+        return df[~sin_monto]
+    return df
+
+def cargar_tasas(ruta_tipos_de_cambio=RUTA_TIPOS_DE_CAMBIO_POR_DEFECTO, ruta_ipc=RUTA_IPC_POR_DEFECTO):
+    """
+    Carga los tipos de cambio y el IPC (cualquiera de los dos puede faltar) y devuelve la tabla indexada.
+    Mientras los archivos no cambien se reutiliza la tabla de la caché.
+    """
+    rutas = [ruta for ruta in (ruta_tipos_de_cambio, ruta_ipc) if ruta and os.path.exists(ruta)]
+    if not rutas:
+        print(f'Error: no se encontraron "{ruta_tipos_de_cambio}" ni "{ruta_ipc}".')
+        return None
+
+    firma = tuple((ruta, os.stat(ruta).st_mtime_ns, os.stat(ruta).st_size) for ruta in rutas)
+    tabla = _TABLAS_POR_FIRMA.get(firma)
+    if tabla is None:
+        tabla = TablaTasas(
+            tipos_de_cambio=pd.read_csv(ruta_tipos_de_cambio) if ruta_tipos_de_cambio in rutas else None,
+            ipc=pd.read_csv(ruta_ipc) if ruta_ipc in rutas else None,
+        )
+        _TABLAS_POR_FIRMA[firma] = tabla
+        print(f'Tasas cargadas: {len(tabla.cotizaciones)} monedas, {len(tabla.ipc_ordinales)} meses de IPC')
+    return tabla
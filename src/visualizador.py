@@ -1,33 +1,55 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-class VisualizadorGastos:
-    def __init__(self):
-        # pass
+from src.fechas import parsear_fechas
+from src.libro_gastos import LibroGastos
+
+# matplotlib y seaborn se importan recién al generar el primer gráfico:
+# son las librerías más pesadas de cargar y no hacen falta para procesar datos
+_estilo_configurado = False
+
+def _librerias_graficos():
+    """
+    Importa matplotlib y seaborn y aplica el estilo de los gráficos la primera vez
+    Returns:
+        tuple: (matplotlib.pyplot, seaborn)
+    """
+    global _estilo_configurado
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if not _estilo_configurado:
         # configraciones básicas para los gráficos
-        plt.style.use('seaborn-v0_8-drakgrid') # es un estilo visual de seaborn
+        plt.style.use('seaborn-v0_8-darkgrid') # es un estilo visual de seaborn
         # rcParams: Run-Time Configurations Parameters. Parámetros de configuración en tiempo de ejecución
         plt.rcParams['figure.figsize'] = (12, 8) # serrá el tamaño por defecto de las figuras
         plt.rcParams['font.size'] = 10
         plt.rcParams['axes.labelsize'] = 12
         plt.rcParams['axes.titlesize'] = 14
-        plt.rcParams['xstick.labelsize'] = 10
-        plt.rcParams['ystick.labelsize'] = 10
+        plt.rcParams['xtick.labelsize'] = 10
+        plt.rcParams['ytick.labelsize'] = 10
         plt.rcParams['legend.fontsize'] = 10
         plt.rcParams['figure.titlesize'] = 16
+        _estilo_configurado = True
+    return plt, sns
+
+class VisualizadorGastos:
+    def __init__(self):
+        # pass
+        # el estilo se configura al generar el primer gráfico (ver _librerias_graficos)
+        pass
         
-    def generar_grafico_barras_categorias(self, df, columna_categoria='categoria_auto', titulo='Gastos Totales por Categoría'):
+    def generar_grafico_barras_categorias(self, df, columna_categoria='categoria_auto', titulo='Gastos Totales por Categoría', columna_monto='monto'):
         # pass
         """
         aqui generamos u gráfico de barras de los gastos totales
         """
-        if df is None or df.empty or 'mmonto' not in df.columns or columna_categoria not in df.columns:
+        if df is None or df.empty or columna_monto not in df.columns or columna_categoria not in df.columns:
             print(f'Error: el DataFRame para el gráfico "{titulo}" es inválido o faltan columnas.')
             return None
         
+        plt, sns = _librerias_graficos()
         fig, ax = plt.subplots() # creamos na figura nueva con sus respectivos ejes x e y ( ax-> axes)
-        gastos_por_categoria = df.groupby(columna_categoria)['monto'].sum().sort_values(ascending=False)
+        gastos_por_categoria = df.groupby(columna_categoria)[columna_monto].sum().sort_values(ascending=False)
         sns.barplot(x=gastos_por_categoria.index, y=gastos_por_categoria.values, palette='viridis', ax=ax)
         ax.set_title(titulo)
         ax.set_xlabel('Categoría')
@@ -38,24 +60,25 @@ class VisualizadorGastos:
         print(f'Gráfico "{titulo}" generado con éxito.')
         return fig
 
-    def generar_grafico_linea_mensual(self, df, columna_fecha='fecha', columna_monto='monto', titulo='Gastos Mensuales a lo largo del Tiempo'):
+    def generar_grafico_linea_mensual(self, df, columna_fecha='fecha', columna_monto='monto', titulo='Gastos Mensuales a lo largo del Tiempo', libro=None):
         # pass
         """
         Genera un gráfico lineal de lso gastos mensuales
+        Si se pasa un LibroGastos ya construido se reutiliza su índice mensual.
         """
         if df is None or df.empty or columna_fecha not in df.columns or columna_monto not in df.columns:
             return None
         
-        df_temp = df.copy()
-        df_temp[columna_fecha] = pd.to_datetime(df[columna_fecha], errors='corce')
-        df_temp.dropna(subset=[columna_fecha], inplace=True)
+        if libro is None:
+            libro = LibroGastos(df, columna_fecha=columna_fecha)
         
-        gastos_mensuales = df_temp.groupby(df_temp[columna_fecha].dt.to_period('M'))[columna_monto].sum()
+        gastos_mensuales = libro.totales_mensuales(columna_monto)
         
         if gastos_mensuales.empty:
             print(f'Advertencia: no hay datos suficientes oara generar el gráfico "{titulo}".')
             return None
         
+        plt, sns = _librerias_graficos()
         fig, ax = plt.subplots()
         sns.lineplot(x=gastos_mensuales.index.astype(str), y = gastos_mensuales.values, marker='o', color='darkblue', ax=ax)
         ax.set_title(titulo)
@@ -76,17 +99,14 @@ class VisualizadorGastos:
             print(f'Errir, el DataFRame para el grñafico "{titulo}" es inválido o faltan columnas.')
             return None
         
-        df_temp = df.copy()
-        df_temp[columna_fecha] = pd.to_datetime(df_temp[columna_fecha], errors='coerce')
-        df_temp.dropna(subset=[columna_fecha], inplace = True)
-        df_temp['mes_numero'] = df_temp[columna_fecha].dt.month
-        
-        pivot_data = df_temp.pivot_table(
-            values=columna_monto,
-            index=columna_categoria,
-            columns='mes_numero',
-            aggfunc='sum',
-            fill_value=0
+        # se agrupan solo las columnas necesarias, sin copiar el DataFrame completo
+        fechas = parsear_fechas(df[columna_fecha])
+        validas = fechas.notna()
+        pivot_data = (
+            df[columna_monto][validas]
+            .groupby([df[columna_categoria][validas], fechas[validas].dt.month.rename('mes_numero')])
+            .sum()
+            .unstack(fill_value=0)
         )
         
         if pivot_data.empty:
@@ -102,6 +122,7 @@ class VisualizadorGastos:
         else:
             print("Advertencia: No se pudieron asignar nombres de meses a todas las columnas del heatmap.")
         
+        plt, sns = _librerias_graficos()
         fig, ax = plt.subplots()
         sns.heatmap(pivot_data, annot=True, fmt='.0f', cmap='YlGnBu', linewidths=.5, ax=ax)
         ax.set_title(titulo)
@@ -125,6 +146,7 @@ class VisualizadorGastos:
             print(f'Advertencia: La columna "{columna_monto}" está vacía o contiene solo valores nulos para el gráfico "{titulo}".')
             return None
 
+        plt, sns = _librerias_graficos()
         fig, ax = plt.subplots()
         sns.histplot(df[columna_monto], bins=bins, kde=True, color='skyblue', ax=ax)
         ax.set_title(titulo)